@@ -0,0 +1,95 @@
+# backend/app/api/encoding.py
+"""
+Compact wire formats for paths.
+
+A path of (x, y, dir) poses is fully determined by its start pose and the
+action taken at every step, since the kinematics are rotate-then-move with
+unit-time actions. "actions" encodes each step as one character:
+
+    W  wait          L  rotate left (dir - 1)
+    F  move forward  R  rotate right (dir + 1)
+
+so a 300-step path becomes a 300-byte string instead of 900 JSON integers.
+"msgpack" packs the same compact document in binary; it needs the optional
+`msgpack` package.
+"""
+from typing import Dict, List, Sequence, Tuple
+from ..core.node import DELTAS
+
+try:
+    import msgpack
+except ImportError: # Optional: only the "msgpack" encoding needs it
+    msgpack = None
+
+ENCODINGS = ("poses", "actions", "msgpack")
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+Pose = Tuple[int, int, int]
+
+def encode_actions(path: Sequence[Sequence[int]]) -> str:
+    """Action string of a pose path (the start pose is not included)."""
+    actions = []
+    for (x, y, d), (nx, ny, nd) in zip(path, path[1:]):
+        if (nx, ny) == (x, y):
+            if nd == d:
+                actions.append("W")
+            elif nd == (d - 1) % 4:
+                actions.append("L")
+            elif nd == (d + 1) % 4:
+                actions.append("R")
+            else:
+                raise ValueError(f"Not a single rotation: {(x, y, d)} -> {(nx, ny, nd)}")
+        elif nd == d and (nx - x, ny - y) == DELTAS[d]:
+            actions.append("F")
+        else:
+            raise ValueError(f"Not a forward move: {(x, y, d)} -> {(nx, ny, nd)}")
+    return "".join(actions)
+
+def decode_actions(start: Sequence[int], actions: str) -> List[Pose]:
+    x, y, d = start
+    path = [(x, y, d)]
+    for action in actions:
+        if action == "F":
+            dx, dy = DELTAS[d]
+            x, y = x + dx, y + dy
+        elif action == "L":
+            d = (d - 1) % 4
+        elif action == "R":
+            d = (d + 1) % 4
+        elif action != "W":
+            raise ValueError(f"Unknown action {action!r}")
+        path.append((x, y, d))
+    return path
+
+def compact_path(path: Sequence[Sequence[int]]) -> Dict:
+    return {"start": list(path[0]), "actions": encode_actions(path)}
+
+def compact_paths(document: Dict) -> Dict:
+    """
+    A response document (SolutionResponse as a plain dict, or a /step reply)
+    whose "paths" entries carry "start" and "actions" instead of "path".
+    """
+    paths = []
+    for entry in document["paths"]:
+        compact = {k: v for k, v in entry.items() if k != "path"}
+        compact.update(compact_path(entry["path"]))
+        paths.append(compact)
+    return {**document, "paths": paths}
+
+def pack(document: Dict) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("The msgpack encoding needs the optional 'msgpack' package")
+    return msgpack.packb(document, use_bin_type=True)
+
+def pose_delta(poses: Sequence[Sequence[int]], last: Dict[int, Pose]) -> List[List[int]]:
+    """
+    [agent_id, x, y, dir] for every agent whose pose differs from `last`,
+    which is updated in place (what the client has seen so far).
+    """
+    changed = []
+    for agent_id, pose in enumerate(poses):
+        pose = tuple(pose)
+        if last.get(agent_id) != pose:
+            last[agent_id] = pose
+            changed.append([agent_id, *pose])
+    return changed
@@ -0,0 +1,154 @@
+# backend/app/api/jobs.py
+import asyncio
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+class QueueFull(Exception):
+    """Raised when the queue already holds `max_pending` unfinished jobs."""
+
+class JobQueue:
+    """
+    Runs CPU-bound solves in a worker-process pool so the event loop stays
+    responsive. At most `max_pending` jobs may be queued or running at once;
+    beyond that `submit` raises QueueFull and the API answers 429.
+
+    Cancelling a queued job removes it; a job that is already running cannot
+    be interrupted, so it is only marked cancelled and its result dropped.
+    """
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 64, max_finished: int = 1024):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Future]" = OrderedDict()
+        self._cancelled = set()
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    @property
+    def workers(self) -> int:
+        return self.max_workers or os.cpu_count() or 1
+
+    def pending(self) -> int:
+        return sum(1 for f in self._jobs.values() if not f.done())
+
+    def submit(self, fn: Callable, *args) -> str:
+        with self._lock:
+            if self.pending() >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} jobs already pending")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = self.pool.submit(fn, *args)
+            self._evict_finished()
+        return job_id
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Submit and await in one go (used by the synchronous-looking endpoints)."""
+        job_id = self.submit(fn, *args)
+        return await asyncio.wrap_future(self._jobs[job_id])
+
+    async def stream(self, tasks: AsyncIterator[Tuple[int, Optional[Callable], tuple]],
+                     limit: int) -> AsyncIterator[Tuple[int, bool, Any]]:
+        """
+        Run `(index, fn, args)` tasks on the pool and yield `(index, ok, value)`
+        in completion order, `value` being the result or the raised exception.
+        No more than `limit` tasks are in flight and the next one is only
+        pulled from `tasks` when a slot frees up, so neither the input nor the
+        results pile up in memory. A task with `fn` None is an input error
+        (`args[0]` is the exception) and is passed straight through.
+        Stream jobs bypass `max_pending`: `limit` already bounds them.
+        """
+        in_flight: Dict[asyncio.Future, int] = {}
+        tasks = tasks.__aiter__()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(in_flight) < limit:
+                    try:
+                        index, fn, args = await tasks.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    if fn is None:
+                        yield index, False, args[0]
+                        continue
+                    in_flight[asyncio.wrap_future(self.pool.submit(fn, *args))] = index
+                if not in_flight:
+                    return
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    if future.exception() is not None:
+                        yield index, False, future.exception()
+                    else:
+                        yield index, True, future.result()
+        finally:
+            # Client went away (or the stream ended early): drop queued work
+            for future in in_flight:
+                future.cancel()
+
+    def get(self, job_id: str) -> Optional[Future]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> None:
+        future = self._jobs[job_id]
+        if future.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except asyncio.TimeoutError:
+            pass # Still queued or running: status() says so
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise # The waiting request was cancelled, not the job
+        except Exception:
+            pass # The job failed: status() reports its error
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        future = self._jobs[job_id]
+        info: Dict[str, Any] = {"job_id": job_id}
+        if job_id in self._cancelled or future.cancelled():
+            info["status"] = "cancelled"
+        elif not future.done():
+            info["status"] = "running" if future.running() else "queued"
+        elif future.exception() is not None:
+            info["status"] = "failed"
+            info["error"] = repr(future.exception())
+        else:
+            info["status"] = "done"
+            info["result"] = future.result()
+        return info
+
+    def cancel(self, job_id: str) -> bool:
+        """True if the job will not deliver a result."""
+        future = self._jobs[job_id]
+        if future.done() and job_id not in self._cancelled:
+            return False
+        future.cancel()
+        self._cancelled.add(job_id)
+        return True
+
+    def _evict_finished(self) -> None:
+        finished = [jid for jid, f in self._jobs.items() if f.done()]
+        for jid in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[jid]
+            self._cancelled.discard(jid)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+# Shared by every route; sized from the environment so deployments can tune it
+JOBS = JobQueue(
+    max_workers=int(os.environ["OPTICBS_WORKERS"]) if os.environ.get("OPTICBS_WORKERS") else None,
+    max_pending=int(os.environ.get("OPTICBS_MAX_PENDING", "64")),
+)
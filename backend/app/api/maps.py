@@ -0,0 +1,31 @@
+# backend/app/api/maps.py
+import os
+from typing import Iterable, Optional, Tuple
+from ..utils.grid import Grid
+from ..utils.lru import LRUCache
+
+class MapRegistry:
+    """
+    Uploaded warehouse layouts, so clients send the obstacle list once and
+    then refer to the map by id. Ids are the layout fingerprint: uploading
+    the same layout twice returns the same id. Least recently used maps are
+    dropped beyond `max_maps`; clients then get a 404 and upload again.
+    """
+    def __init__(self, max_maps: int = 64):
+        self._maps = LRUCache(maxsize=max_maps)
+
+    def register(self, width: int, height: int, obstacles: Iterable[Tuple[int, int]]) -> Grid:
+        grid = Grid(width, height, obstacles)
+        existing = self._maps.get(grid.fingerprint)
+        if existing is not None:
+            return existing
+        self._maps.put(grid.fingerprint, grid)
+        return grid
+
+    def get(self, map_id: str) -> Optional[Grid]:
+        return self._maps.get(map_id)
+
+    def __len__(self) -> int:
+        return len(self._maps)
+
+MAPS = MapRegistry(max_maps=int(os.environ.get("OPTICBS_MAX_MAPS", "64")))
@@ -0,0 +1,107 @@
+# backend/app/api/metrics.py
+"""
+Process-wide solver metrics in the Prometheus text exposition format.
+Solves run in worker processes, so the API process aggregates the `stats`
+block of every SolutionResponse it hands out instead of instrumenting
+the solvers directly.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _format_labels(labels: Labels, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: Dict[Labels, float] = defaultdict(float)
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.buckets = sorted(buckets)
+        self.counts: Dict[Labels, List[int]] = {}
+        self.sums: Dict[Labels, float] = defaultdict(float)
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        counts = self.counts.setdefault(labels, [0] * (len(self.buckets) + 1))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-1] += 1 # +Inf
+        self.sums[labels] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, counts in sorted(self.counts.items()):
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', repr(float(bound)))])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', '+Inf')])} {counts[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(self.sums[labels])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {counts[-1]}")
+        return lines
+
+_SECONDS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+_NODES = (1, 10, 100, 1e3, 1e4, 1e5, 1e6, 1e7)
+
+class SolverMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.solves = Counter("opticbs_solves_total", "Solve requests answered, by solver and status.")
+        self.solve_seconds = Histogram("opticbs_solve_seconds", "Solver wall time per request.", _SECONDS)
+        self.conflict_seconds = Histogram("opticbs_conflict_detection_seconds",
+                                          "Time spent detecting conflicts per request.", _SECONDS)
+        self.hl_expanded = Histogram("opticbs_high_level_expanded_nodes",
+                                     "Constraint-tree nodes expanded per request.", _NODES)
+        self.hl_generated = Histogram("opticbs_high_level_generated_nodes",
+                                      "Constraint-tree nodes generated per request.", _NODES)
+        self.ll_expansions = Histogram("opticbs_low_level_expansions",
+                                       "Low-level search expansions per request.", _NODES)
+        self.peak_open = Histogram("opticbs_high_level_peak_open",
+                                   "Largest high-level open list per request.", _NODES)
+        self.cached = Counter("opticbs_solution_cache_hits_total", "Requests answered from the solution cache.")
+
+    def observe(self, status: str, stats: Dict) -> None:
+        labels = (("solver", stats.get("solver", "unknown")),)
+        with self._lock:
+            self.solves.inc(labels + (("status", status),))
+            self.solve_seconds.observe(stats.get("solve_time_s", 0.0), labels)
+            self.conflict_seconds.observe(stats.get("conflict_time_s", 0.0), labels)
+            self.hl_expanded.observe(stats.get("hl_expanded", 0), labels)
+            self.hl_generated.observe(stats.get("hl_generated", 0), labels)
+            self.ll_expansions.observe(stats.get("ll_expansions", 0), labels)
+            self.peak_open.observe(stats.get("hl_peak_open", 0), labels)
+
+    def observe_cached(self) -> None:
+        with self._lock:
+            self.cached.inc()
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            for metric in (self.solves, self.cached, self.solve_seconds, self.conflict_seconds,
+                           self.hl_generated, self.hl_expanded, self.ll_expansions, self.peak_open):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+METRICS = SolverMetrics()
@@ -1,70 +1,347 @@
 # backend/app/api/routes.py
-from fastapi import APIRouter, HTTPException
-from typing import List, Tuple
-from ..core.cbs import CBSSolver
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import ValidationError
+import asyncio
+import json
+import time
+from typing import Iterator, List, Optional, Tuple
 from ..core.scheduler import WarehouseManager
 from ..utils.grid import Grid
-from .schemas import GridRequest, SolutionResponse, PathResponse
-from ..core.prioritized import PrioritizedPlanner
+from .encoding import MSGPACK_MEDIA_TYPE, compact_paths, pack, pose_delta
+from .schemas import GridRequest, SolutionResponse, JobResponse, MapRequest, MapResponse
+from .service import solve_request, solve_step
+from .jobs import JOBS, QueueFull
+from .maps import MAPS
+from .metrics import METRICS
+from ..core.cache import SOLUTION_CACHE, canonical_hash
+from ..core.lns import LNSImprover, replan_neighborhood
 
 router = APIRouter()
 
 # Global Manager for the "Amazon Mode" (Lifelong MAPF)
 MANAGER = None 
+# Ticks mutate MANAGER around an awaited solve, so they must not interleave
+STEP_LOCK = asyncio.Lock()
+# Path-cache hits/misses summed over all worker processes
+PATH_CACHE_TOTALS = {"hits": 0, "misses": 0}
+
+def _queue_full(exc: QueueFull) -> HTTPException:
+    # Backpressure: tell clients to come back instead of piling up work
+    return HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "1"})
+
+def _count_path_cache(stats: dict) -> None:
+    for k in PATH_CACHE_TOTALS:
+        PATH_CACHE_TOTALS[k] += stats.get("path_cache", {}).get(k, 0)
+
+def _grid_for(request: GridRequest) -> Grid:
+    """The registered map named by `map_id`, or the inline layout of the request."""
+    if request.map_id is not None:
+        grid = MAPS.get(request.map_id)
+        if grid is None:
+            raise HTTPException(status_code=404, detail="Unknown map, upload it to /maps again")
+        return grid
+    if request.width is None or request.height is None:
+        raise HTTPException(status_code=422, detail="Either map_id or width and height are required")
+    return Grid(request.width, request.height, request.obstacles)
+
+def _map_response(grid: Grid) -> MapResponse:
+    return MapResponse(map_id=grid.fingerprint, width=grid.width, height=grid.height,
+                       num_obstacles=grid.num_obstacles)
+
+def _encoded(document: dict, encoding: str):
+    """`document` with its paths in the requested wire format."""
+    if encoding == "poses":
+        return document
+    document = compact_paths(jsonable_encoder(document))
+    if encoding == "actions":
+        return JSONResponse(document)
+    try:
+        return Response(pack(document), media_type=MSGPACK_MEDIA_TYPE)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=406, detail=str(exc))
+
+# --- Map registry: upload a layout once, then send only its map_id ---
+
+@router.post("/maps", response_model=MapResponse, status_code=201)
+async def register_map(request: MapRequest):
+    return _map_response(MAPS.register(request.width, request.height, request.obstacles))
+
+@router.get("/maps/{map_id}", response_model=MapResponse)
+async def get_map(map_id: str):
+    grid = MAPS.get(map_id)
+    if grid is None:
+        raise HTTPException(status_code=404, detail="Unknown map")
+    return _map_response(grid)
 
 @router.post("/solve", response_model=SolutionResponse)
 async def solve_mapf(request: GridRequest):
-    grid = Grid(request.width, request.height, request.obstacles)
-    starts_with_dir = [(s[0], s[1], 0) for s in request.starts]
-    
-    # --- AUTO-SWITCH LOGIC ---
-    if len(request.starts) > 3: 
-        print(f"Agents: {len(request.starts)} > 3. Using Prioritized Planning.")
-        solver = PrioritizedPlanner(grid)
-    else:
-        # Use Optimal Solver for simple cases (1-3 agents)
-        print(f"Agents: {len(request.starts)} <= 3. Using Optimal CBS.")
-        solver = CBSSolver(grid)
-
-    raw_paths = solver.solve(starts_with_dir, request.goals)
-    
-    if raw_paths is None:
-        return SolutionResponse(paths=[], total_cost=0, status="Failed")
-    
-    # 5. Format Response
-    formatted_paths = []
-    total_cost = 0
-    
-    for i, path in enumerate(raw_paths):
-        # Path comes back as [(x,y,dir), ...]. We send it all to frontend.
-        cost = len(path) - 1
-        total_cost += cost
-        formatted_paths.append(PathResponse(agent_id=i, path=path, cost=cost))
-        
-    return SolutionResponse(
-        paths=formatted_paths, 
-        total_cost=total_cost, 
-        status="Solved"
-    )
+    # Identical instances (same layout, starts, goals, w, window) are answered from cache;
+    # a windowed plan is only conflict-free up to its window, so it never answers a full one
+    grid = _grid_for(request)
+    key = canonical_hash(grid, request.starts, request.goals, w=request.suboptimality, window=request.window)
+    cached = SOLUTION_CACHE.get(key)
+    if cached is not None and not request.profile: # Profiling needs a real solve
+        METRICS.observe_cached()
+        # The stored stats describe the solve that produced the plan, not this request
+        hit = SolutionResponse(paths=cached.paths, total_cost=cached.total_cost, status=cached.status,
+                               stats={"solver": cached.stats.get("solver"), "cached": True})
+        return _encoded(hit, request.encoding)
+
+    # Solving happens in a worker process; the event loop only awaits it
+    try:
+        response = await JOBS.run(solve_request, request, grid)
+    except QueueFull as exc:
+        raise _queue_full(exc)
+    _count_path_cache(response.stats)
+    METRICS.observe(response.status, response.stats)
+    if response.status == "Solved" and not request.profile: # Never cache timeouts, failures or profiles
+        SOLUTION_CACHE.put(key, response)
+    return _encoded(response, request.encoding)
+
+def _ndjson_line(document: dict) -> str:
+    return json.dumps(jsonable_encoder(document), separators=(",", ":")) + "\n"
+
+def _ndjson_lines(body: bytes) -> Iterator[bytes]:
+    """Non-empty lines of an NDJSON body, sliced one at a time."""
+    start = 0
+    while start < len(body):
+        end = body.find(b"\n", start)
+        if end < 0:
+            end = len(body)
+        line = body[start:end]
+        start = end + 1
+        if line.strip():
+            yield line
+
+async def _batch_tasks(body: bytes, map_id: Optional[str]):
+    """One solve task per scenario line; bad lines become error tasks."""
+    index = 0
+    for line in _ndjson_lines(body):
+        try:
+            fields = json.loads(line)
+            if map_id is not None and fields.get("map_id") is None and fields.get("width") is None:
+                fields["map_id"] = map_id
+            scenario = GridRequest(**fields)
+            yield index, solve_request, (scenario, _grid_for(scenario))
+        except HTTPException as exc:
+            yield index, None, (ValueError(exc.detail),)
+        except (ValueError, TypeError, AttributeError, ValidationError) as exc:
+            yield index, None, (exc,)
+        index += 1
+
+@router.post("/solve/batch")
+async def solve_batch(request: Request, map_id: Optional[str] = None, max_in_flight: Optional[int] = None,
+                      encoding: str = "poses"):
+    """
+    Many scenarios in one round trip. The body is newline-delimited JSON, one
+    /solve request per line; lines without their own map use `map_id`. Results
+    come back as NDJSON in completion order, each tagged with the line index
+    it answers: {"index", "result"} or {"index", "error"}. Scenarios run on
+    the worker pool, at most `max_in_flight` (default: one per worker) at a
+    time, and the solution cache is bypassed. `encoding` is "poses" or
+    "actions" for all results (NDJSON has no room for msgpack).
+    """
+    if encoding not in ("poses", "actions"):
+        raise HTTPException(status_code=422, detail="Batch encoding must be 'poses' or 'actions'")
+    if map_id is not None and MAPS.get(map_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown map, upload it to /maps again")
+    limit = max(1, max_in_flight or JOBS.workers)
+    # Read up front: once streaming starts, Starlette's disconnect listener
+    # owns the receive channel. Lines are still parsed only when submitted.
+    body = await request.body()
+
+    async def results():
+        async for index, ok, value in JOBS.stream(_batch_tasks(body, map_id), limit):
+            if ok:
+                _count_path_cache(value.stats)
+                METRICS.observe(value.status, value.stats)
+                result = jsonable_encoder(value)
+                line = {"index": index, "result": compact_paths(result) if encoding == "actions" else result}
+            else:
+                line = {"index": index, "error": str(value) or repr(value)}
+            yield _ndjson_line(line)
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.post("/solve/improve")
+async def solve_improve(request: GridRequest, improve_ms: float = 5000, neighborhood_size: int = 8,
+                        max_in_flight: Optional[int] = None):
+    """
+    Anytime solve, streamed as NDJSON: the plan of the usual /solve first
+    ("iteration": 0, all paths), then every improvement Large Neighborhood
+    Search finds within `improve_ms` (only the paths that changed), then a
+    summary line with "done": true. Neighborhoods are replanned on the
+    worker pool, `max_in_flight` (default: one per worker) at a time.
+    """
+    if request.encoding == "msgpack":
+        raise HTTPException(status_code=422, detail="Streamed encoding must be 'poses' or 'actions'")
+    grid = _grid_for(request)
+    try:
+        initial = await JOBS.run(solve_request, request, grid)
+    except QueueFull as exc:
+        raise _queue_full(exc)
+    _count_path_cache(initial.stats)
+    METRICS.observe(initial.status, initial.stats)
+    limit = max(1, max_in_flight or JOBS.workers)
+
+    def encode(document: dict) -> dict:
+        return compact_paths(document) if request.encoding == "actions" else document
+
+    async def lines():
+        yield _ndjson_line(encode({"iteration": 0, **jsonable_encoder(initial)}))
+        if not initial.paths:
+            return
+        paths = [p.path for p in initial.paths]
+        lns = LNSImprover(grid, [p[0] for p in paths], request.goals, paths, neighborhood_size)
+        deadline = time.monotonic() + improve_ms / 1000.0
+        proposals = {}
+
+        async def neighborhoods():
+            # Proposed only when a slot frees up, so each sees the latest plan
+            index = 0
+            while time.monotonic() < deadline:
+                proposals[index] = lns.propose()
+                yield index, replan_neighborhood, lns.task_args(proposals[index][1])
+                index += 1
+
+        async for index, ok, value in JOBS.stream(neighborhoods(), limit):
+            kind, agents = proposals.pop(index)
+            improvement = lns.offer(kind, agents, value if ok else None)
+            if improvement is not None:
+                changed = [{"agent_id": i, "path": path, "cost": len(path) - 1}
+                           for i, path in sorted(improvement.paths.items())]
+                yield _ndjson_line(encode({
+                    "iteration": improvement.iteration, "neighborhood": improvement.neighborhood,
+                    "sum_of_costs": improvement.sum_of_costs, "conflicts": improvement.conflicts,
+                    "paths": changed}))
+        yield _ndjson_line({"done": True, "iterations": lns.iterations, "sum_of_costs": lns.sum_of_costs,
+                            "conflicts": lns.conflicts, "accepted": lns.accepted})
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus scrape target: solver histograms aggregated over all requests."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return {"solutions": SOLUTION_CACHE.stats(), "paths": dict(PATH_CACHE_TOTALS)}
+
+# --- Job API: submit now, collect later ---
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: GridRequest):
+    grid = _grid_for(request)
+    try:
+        job_id = JOBS.submit(solve_request, request, grid)
+    except QueueFull as exc:
+        raise _queue_full(exc)
+    return JOBS.status(job_id)
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = 0.0):
+    """Poll a job; `wait` > 0 long-polls for up to that many seconds."""
+    if JOBS.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if wait > 0:
+        await JOBS.wait(job_id, timeout=min(wait, 60.0))
+    return JOBS.status(job_id)
+
+@router.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    if JOBS.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    JOBS.cancel(job_id)
+    return JOBS.status(job_id)
 
 # --- Advanced Endpoints (Tier 2/3) ---
 
 @router.post("/initialize")
 async def init_warehouse(req: GridRequest):
     global MANAGER
+    grid = _grid_for(req)
+    width, height = grid.width, grid.height
     # Auto-detect shelves (Top rows) and stations (Bottom rows) for demo
-    shelves = [(x, y) for x in range(req.width) for y in range(req.height) if y < 2]
-    stations = [(x, req.height-1) for x in range(req.width) if x % 2 == 0]
-    chargers = [(0, req.height-1), (req.width-1, req.height-1)]
+    shelves = [(x, y) for x in range(width) for y in range(height) if y < 2]
+    stations = [(x, height-1) for x in range(width) if x % 2 == 0]
+    chargers = [(0, height-1), (width-1, height-1)]
     
-    MANAGER = WarehouseManager(req.width, req.height, shelves, stations, chargers)
+    MANAGER = WarehouseManager(width, height, shelves, stations, chargers, grid=grid)
     return {"status": "Initialized Amazon Mode"}
 
 @router.post("/step")
 async def simulation_step(req: GridRequest):
+    async with STEP_LOCK:
+        result = await _simulation_step(req)
+    return _encoded(result, req.encoding) if "paths" in result else result
+
+@router.websocket("/step/ws")
+async def simulation_stream(websocket: WebSocket):
+    """
+    Lifelong simulation over one connection. The first message is a /step
+    request (layout, starts, window, ...); every later message advances one
+    tick, with robots assumed to have followed the plan, and may override
+    any of those fields (e.g. "starts" to resync drifted robots). Each reply
+    carries only what changed since the previous one:
+
+        {"tick", "status", "replanned",
+         "poses": [[agent_id, x, y, dir], ...],    # robots that moved or turned
+         "robots": [[agent_id, state, battery], ...]} # task state or battery changed
+    """
+    await websocket.accept()
+    settings: dict = {}
+    shown_poses: dict = {}
+    shown_robots: dict = {}
+    tick = 0
+    try:
+        while True:
+            message = await websocket.receive_json()
+            try:
+                if not isinstance(message, dict):
+                    raise ValueError("Messages must be JSON objects")
+                fields = {**settings, **message}
+                if "starts" not in message and shown_poses:
+                    fields["starts"] = [shown_poses[i] for i in range(len(shown_poses))]
+                req = GridRequest(**fields)
+                async with STEP_LOCK:
+                    result = await _simulation_step(req)
+            except HTTPException as exc:
+                await websocket.send_json({"error": exc.detail})
+                continue
+            except (ValueError, TypeError, ValidationError) as exc:
+                await websocket.send_json({"error": str(exc)})
+                continue
+            if "error" in result:
+                await websocket.send_json(result)
+                continue
+            settings = {k: v for k, v in fields.items() if k != "starts"}
+            if "starts" in message: # The client already knows these poses
+                pose_delta([p["path"][0] for p in result["paths"]], shown_poses)
+            tick += 1
+            # Pose at the next tick; robots without a plan stay where they are
+            next_poses = [p["path"][1] if len(p["path"]) > 1 else p["path"][0] for p in result["paths"]]
+            robots = {}
+            for p in result["paths"]:
+                state = (p["state"], p["battery"])
+                if shown_robots.get(p["agent_id"]) != state:
+                    shown_robots[p["agent_id"]] = state
+                    robots[p["agent_id"]] = state
+            await websocket.send_json({
+                "tick": tick, "status": result["status"], "replanned": result["replanned"],
+                "poses": pose_delta(next_poses, shown_poses),
+                "robots": [[i, state, battery] for i, (state, battery) in robots.items()],
+            })
+    except WebSocketDisconnect:
+        return
+
+async def _simulation_step(req: GridRequest):
     global MANAGER
     if not MANAGER: 
         return {"error": "Call /initialize first"}
+    grid = _grid_for(req)
     
     current_starts = []
     current_goals = []
@@ -77,20 +354,41 @@ async def simulation_step(req: GridRequest):
         direction = start_pose[2] if len(start_pose) > 2 else 0
         
         r = MANAGER.update_robot(i, x, y, direction)
-        
-        # 2. Get Goal from Scheduler
-        goal = MANAGER.get_next_goal(i)
         current_starts.append((r.x, r.y, r.direction))
-        current_goals.append(goal)
-        
-    # 3. Solve (Windowed)
-    grid = Grid(req.width, req.height, req.obstacles)
-    solver = CBSSolver(grid)
-    
-    # Solve for next 10 steps (Windowed Search)
-    # The solver logic needs to support a 'max_horizon' logic ideally, 
-    # but standard CBS will just find the full path. We can slice it here.
-    paths = solver.solve(current_starts, current_goals)
+
+    # Rolling horizon: between replans the robots just keep following the
+    # last windowed plan, so most ticks cost no search at all
+    replanned = 0 # Agents searched for this tick
+    paths = None
+    if req.window is not None:
+        paths = MANAGER.advance_plan(current_starts, min(req.replan_period, req.window))
+
+    if paths is None:
+        # 2. Get Goal from Scheduler (idle robots are matched to orders as a batch first,
+        # on a thread: pricing shelves builds distance tables, which must not stall the loop)
+        await asyncio.get_running_loop().run_in_executor(None, MANAGER.assign_idle)
+        for i in range(len(current_starts)):
+            current_goals.append(MANAGER.get_next_goal(i))
+
+        # 3. Solve (Windowed)
+        # Without a window, conflicts are resolved along the full paths; with
+        # one, only for the next `window` steps. Robots that kept their goal
+        # and stayed on plan keep their paths, the rest are planned around them.
+        key = canonical_hash(grid, current_starts, current_goals, mode="step", window=req.window)
+        paths = SOLUTION_CACHE.get(key)
+        if paths is None:
+            previous = MANAGER.carry_over(current_starts, current_goals)
+            try:
+                paths, stats = await JOBS.run(solve_step, grid, current_starts, current_goals,
+                                              req.window, previous)
+            except QueueFull as exc:
+                raise _queue_full(exc)
+            _count_path_cache(stats)
+            replanned = stats["replanned"]
+            if paths is not None and stats["status"] == "Solved": # Robots left waiting get another try
+                SOLUTION_CACHE.put(key, paths)
+        if paths is not None:
+            MANAGER.store_plan(paths, current_goals)
     
     formatted_paths = []
     if paths:
@@ -103,4 +401,4 @@ async def simulation_step(req: GridRequest):
                 "state": MANAGER.robots[i].task_state
             })
     
-    return {"paths": formatted_paths, "status": "Running"}
\ No newline at end of file
+    return {"paths": formatted_paths, "status": "Running", "replanned": replanned}
\ No newline at end of file
@@ -1,14 +1,41 @@
 # backend/app/api/schemas.py
-from pydantic import BaseModel
-from typing import List, Tuple, Union, Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Tuple, Union, Optional
 
-class GridRequest(BaseModel):
+class MapRequest(BaseModel):
+    width: int
+    height: int
+    obstacles: List[Tuple[int, int]] = []
+
+class MapResponse(BaseModel):
+    map_id: str
     width: int
     height: int
+    num_obstacles: int
+
+class GridRequest(BaseModel):
+    # Either a registered layout (map_id) or an inline one (width, height, obstacles)
+    map_id: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
     obstacles: List[Tuple[int, int]] = []
     # Allow starts to be (x, y) OR (x, y, direction)
     starts: List[Union[Tuple[int, int, int], Tuple[int, int]]]
     goals: List[Tuple[int, int]]
+    # Suboptimality factor w: 1.0 = optimal CBS, > 1.0 = ECBS with cost <= w * optimal
+    suboptimality: float = Field(1.0, ge=1.0)
+    # Cooperative limits: on expiry the best plan so far comes back with status "Timeout"
+    time_budget_ms: Optional[int] = Field(None, gt=0)
+    node_budget: Optional[int] = Field(None, gt=0)  # High- plus low-level expansions
+    # Rolling-horizon planning: resolve conflicts only in the next `window` steps
+    # and (for /step) replan every `replan_period` ticks, capped at the window
+    window: Optional[int] = Field(None, gt=0)
+    replan_period: int = Field(1, gt=0)
+    # Attach a cProfile summary (top functions by cumulative time) to stats
+    profile: bool = False
+    # Wire format of the returned paths: (x, y, dir) lists, start pose plus an
+    # action string (see api/encoding.py), or that in msgpack
+    encoding: Literal["poses", "actions", "msgpack"] = "poses"
 
 class PathResponse(BaseModel):
     agent_id: int
@@ -19,4 +46,14 @@ class PathResponse(BaseModel):
 class SolutionResponse(BaseModel):
     paths: List[PathResponse]
     total_cost: int
-    status: str
\ No newline at end of file
+    status: str
+    # Solver telemetry: solver name, path-cache hits/misses, high-/low-level
+    # node counts, conflict-detection time, peak open lists (and "profile");
+    # a cache hit carries only the solver name and "cached": true
+    stats: Dict[str, Any] = {}
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str  # 'queued', 'running', 'done', 'failed' or 'cancelled'
+    result: Optional[SolutionResponse] = None
+    error: Optional[str] = None
\ No newline at end of file
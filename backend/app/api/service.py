@@ -0,0 +1,147 @@
+# backend/app/api/service.py
+"""
+Solver entry points that run inside the worker processes of the job queue.
+Everything here must be importable and picklable without the FastAPI app.
+"""
+import cProfile
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+from ..core.ecbs import ECBSSolver
+from ..core.independence import IndependenceSolver
+from ..core.pibt import PIBTSolver
+from ..core.prioritized import PrioritizedPlanner
+from ..core.cache import PATH_CACHE
+from ..core.distance_store import attach_stores
+from ..core.stats import profile_summary
+from ..utils.grid import Grid
+from ..utils.lru import LRUCache
+from .schemas import GridRequest, SolutionResponse, PathResponse
+
+logger = logging.getLogger(__name__)
+
+# Fleet sizes each solver is trusted with before falling back to Prioritized Planning
+MAX_ID_AGENTS = 60
+MAX_ECBS_AGENTS = 30
+# Independence Detection solves conflicting groups up to this size with CBS
+# and plans larger ones agent by agent. Groups are solved in this process:
+# it already is one of the job queue's workers, so a pool of its own would
+# only oversubscribe the CPUs (and pay its startup on every request)
+MAX_GROUP_AGENTS = 8
+ID_DEFAULT_BUDGET_MS = 30000
+# Prioritized Planning also tries this many other priority orders (longest
+# trip first, shortest first, then shuffles) within the deadline, one after
+# another in this worker, and keeps the plan with fewest stuck agents
+PP_RESTARTS = 3
+PP_RESTART_DEADLINE_S = 5.0
+# From this many agents on, PIBT/LaCAM replaces Prioritized Planning; its
+# search is complete but may run long, so it always gets a time budget
+MIN_PIBT_AGENTS = 100
+PIBT_DEFAULT_BUDGET_MS = 30000
+
+# Layouts compiled offline (python -m app.core.distance_store); every worker
+# maps the same files, so their distance tables are shared and never built
+attach_stores(os.environ.get("OPTICBS_DISTANCE_STORES"))
+
+def _path_cache_counts() -> Dict[str, int]:
+    return {"hits": PATH_CACHE.hits, "misses": PATH_CACHE.misses}
+
+def _path_cache_delta(before: Dict[str, int]) -> Dict[str, int]:
+    # Workers each have their own PATH_CACHE; the API process sums these deltas
+    return {k: v - before[k] for k, v in _path_cache_counts().items()}
+
+# Layouts seen by this worker, so the move table is built once per map
+_GRIDS = LRUCache(maxsize=32)
+
+def _local_grid(grid: Grid) -> Grid:
+    cached = _GRIDS.get(grid.fingerprint)
+    if cached is None:
+        _GRIDS.put(grid.fingerprint, grid)
+        cached = grid
+    return cached
+
+def solve_request(request: GridRequest, grid: Optional[Grid] = None) -> SolutionResponse:
+    """`grid` is the resolved layout (registered map); built from the request if omitted."""
+    before = _path_cache_counts()
+    if grid is None:
+        grid = Grid(request.width, request.height, request.obstacles)
+    grid = _local_grid(grid)
+    starts_with_dir = [(s[0], s[1], 0) for s in request.starts]
+    budget = {"time_budget_ms": request.time_budget_ms, "node_budget": request.node_budget}
+    
+    # --- AUTO-SWITCH LOGIC ---
+    if len(request.starts) >= MIN_PIBT_AGENTS:
+        logger.info("Agents: %d >= %d. Using PIBT with LaCAM.", len(request.starts), MIN_PIBT_AGENTS)
+        solver = PIBTSolver(grid, time_budget_ms=request.time_budget_ms or PIBT_DEFAULT_BUDGET_MS,
+                            node_budget=request.node_budget)
+    elif request.suboptimality > 1.0 and len(request.starts) <= MAX_ECBS_AGENTS:
+        logger.info("Agents: %d, w=%s. Using Bounded-Suboptimal ECBS.", len(request.starts), request.suboptimality)
+        solver = ECBSSolver(grid, request.suboptimality, **budget)
+    elif len(request.starts) > MAX_ID_AGENTS: 
+        logger.info("Agents: %d > %d. Using Prioritized Planning.", len(request.starts), MAX_ID_AGENTS)
+        solver = PrioritizedPlanner(grid, restarts=PP_RESTARTS, deadline_s=PP_RESTART_DEADLINE_S, workers=0, **budget)
+    else:
+        # Optimal CBS, but only over the groups of agents that actually interact
+        logger.info("Agents: %d <= %d. Using CBS with Independence Detection.", len(request.starts), MAX_ID_AGENTS)
+        solver = IndependenceSolver(grid, time_budget_ms=request.time_budget_ms or ID_DEFAULT_BUDGET_MS,
+                                    node_budget=request.node_budget, window=request.window,
+                                    max_group_size=MAX_GROUP_AGENTS)
+
+    profiler = cProfile.Profile() if request.profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        raw_paths = solver.solve(starts_with_dir, request.goals)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    
+    stats = {"solver": type(solver).__name__, "path_cache": _path_cache_delta(before)}
+    stats.update(solver.stats.as_dict())
+    if profiler is not None:
+        stats["profile"] = profile_summary(profiler)
+    
+    if raw_paths is None:
+        return SolutionResponse(paths=[], total_cost=0, status="Failed", stats=stats)
+    
+    # 5. Format Response
+    formatted_paths = []
+    total_cost = 0
+    
+    for i, path in enumerate(raw_paths):
+        # Path comes back as [(x,y,dir), ...]. We send it all to frontend.
+        cost = len(path) - 1
+        total_cost += cost
+        formatted_paths.append(PathResponse(agent_id=i, path=path, cost=cost))
+        
+    return SolutionResponse(
+        paths=formatted_paths, 
+        total_cost=total_cost, 
+        status=solver.status, # "Solved"; "Timeout" or "Partial" with the best plan so far
+        stats=stats
+    )
+
+def solve_step(grid: Grid, starts: List[Tuple[int, int, int]], goals: List[Tuple[int, int]],
+               window: Optional[int] = None, previous: Optional[List[Optional[list]]] = None):
+    """
+    Joint plan for one /step tick of the lifelong simulation, plus stats
+    (path-cache counts, how many agents were replanned and the solver
+    status: anything but "Solved" left some robot waiting or in conflict).
+    previous: warm start from WarehouseManager.carry_over; only agents
+    without a usable path are replanned, around everyone else's.
+    """
+    before = _path_cache_counts()
+    grid = _local_grid(grid)
+    if previous is not None and any(p is not None for p in previous):
+        solver = PrioritizedPlanner(grid)
+        paths, agents = solver.repair(starts, goals, previous, window)
+        replanned = len(agents)
+    else: # Cold start
+        if len(starts) > MAX_ID_AGENTS:
+            solver = PrioritizedPlanner(grid)
+        else:
+            solver = IndependenceSolver(grid, time_budget_ms=ID_DEFAULT_BUDGET_MS, window=window,
+                                        max_group_size=MAX_GROUP_AGENTS)
+        paths = solver.solve(starts, goals)
+        replanned = len(starts)
+    return paths, {"path_cache": _path_cache_delta(before), "replanned": replanned, "status": solver.status}
@@ -0,0 +1,147 @@
+# backend/app/core/assignment.py
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+def hungarian(cost: Sequence[Sequence[float]]) -> List[int]:
+    """
+    Minimum-cost assignment (Hungarian method with potentials, O(n^2 m)).
+    cost is an n x m matrix with n <= m; returns the column given to each row.
+    """
+    n = len(cost)
+    if n == 0:
+        return []
+    m = len(cost[0])
+    if n > m:
+        raise ValueError("Need at least as many columns as rows")
+    inf = float('inf')
+    # 1-based potentials; p[j] is the row matched to column j (0 = free)
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while p[j0] != 0:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    assignment = [0] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+class SpatialIndex:
+    """
+    Nearest-point lookups over a static set of points (stations, chargers,
+    open orders) on a width x height map. The map is cut into square
+    buckets and every bucket stores the few points that can be nearest to
+    some cell inside it (those not farther than the best worst-case
+    distance), so a query scans a short candidate list instead of every
+    point. Candidate lists are worked out the first time a bucket is
+    queried. Distances are Manhattan.
+    """
+    def __init__(self, points: Iterable[Tuple[int, int]], width: int, height: int, bucket_size: int = 8):
+        self.points = list(points)
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+        self.cols = -(-width // bucket_size)
+        self.rows = -(-height // bucket_size)
+        self.candidates: List[Optional[List[Tuple[int, int]]]] = [None] * (self.cols * self.rows)
+        # Points lying in each bucket, for k_nearest
+        self.members: List[List[Tuple[int, int]]] = [[] for _ in range(self.cols * self.rows)]
+        for px, py in self.points:
+            self.members[self._bucket(px, py)].append((px, py))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _bucket(self, x: int, y: int) -> int:
+        bx = min(max(x // self.bucket_size, 0), self.cols - 1)
+        by = min(max(y // self.bucket_size, 0), self.rows - 1)
+        return by * self.cols + bx
+
+    def nearest(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        bx, by = x // self.bucket_size, y // self.bucket_size
+        if 0 <= bx < self.cols and 0 <= by < self.rows:
+            b = by * self.cols + bx
+            candidates = self.candidates[b]
+            if candidates is None:
+                x0, y0 = bx * self.bucket_size, by * self.bucket_size
+                x1 = min(x0 + self.bucket_size, self.width) - 1
+                y1 = min(y0 + self.bucket_size, self.height) - 1
+                candidates = self.candidates[b] = _bucket_candidates(self.points, x0, y0, x1, y1)
+        else:
+            candidates = self.points # Off the map: plain scan
+        best, best_dist = None, float('inf')
+        for px, py in candidates:
+            dist = abs(px - x) + abs(py - y)
+            if dist < best_dist or (dist == best_dist and (px, py) < best):
+                best, best_dist = (px, py), dist
+        return best
+
+    def k_nearest(self, x: int, y: int, k: int) -> List[Tuple[int, int]]:
+        """
+        The k points closest to (x, y), nearest first (ties broken by
+        coordinates). Buckets are scanned in growing square rings around
+        the query until no unscanned point can beat the k-th best one.
+        """
+        if k <= 0 or not self.points:
+            return []
+        size = self.bucket_size
+        b = self._bucket(x, y)
+        bx, by = b % self.cols, b // self.cols
+        found = []
+        for r in range(max(self.cols, self.rows)):
+            for cy in range(max(by - r, 0), min(by + r, self.rows - 1) + 1):
+                edge = abs(cy - by) == r
+                for cx in (range(bx - r, bx + r + 1) if edge else (bx - r, bx + r)):
+                    if 0 <= cx < self.cols:
+                        for px, py in self.members[cy * self.cols + cx]:
+                            found.append((abs(px - x) + abs(py - y), px, py))
+            if len(found) >= k:
+                found.sort()
+                # Every point of the next ring lies outside the buckets scanned so far
+                x0, x1 = (bx - r) * size, (bx + r + 1) * size
+                y0, y1 = (by - r) * size, (by + r + 1) * size
+                if found[k - 1][0] < min(x - x0 + 1, x1 - x, y - y0 + 1, y1 - y):
+                    break
+        found.sort()
+        return [(px, py) for _, px, py in found[:k]]
+
+def _bucket_candidates(points, x0: int, y0: int, x1: int, y1: int) -> List[Tuple[int, int]]:
+    """Points that are the nearest one for at least one cell of the rectangle (or tie it)."""
+    if not points:
+        return []
+    def closest(px, py): # Distance to the nearest cell of the rectangle
+        return max(x0 - px, 0, px - x1) + max(y0 - py, 0, py - y1)
+    def farthest(px, py): # Distance to the farthest cell of the rectangle
+        return max(abs(px - x0), abs(px - x1)) + max(abs(py - y0), abs(py - y1))
+    bound = min(farthest(px, py) for px, py in points)
+    return [(px, py) for px, py in points if closest(px, py) <= bound]
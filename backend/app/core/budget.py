@@ -0,0 +1,38 @@
+# backend/app/core/budget.py
+import time
+from typing import Optional
+
+class BudgetExhausted(Exception):
+    """Raised from inside a search once its SearchBudget runs out."""
+
+class SearchBudget:
+    """
+    Cooperative time / node budget shared by one solve call.
+    The high level and every low-level search charge it per expansion;
+    the first charge past the limit raises BudgetExhausted so the solver
+    can unwind and return its best result so far.
+    """
+    def __init__(self, time_budget_ms: Optional[float] = None, node_budget: Optional[int] = None):
+        self.deadline = time.monotonic() + time_budget_ms / 1000.0 if time_budget_ms is not None else None
+        self.node_budget = node_budget
+        self.nodes = 0
+
+    def charge(self, nodes: int = 1) -> None:
+        self.nodes += nodes
+        if self.exhausted():
+            raise BudgetExhausted()
+
+    def exhausted(self) -> bool:
+        if self.node_budget is not None and self.nodes >= self.node_budget:
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining_ms(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, (self.deadline - time.monotonic()) * 1000.0)
+
+    def remaining_nodes(self) -> Optional[int]:
+        if self.node_budget is None:
+            return None
+        return max(0, self.node_budget - self.nodes)
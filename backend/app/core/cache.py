@@ -0,0 +1,39 @@
+# backend/app/core/cache.py
+import hashlib
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+from .node import Constraint
+from ..utils.grid import Grid
+from ..utils.lru import LRUCache
+
+# Full solutions keyed by canonical_hash(); lives in the API process
+SOLUTION_CACHE = LRUCache(maxsize=512)
+# Single-agent low-level results keyed by path_key(); one per solver process
+PATH_CACHE = LRUCache(maxsize=4096)
+
+def canonical_hash(grid: Grid, starts, goals, **params: Any) -> str:
+    """
+    Content address of a MAPF instance: the layout fingerprint plus starts,
+    goals and any solver parameters that change the answer. Obstacle order
+    and duplicates do not matter, and (x, y) starts equal (x, y, 0).
+    """
+    payload = {
+        "grid": grid.fingerprint,
+        "starts": [[s[0], s[1], s[2] if len(s) > 2 else 0] for s in starts],
+        "goals": [[g[0], g[1]] for g in goals],
+        "params": sorted(params.items()),
+    }
+    return hashlib.sha1(json.dumps(payload, separators=(",", ":")).encode()).hexdigest()
+
+def constraint_key(constraints: Iterable[Constraint]) -> frozenset:
+    """Agent-independent, order-independent key of a constraint set."""
+    return frozenset((c.time, c.x, c.y, c.next_x, c.next_y, c.is_vertex) for c in constraints)
+
+def path_key(grid: Grid, engine: str, start_pose: Tuple[int, int, int], goal: Tuple[int, int],
+             constraints: Iterable[Constraint], current_battery: int, max_time: int,
+             window: Optional[int] = None) -> Tuple:
+    return (grid.fingerprint, engine, tuple(start_pose), tuple(goal),
+            constraint_key(constraints), current_battery, max_time, window)
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return {"solutions": SOLUTION_CACHE.stats(), "paths": PATH_CACHE.stats()}
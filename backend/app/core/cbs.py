@@ -1,94 +1,440 @@
 # backend/app/core/cbs.py
 import heapq
-import copy
-from typing import List, Tuple, Optional, Dict
-from dataclasses import dataclass, field
+import itertools
+import time
+from typing import List, Tuple, Optional, Dict, Union
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from .node import Constraint, PathResult
-from .conflict import detect_conflict, Conflict
-from .low_level import space_time_astar
+from .conflict import detect_all_conflicts, Conflict, ConflictIndex
+from .corridor import corridor_constraints
+from .engines import get_low_level
+from .constraint_table import ConstraintTable
+from .mdd import MDD, build_mdd, classify_conflict, CARDINAL, NON_CARDINAL, CONFLICT_RANK
+from .budget import SearchBudget, BudgetExhausted
+from .cache import PATH_CACHE, path_key, constraint_key
+from .low_level import SearchTree
+from .stats import SolverStats
 from ..utils.grid import Grid
 
 @dataclass(order=True)
 class CTNode:
-    cost: int
-    constraints: List[Constraint] = field(compare=False)
+    """
+    Constraint-tree node. Constraints are stored as a persistent chain: each
+    node only holds the constraint it added plus a link to its parent.
+    Paths are shared by reference with the parent except for the one agent
+    that was replanned, so a child costs O(agents) instead of a deep copy.
+    Nodes are ordered by f = cost + h (h: admissible high-level heuristic,
+    0 unless the solver sets one), then by their number of conflicts.
+    `constraint` is one constraint, or a tuple of constraints on one agent
+    added together (the range constraints of corridor reasoning).
+    With a `window`, only conflicts up to that timestep are tracked.
+    """
+    f: int
+    num_conflicts: int
+    cost: int = field(compare=False)
+    conflicts: List[Conflict] = field(compare=False)
+    constraint: Optional[Union[Constraint, Tuple[Constraint, ...]]] = field(compare=False)
+    parent: Optional["CTNode"] = field(compare=False)
     paths: List[List[Tuple[int, int, int]]] = field(compare=False) # Updated to (x, y, dir)
+    window: Optional[int] = field(compare=False)
     
-    def __init__(self, constraints, paths):
-        self.constraints = constraints
+    def __init__(self, paths, constraint=None, parent=None, conflicts=None, window=None):
+        self.constraint = constraint
+        self.parent = parent
         self.paths = paths
+        self.window = window
         self.cost = sum(len(p) - 1 for p in paths) 
+        self.h = 0
+        self.f = self.cost
+        self.conflicts = conflicts if conflicts is not None else detect_all_conflicts(paths, window)
+        self.num_conflicts = len(self.conflicts)
+        self.cardinality: Optional[List[str]] = None # Per conflict, once classified
+
+    @property
+    def constraints(self) -> List[Constraint]:
+        """All constraints on the branch from the root, oldest first."""
+        chain = []
+        node = self
+        while node is not None and node.constraint is not None:
+            chain.extend(reversed(added_constraints(node.constraint)))
+            node = node.parent
+        chain.reverse()
+        return chain
+
+    def constraints_for(self, agent_id: int) -> List[Constraint]:
+        return [c for c in self.constraints if c.agent_id == agent_id]
+
+    def child(self, constraint: Union[Constraint, Tuple[Constraint, ...]], path: List[Tuple[int, int, int]],
+              index: Optional[ConflictIndex] = None) -> "CTNode":
+        """
+        index: ConflictIndex over this node's paths. Conflicts not involving the
+        replanned agent carry over; only its new path is checked against the index.
+        """
+        agent_id = added_constraints(constraint)[0].agent_id
+        new_paths = list(self.paths) # Shallow: unchanged paths are shared
+        new_paths[agent_id] = path
+        if index is None:
+            index = ConflictIndex(self.paths)
+        conflicts = [c for c in self.conflicts if agent_id not in (c.agent_1, c.agent_2)]
+        conflicts.extend(index.conflicts_for(agent_id, path, self.window))
+        conflicts.sort(key=lambda c: c.time)
+        return CTNode(new_paths, constraint, self, conflicts, self.window)
+
+def added_constraints(constraint: Union[Constraint, Tuple[Constraint, ...]]) -> Tuple[Constraint, ...]:
+    return constraint if isinstance(constraint, tuple) else (constraint,)
+
+def constraints_from_conflict(conflict: Conflict) -> List[Constraint]:
+    """The two constraints a conflict branches into, one per agent."""
+    if conflict.type == 'vertex':
+        c1 = Constraint(conflict.time, conflict.agent_1, conflict.x, conflict.y, is_vertex=True)
+        c2 = Constraint(conflict.time, conflict.agent_2, conflict.x, conflict.y, is_vertex=True)
+        return [c1, c2]
+
+    # Edge: agent_1 moved (x, y) -> (next_x, next_y), agent_2 the other way
+    c1 = Constraint(conflict.time, conflict.agent_1, conflict.x, conflict.y, 
+                    next_x=conflict.next_x, next_y=conflict.next_y, is_vertex=False)
+    c2 = Constraint(conflict.time, conflict.agent_2, conflict.next_x, conflict.next_y,
+                    next_x=conflict.x, next_y=conflict.y, is_vertex=False)
+    return [c1, c2]
+
+_MISS = object()
+
+HEURISTICS = ("none", "cg", "wdg")
+# High-level nodes one WDG pair sub-search may expand before settling for its lower bound
+PAIR_NODE_LIMIT = 64
+# Largest dependency-graph component whose vertex cover is solved exactly
+EXACT_COVER_LIMIT = 8
+# Bytes of low-level search trees kept for incremental replanning, per solve
+SEARCH_TREE_BYTES = 64 << 20
+
+def min_vertex_cover(weights: Dict[Tuple[int, int], int]) -> int:
+    """
+    Edge-weighted minimum vertex cover: the least sum of x_i >= 0 with
+    x_i + x_j >= w_ij on every edge. Exact on small components; larger
+    ones fall back to a greedy matching, which is still a lower bound
+    (matched edges share no agent, so their weights add up).
+    """
+    adjacency: Dict[int, Dict[int, int]] = {}
+    for (i, j), w in weights.items():
+        if w > 0:
+            adjacency.setdefault(i, {})[j] = w
+            adjacency.setdefault(j, {})[i] = w
+    total, seen = 0, set()
+    for root in adjacency:
+        if root in seen:
+            continue
+        component, stack = [], [root]
+        seen.add(root)
+        while stack:
+            v = stack.pop()
+            component.append(v)
+            for u in adjacency[v]:
+                if u not in seen:
+                    seen.add(u)
+                    stack.append(u)
+        if len(component) <= EXACT_COVER_LIMIT:
+            total += _exact_cover(component, adjacency)
+        else:
+            matched = set()
+            for (i, j), w in sorted(weights.items(), key=lambda e: -e[1]):
+                if i in component and i not in matched and j not in matched:
+                    matched.update((i, j))
+                    total += w
+    return total
+
+def _exact_cover(component: List[int], adjacency: Dict[int, Dict[int, int]]) -> int:
+    order = sorted(component, key=lambda v: -len(adjacency[v]))
+    values: Dict[int, int] = {}
+    best = [sum(max(adjacency[v].values()) for v in component)]
+
+    def assign(k: int, total: int) -> None:
+        if total >= best[0]:
+            return
+        if k == len(order):
+            best[0] = total
+            return
+        v = order[k]
+        need = max([w - values[u] for u, w in adjacency[v].items() if u in values] + [0])
+        for x in range(need, max(max(adjacency[v].values()), need) + 1):
+            values[v] = x
+            assign(k + 1, total + x)
+        del values[v]
+
+    assign(0, 0)
+    return best[0]
 
 class CBSSolver:
-    def __init__(self, grid: Grid):
+    def __init__(self, grid: Grid, low_level: str = "astar",
+                 time_budget_ms: Optional[float] = None, node_budget: Optional[int] = None,
+                 window: Optional[int] = None, heuristic: str = "cg",
+                 prioritize: bool = True, corridor: bool = True, incremental: bool = False):
+        """
+        low_level: single-agent engine, "astar" (space-time A*) or "sipp".
+        time_budget_ms / node_budget: cooperative limits for one solve call
+        (nodes = high-level plus low-level expansions). When they run out,
+        solve() returns the best plan so far and sets status to "Timeout".
+        window: rolling-horizon (RHCR) mode. Only conflicts in the first
+        `window` timesteps are resolved; beyond that each path follows its
+        distance-table route, so a solve costs the same however long the
+        trips are. Callers must replan at least every `window` steps.
+        heuristic: admissible high-level heuristic. "cg" counts the agents
+        needed to cover the cardinal conflict graph, "wdg" weighs each
+        dependent pair by the extra cost of solving it on its own (fewer
+        CT nodes, but each one costs a few small pair searches).
+        prioritize: branch on cardinal, then semi-cardinal conflicts first
+        (classified with MDDs) instead of simply the earliest one.
+        corridor: resolve head-on conflicts in 1-wide corridors with one
+        pair of range constraints instead of one split per timestep.
+        The last three rely on optimal paths and are off in window mode.
+        incremental: a child's replan continues the search that planned the
+        agent in its parent (the most recent searches are kept, up to
+        SEARCH_TREE_BYTES) from just before the new constraint, instead of
+        starting over. Only for the "astar" engine; stats.ll_reused counts
+        the expansions saved. Off by default: it saves expansions but rarely
+        wall time (see benchmarks/bench_incremental.py), and costs memory.
+        """
+        if heuristic not in HEURISTICS:
+            raise ValueError(f"Unknown CBS heuristic '{heuristic}', expected one of {list(HEURISTICS)}")
         self.grid = grid
+        self.low_level_name = low_level
+        self.low_level = get_low_level(low_level)
+        self.time_budget_ms = time_budget_ms
+        self.node_budget = node_budget
+        self.window = window
+        self.heuristic = heuristic if window is None else "none"
+        self.prioritize = prioritize and window is None
+        self.corridor = corridor and window is None
+        self.incremental = incremental and low_level == "astar"
+        self.status = "Idle"
+        self.stats = SolverStats()
 
     def solve(self, starts: List[Tuple[int, int, int]], goals: List[Tuple[int, int]]) -> Optional[List[List[Tuple[int, int, int]]]]:
+        # Starts may come as (x, y); robots then face East by default
+        starts = [tuple(s) if len(s) == 3 else (s[0], s[1], 0) for s in starts]
+        self.budget = SearchBudget(self.time_budget_ms, self.node_budget)
+        self.stats = SolverStats()
+        self.starts, self.goals = starts, goals
+        self._mdds: Dict[tuple, MDD] = {}
+        self._pair_deltas: Dict[tuple, int] = {}
+        self._trees: Dict[tuple, SearchTree] = OrderedDict() # Least recently used first
+        self._tree_bytes = 0
+        # Best plan seen so far (fewest conflicts, then cheapest); agents the
+        # root has not planned yet stay parked at their start.
+        self.best_paths = [[start] for start in starts]
+        self.best_key = None
+
+        t0 = time.perf_counter()
+        try:
+            paths = self._search(starts, goals)
+        except BudgetExhausted:
+            self.status = "Timeout"
+            return self.best_paths
+        finally:
+            self.stats.solve_time_s = time.perf_counter() - t0
+        self.status = "Solved" if paths is not None else "Failed"
+        return paths
+
+    def _record(self, node: CTNode) -> None:
+        key = (node.num_conflicts, node.cost)
+        if self.best_key is None or key < self.best_key:
+            self.best_key = key
+            self.best_paths = node.paths
+
+    def _plan(self, agent_id, start, goal, constraints: List[Constraint], parent: Optional[List[Constraint]] = None):
+        """
+        Low-level call through the single-agent path cache: repeated requests
+        and sibling CT nodes often ask for the same (start, goal, constraints).
+        parent: the agent's constraints in the parent CT node, a prefix of
+        `constraints`; in incremental mode its search is continued.
+        """
+        key = path_key(self.grid, self.low_level_name, start, goal, constraints, 100, 300, self.window)
+        cached = PATH_CACHE.get(key, _MISS)
+        if cached is not _MISS:
+            return cached
+        incremental = {}
+        if self.incremental:
+            incremental["record"] = tree = SearchTree()
+            parent_tree = self._tree((agent_id, constraint_key(parent))) if parent is not None else None
+            if parent_tree is not None:
+                incremental["resume"] = (parent_tree, min(c.time for c in constraints[len(parent):]))
+        # FIX: Added current_battery=100
+        with self.stats.low_level(self.budget):
+            path_res = self.low_level(
+                self.grid, 
+                start, 
+                goal, 
+                [], 
+                agent_id,
+                current_battery=100,
+                constraint_table=ConstraintTable(constraints),
+                budget=self.budget,
+                window=self.window,
+                **incremental
+            )
+        if self.incremental:
+            self._keep_tree((agent_id, constraint_key(constraints)), tree)
+        self.stats.note_path(path_res)
+        if path_res is not None:
+            self.stats.ll_reused += path_res.reused
+        PATH_CACHE.put(key, path_res)
+        return path_res
+
+    def _tree(self, key: tuple) -> Optional[SearchTree]:
+        tree = self._trees.get(key)
+        if tree is not None:
+            self._trees.move_to_end(key)
+        return tree
+
+    def _keep_tree(self, key: tuple, tree: SearchTree) -> None:
+        """Store a search tree, dropping the least recently used ones beyond SEARCH_TREE_BYTES."""
+        old = self._trees.pop(key, None)
+        if old is not None:
+            self._tree_bytes -= old.nbytes
+        self._trees[key] = tree
+        self._tree_bytes += tree.nbytes
+        while self._tree_bytes > SEARCH_TREE_BYTES:
+            self._tree_bytes -= self._trees.popitem(last=False)[1].nbytes
+
+    def _search(self, starts, goals):
         num_agents = len(starts)
         
         # 1. Root Initialization
         root_paths = []
         for i in range(num_agents):
             # FIX: Added current_battery=100
-            path_res = space_time_astar(
-                self.grid, 
-                starts[i], 
-                goals[i], 
-                [], 
-                i, 
-                current_battery=100 
-            )
+            path_res = self._plan(i, starts[i], goals[i], [])
             if path_res is None:
                 return None 
             root_paths.append(path_res.path)
+            self.best_paths[i] = path_res.path
             
-        root = CTNode(constraints=[], paths=root_paths)
+        with self.stats.conflict_timer():
+            root = CTNode(root_paths, window=self.window)
+        self._evaluate(root)
+        self.stats.hl_generated += 1
+        self._record(root)
         
         open_list = []
         heapq.heappush(open_list, root)
         
         while open_list:
+            self.stats.note_open(len(open_list))
             curr_node = heapq.heappop(open_list)
+            self.stats.hl_expanded += 1
+            self.budget.charge()
             
-            # 2. Conflict Validation
-            conflict = detect_conflict(curr_node.paths)
-            
-            if not conflict:
+            # 2. Conflict Validation (conflicts are kept up to date per node)
+            if not curr_node.conflicts:
                 return curr_node.paths 
             
-            # 3. Branching
-            constraints_to_add = []
+            conflict = self._choose_conflict(curr_node)
+            with self.stats.conflict_timer():
+                index = ConflictIndex(curr_node.paths)
             
-            if conflict.type == 'vertex':
-                c1 = Constraint(conflict.time, conflict.agent_1, conflict.x, conflict.y, is_vertex=True)
-                c2 = Constraint(conflict.time, conflict.agent_2, conflict.x, conflict.y, is_vertex=True)
-                constraints_to_add = [c1, c2]
-                
-            elif conflict.type == 'edge':
-                c1 = Constraint(conflict.time, conflict.agent_1, conflict.x, conflict.y, 
-                                next_x=conflict.next_x, next_y=conflict.next_y, is_vertex=False)
-                c2 = Constraint(conflict.time, conflict.agent_2, conflict.next_x, conflict.next_y,
-                                next_x=conflict.x, next_y=conflict.y, is_vertex=False)
-                constraints_to_add = [c1, c2]
+            # 3. Branching: a corridor's range constraints, or one constraint per agent
+            constraints_to_add = None
+            if self.corridor:
+                constraints_to_add = corridor_constraints(self.grid, conflict, curr_node.paths, starts)
+            if constraints_to_add is None:
+                constraints_to_add = constraints_from_conflict(conflict)
 
             for constraint in constraints_to_add:
-                new_constraints = curr_node.constraints + [constraint]
-                new_paths = copy.deepcopy(curr_node.paths)
-                agent_id = constraint.agent_id
-                
-                # FIX: Added current_battery=100 here as well
-                path_res = space_time_astar(
-                    self.grid, 
-                    starts[agent_id], 
-                    goals[agent_id], 
-                    new_constraints, 
-                    agent_id,
-                    current_battery=100
-                )
+                agent_id = added_constraints(constraint)[0].agent_id
+                parent_constraints = curr_node.constraints_for(agent_id)
+                agent_constraints = parent_constraints + list(added_constraints(constraint))
+                path_res = self._plan(agent_id, starts[agent_id], goals[agent_id], agent_constraints, parent_constraints)
                 
                 if path_res:
-                    new_paths[agent_id] = path_res.path
-                    child_node = CTNode(new_constraints, new_paths)
-                    heapq.heappush(open_list, child_node)
+                    with self.stats.conflict_timer():
+                        child = curr_node.child(constraint, path_res.path, index)
+                    self._evaluate(child)
+                    self.stats.hl_generated += 1
+                    self._record(child)
+                    heapq.heappush(open_list, child)
                     
-        return None
\ No newline at end of file
+        return None
+
+    # --- Conflict classification and high-level heuristics ---
+
+    def _mdd(self, node: CTNode, agent_id: int) -> MDD:
+        constraints = tuple(node.constraints_for(agent_id))
+        key = (agent_id, constraints)
+        mdd = self._mdds.get(key)
+        if mdd is None:
+            mdd = build_mdd(self.grid, self.starts[agent_id], self.goals[agent_id],
+                            len(node.paths[agent_id]) - 1, ConstraintTable(constraints))
+            self._mdds[key] = mdd
+        return mdd
+
+    def _classify(self, node: CTNode) -> List[str]:
+        if node.cardinality is None:
+            node.cardinality = [classify_conflict(c, self._mdd(node, c.agent_1), self._mdd(node, c.agent_2))
+                                for c in node.conflicts]
+        return node.cardinality
+
+    def _choose_conflict(self, node: CTNode) -> Conflict:
+        """The earliest of the highest-priority conflicts (node.conflicts is sorted by time)."""
+        if not self.prioritize:
+            return node.conflicts[0]
+        ranks = [CONFLICT_RANK[kind] for kind in self._classify(node)]
+        return node.conflicts[ranks.index(min(ranks))]
+
+    def _evaluate(self, node: CTNode) -> None:
+        """Set node.h (and f) from the dependency graph of its conflicting agents."""
+        if self.heuristic == "none" or not node.conflicts:
+            return
+        weights: Dict[Tuple[int, int], int] = {}
+        for conflict, kind in zip(node.conflicts, self._classify(node)):
+            pair = (min(conflict.agent_1, conflict.agent_2), max(conflict.agent_1, conflict.agent_2))
+            if kind == CARDINAL:
+                weights[pair] = 1
+            elif kind != NON_CARDINAL:
+                weights.setdefault(pair, 0)
+        if self.heuristic == "wdg":
+            for pair, lower in weights.items():
+                weights[pair] = self._pair_delta(node, *pair, lower)
+        node.h = min_vertex_cover(weights)
+        node.f = node.cost + node.h
+
+    def _pair_delta(self, node: CTNode, a: int, b: int, lower: int) -> int:
+        """
+        Extra cost agents a and b need to get out of each other's way under
+        the node's constraints: a small CBS on just the two of them. If it
+        hits PAIR_NODE_LIMIT, the best open cost is still a lower bound.
+        Its replans go through _plan, so they share the cache and the budget.
+        """
+        constraints = (tuple(node.constraints_for(a)), tuple(node.constraints_for(b)))
+        key = (a, b) + constraints
+        if key in self._pair_deltas:
+            return self._pair_deltas[key]
+        agents = (a, b)
+        base = len(node.paths[a]) - 1 + len(node.paths[b]) - 1
+        counter = itertools.count()
+        open_list = [(base, next(counter), constraints, (node.paths[a], node.paths[b]))]
+        delta = lower
+        expanded = 0
+        while open_list:
+            cost, _, pair_constraints, paths = heapq.heappop(open_list)
+            conflicts = detect_all_conflicts(list(paths))
+            if not conflicts or expanded >= PAIR_NODE_LIMIT:
+                delta = max(lower, cost - base)
+                break
+            expanded += 1
+            branches = None
+            if self.corridor:
+                branches = corridor_constraints(self.grid, conflicts[0], list(paths), [self.starts[a], self.starts[b]])
+            for constraint in branches or constraints_from_conflict(conflicts[0]):
+                side = added_constraints(constraint)[0].agent_id # 0 or 1 within the pair
+                agent_id = agents[side]
+                added = pair_constraints[side] + tuple(replace(c, agent_id=agent_id) for c in added_constraints(constraint))
+                path_res = self._plan(agent_id, self.starts[agent_id], self.goals[agent_id], list(added),
+                                      list(pair_constraints[side]))
+                if path_res is None:
+                    continue
+                new_constraints = (added, pair_constraints[1]) if side == 0 else (pair_constraints[0], added)
+                new_paths = (path_res.path, paths[1]) if side == 0 else (paths[0], path_res.path)
+                heapq.heappush(open_list, (cost - len(paths[side]) + len(path_res.path), next(counter),
+                                           new_constraints, new_paths))
+        self._pair_deltas[key] = delta
+        return delta
@@ -1,6 +1,7 @@
 # backend/app/core/conflict.py
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Set
 
 @dataclass
 class Conflict:
@@ -14,60 +15,124 @@ class Conflict:
     next_x: int = -1
     next_y: int = -1
 
+class ConflictIndex:
+    """
+    Hash index over the paths of a set of agents.
+    Occupancy is keyed by (t, x, y) and moves by (t, from_x, from_y, to_x, to_y),
+    so checking one path against everyone else costs O(path length) instead of
+    rescanning every agent at every timestep.
+
+    Paths may be (x, y) or (x, y, dir); only the cell matters for collisions.
+    An agent whose path has ended stays parked on its last cell forever.
+    """
+    def __init__(self, paths: Optional[List[list]] = None):
+        self.paths: Dict[int, list] = {}
+        self.vertex: Dict[Tuple[int, int, int], Set[int]] = defaultdict(set)
+        self.edge: Dict[Tuple[int, int, int, int, int], Set[int]] = defaultdict(set)
+        self.cell_visits: Dict[Tuple[int, int], List[Tuple[int, int]]] = defaultdict(list) # cell -> [(t, agent)]
+        self.parked: Dict[Tuple[int, int], Dict[int, int]] = defaultdict(dict) # cell -> {agent: arrival t}
+        if paths:
+            for agent_id, path in enumerate(paths):
+                self.add_path(agent_id, path)
+
+    def add_path(self, agent_id: int, path: list) -> None:
+        self.paths[agent_id] = path
+        prev = None
+        for t, pos in enumerate(path):
+            cell = (pos[0], pos[1])
+            self.vertex[(t, cell[0], cell[1])].add(agent_id)
+            self.cell_visits[cell].append((t, agent_id))
+            if prev is not None and prev != cell:
+                self.edge[(t, prev[0], prev[1], cell[0], cell[1])].add(agent_id)
+            prev = cell
+        self.parked[prev][agent_id] = len(path) - 1
+
+    def remove_path(self, agent_id: int) -> None:
+        path = self.paths.pop(agent_id)
+        prev = None
+        for t, pos in enumerate(path):
+            cell = (pos[0], pos[1])
+            self.vertex[(t, cell[0], cell[1])].discard(agent_id)
+            visits = self.cell_visits[cell]
+            visits.remove((t, agent_id))
+            if prev is not None and prev != cell:
+                self.edge[(t, prev[0], prev[1], cell[0], cell[1])].discard(agent_id)
+            prev = cell
+        del self.parked[prev][agent_id]
+
+    def conflicts_for(self, agent_id: int, path: list, window: Optional[int] = None) -> List[Conflict]:
+        """
+        Every conflict between `path` (for agent_id) and the other indexed paths.
+        The other agent is reported as agent_1, matching detect_conflict.
+        window: only report conflicts at t <= window (rolling-horizon planning).
+        """
+        conflicts = []
+        prev = None
+        for t, pos in enumerate(path):
+            if window is not None and t > window:
+                break
+            x, y = pos[0], pos[1]
+            # 1. Vertex: someone is on this cell at t, or parked here since before t
+            for other in self.vertex.get((t, x, y), ()):
+                if other != agent_id:
+                    conflicts.append(Conflict(t, 'vertex', other, agent_id, x, y))
+            for other, arrival in self.parked.get((x, y), {}).items():
+                if other != agent_id and arrival < t:
+                    conflicts.append(Conflict(t, 'vertex', other, agent_id, x, y))
+
+            # 2. Edge: someone crosses the same edge the other way at t
+            if prev is not None and prev != (x, y):
+                for other in self.edge.get((t, x, y, prev[0], prev[1]), ()):
+                    if other != agent_id:
+                        conflicts.append(Conflict(t, 'edge', other, agent_id, x, y,
+                                                  next_x=prev[0], next_y=prev[1]))
+            prev = (x, y)
+
+        # 3. After arriving, this agent parks on its goal: anyone passing later hits it
+        end = len(path) - 1
+        for t, other in self.cell_visits.get(prev, ()):
+            if other != agent_id and t > end and (window is None or t <= window):
+                conflicts.append(Conflict(t, 'vertex', other, agent_id, prev[0], prev[1]))
+
+        conflicts.sort(key=lambda c: c.time)
+        return conflicts
+
+    def count_move_conflicts(self, agent_id: int, t: int, x: int, y: int, next_x: int, next_y: int) -> int:
+        """Number of indexed agents the move (x, y) -> (next_x, next_y) at time t collides with."""
+        count = 0
+        for other in self.vertex.get((t, next_x, next_y), ()):
+            if other != agent_id:
+                count += 1
+        for other, arrival in self.parked.get((next_x, next_y), {}).items():
+            if other != agent_id and arrival < t:
+                count += 1
+        if (x, y) != (next_x, next_y):
+            for other in self.edge.get((t, next_x, next_y, x, y), ()):
+                if other != agent_id:
+                    count += 1
+        return count
+
+def detect_all_conflicts(paths: List[list], window: Optional[int] = None) -> List[Conflict]:
+    """
+    Full conflict set of a joint plan (up to `window`), sorted by time.
+    Agents are inserted into the index one by one and each is checked only
+    against those already inserted, so every colliding pair shows up once.
+    """
+    index = ConflictIndex()
+    conflicts = []
+    for agent_id, path in enumerate(paths):
+        conflicts.extend(index.conflicts_for(agent_id, path, window))
+        index.add_path(agent_id, path)
+    conflicts.sort(key=lambda c: c.time)
+    return conflicts
+
+def count_conflicting_pairs(conflicts: List[Conflict]) -> int:
+    return len({(min(c.agent_1, c.agent_2), max(c.agent_1, c.agent_2)) for c in conflicts})
+
 def detect_conflict(paths: List[List[Tuple[int, int]]]) -> Optional[Conflict]:
     """
     Scans the paths of all agents to find the FIRST occurring conflict.
-    paths[i] is the path for agent i, which is a list of (x,y) tuples.
+    paths[i] is the path for agent i, a list of (x, y) or (x, y, dir) tuples.
     """
-    # Determine the maximum path length to iterate through time
-    max_t = max(len(p) for p in paths)
-    
-    # Check for conflicts at every time step t
-    for t in range(max_t):
-        # 1. Check Vertex Conflicts (Overlaps)
-        # We create a map of position -> agent_id for the current time t
-        positions = {}
-        
-        for agent_id, path in enumerate(paths):
-            # If agent has finished, it stays at its last position
-            pos_t = path[t] if t < len(path) else path[-1]
-            
-            if pos_t in positions:
-                # Conflict Found!
-                other_agent = positions[pos_t]
-                return Conflict(
-                    time=t,
-                    type='vertex',
-                    agent_1=other_agent,
-                    agent_2=agent_id,
-                    x=pos_t[0],
-                    y=pos_t[1]
-                )
-            positions[pos_t] = agent_id
-
-        # 2. Check Edge Conflicts (Swapping)
-        # Only relevant if t > 0
-        if t > 0:
-            for agent_i, path_i in enumerate(paths):
-                for agent_j, path_j in enumerate(paths):
-                    if agent_i >= agent_j: continue # Avoid duplicate checks
-                    
-                    # Get positions at t-1 and t
-                    prev_i = path_i[t-1] if t-1 < len(path_i) else path_i[-1]
-                    curr_i = path_i[t]   if t < len(path_i)   else path_i[-1]
-                    
-                    prev_j = path_j[t-1] if t-1 < len(path_j) else path_j[-1]
-                    curr_j = path_j[t]   if t < len(path_j)   else path_j[-1]
-                    
-                    # Check for swap: i moves u->v, j moves v->u
-                    if prev_i == curr_j and curr_i == prev_j:
-                        return Conflict(
-                            time=t,
-                            type='edge',
-                            agent_1=agent_i,
-                            agent_2=agent_j,
-                            x=prev_i[0], y=prev_i[1],      # u
-                            next_x=curr_i[0], next_y=curr_i[1] # v
-                        )
-    
-    return None # No conflicts found
\ No newline at end of file
+    conflicts = detect_all_conflicts(paths)
+    return conflicts[0] if conflicts else None
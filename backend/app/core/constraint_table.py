@@ -0,0 +1,124 @@
+# backend/app/core/constraint_table.py
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .node import Constraint
+
+# End of the last safe interval of a cell: free from then on
+SAFE_FOREVER = float('inf')
+
+class ConstraintTable:
+    """
+    Hashed view of the constraints that apply to one agent.
+    Vertex constraints are keyed by (t, x, y) and edge constraints by
+    (t, x, y, next_x, next_y), so every check in the low level is O(1)
+    no matter how many constraints (or reserved cells) there are.
+    """
+    def __init__(self, constraints: Iterable[Constraint] = (), agent_id: Optional[int] = None):
+        self.vertex: Set[Tuple[int, int, int]] = set()
+        self.edge: Set[Tuple[int, int, int, int, int]] = set()
+        # Latest time each cell is vertex-constrained; an agent may only
+        # finish on its goal after that time, otherwise it gets bumped later.
+        self.cell_last: Dict[Tuple[int, int], int] = {}
+        # Constrained times per cell, for safe-interval planning
+        self.cell_times: Dict[Tuple[int, int], Set[int]] = {}
+        for c in constraints:
+            if agent_id is None or c.agent_id == agent_id:
+                self.add(c)
+
+    def add(self, c: Constraint) -> None:
+        if c.is_vertex:
+            self.add_vertex(c.time, c.x, c.y)
+        else:
+            self.edge.add((c.time, c.x, c.y, c.next_x, c.next_y))
+
+    def add_vertex(self, t: int, x: int, y: int) -> None:
+        self.vertex.add((t, x, y))
+        self.cell_times.setdefault((x, y), set()).add(t)
+        if t > self.cell_last.get((x, y), -1):
+            self.cell_last[(x, y)] = t
+
+    def extend(self, c: Constraint) -> "ConstraintTable":
+        """Copy of this table with one more constraint (e.g. for a child CT node)."""
+        table = ConstraintTable()
+        table.vertex = set(self.vertex)
+        table.edge = set(self.edge)
+        table.cell_last = dict(self.cell_last)
+        table.cell_times = {cell: set(times) for cell, times in self.cell_times.items()}
+        table.add(c)
+        return table
+
+    def is_constrained(self, curr_x: int, curr_y: int, next_x: int, next_y: int, next_time: int) -> bool:
+        if (next_time, next_x, next_y) in self.vertex:
+            return True
+        return (next_time, curr_x, curr_y, next_x, next_y) in self.edge
+
+    def latest_constraint_at(self, x: int, y: int) -> int:
+        return self.cell_last.get((x, y), -1)
+
+    def safe_intervals(self, x: int, y: int) -> List[Tuple[int, int]]:
+        """
+        Maximal [start, end] time intervals (inclusive) in which (x, y) is free.
+        The last interval is open-ended (end == SAFE_FOREVER).
+        """
+        intervals = []
+        lo = 0
+        for t in sorted(self.cell_times.get((x, y), ())):
+            if t > lo:
+                intervals.append((lo, t - 1))
+            lo = max(lo, t + 1)
+        intervals.append((lo, SAFE_FOREVER))
+        return intervals
+
+    def __len__(self) -> int:
+        return len(self.vertex) + len(self.edge)
+
+
+class ReservationTable(ConstraintTable):
+    """
+    Agent-agnostic table for prioritized planning: every planned path
+    reserves its cells, the reverse of each of its moves (no swaps) and
+    its goal cell from arrival onwards, since the robot parks there.
+    The low level queries it directly instead of per-agent constraints.
+    """
+    def __init__(self):
+        super().__init__()
+        self.goal_from: Dict[Tuple[int, int], int] = {} # cell -> time a robot parks there for good
+
+    def reserve_path(self, path: List[Tuple[int, int, int]], horizon: Optional[int] = None) -> None:
+        """
+        horizon: only reserve up to this timestep (windowed plans, whose tails
+        beyond the window are not binding). The goal is then only parked if
+        the path ends within the horizon.
+        """
+        if horizon is not None and len(path) - 1 > horizon:
+            path = path[:horizon + 1]
+            parks = False
+        else:
+            parks = True
+        prev = None
+        for t, pos in enumerate(path):
+            x, y = pos[0], pos[1]
+            self.add_vertex(t, x, y)
+            if prev is not None and prev != (x, y):
+                # Moving prev -> (x, y) at t blocks anyone moving (x, y) -> prev at t
+                self.edge.add((t, x, y, prev[0], prev[1]))
+            prev = (x, y)
+        if parks:
+            self.goal_from[prev] = min(len(path) - 1, self.goal_from.get(prev, len(path) - 1))
+
+    def is_constrained(self, curr_x: int, curr_y: int, next_x: int, next_y: int, next_time: int) -> bool:
+        parked = self.goal_from.get((next_x, next_y))
+        if parked is not None and next_time >= parked:
+            return True
+        return super().is_constrained(curr_x, curr_y, next_x, next_y, next_time)
+
+    def latest_constraint_at(self, x: int, y: int) -> int:
+        if (x, y) in self.goal_from:
+            return SAFE_FOREVER # Someone parks here: nobody else can finish on it
+        return super().latest_constraint_at(x, y)
+
+    def safe_intervals(self, x: int, y: int) -> List[Tuple[int, int]]:
+        intervals = super().safe_intervals(x, y)
+        parked = self.goal_from.get((x, y))
+        if parked is None:
+            return intervals
+        return [(lo, min(hi, parked - 1)) for lo, hi in intervals if lo < parked]
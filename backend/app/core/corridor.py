@@ -0,0 +1,144 @@
+# backend/app/core/corridor.py
+"""
+Corridor reasoning for CBS (Li et al. 2021, "Pairwise symmetry reasoning").
+
+Two agents meeting head-on in a 1-wide corridor (a chain of cells with
+exactly two free neighbours each, like the aisle between two shelf racks)
+make plain CBS branch once per timestep of delay: every child just shifts
+the collision one step and the tree grows exponentially with the length
+of the corridor. One of them has to let the other through first, so
+instead branch on that directly with range constraints at the far ends:
+
+    agent 1 may not be on exit e2 in [1, min(bypass_1(e2) - 1, t_2(e1) + k)]
+    agent 2 may not be on exit e1 in [1, min(bypass_2(e1) - 1, t_1(e2) + k)]
+
+The ends e1 and e2 are the junction cells just outside the chain (with
+turns, agents tend to collide there too, while one of them rotates
+towards its exit), k is the number of moves between them, t_i(e) a lower
+bound on when agent i can first reach e, and bypass_i(e) a lower bound on
+reaching e without going through the corridor. If agent 1 reached e2
+before its bypass bound it came through the corridor, so did agent 2 at
+e1, and the two traversals cannot overlap in time: one agent is on its
+exit at least k + 1 steps after the other, which violates its range.
+Every solution therefore satisfies one branch, and each range covers the
+current path's arrival, so both children change.
+
+The bounds ignore constraints (rotation-aware distance tables and a
+cell-level BFS), which only shrinks the ranges: still sound, a little
+weaker. Rectangle reasoning is not applied: its barriers assume arrival
+time at a cell equals its Manhattan distance from the start, which turn
+costs break on this kinematic model.
+"""
+from collections import deque
+from typing import List, Optional, Tuple
+from .conflict import Conflict
+from .heuristics import get_distance_table, UNREACHABLE
+from .node import Constraint
+from ..utils.grid import Grid
+from ..utils.lru import LRUCache
+
+Cell = Tuple[int, int]
+
+# (map, start, exit, corridor) -> bypass distance; CT nodes keep asking for the same ones
+_BYPASS_CACHE = LRUCache(maxsize=4096)
+
+def _free_neighbors(grid: Grid, cell: Cell) -> List[Cell]:
+    width, moves = grid.width, grid.moves
+    base = (cell[1] * width + cell[0]) * 4
+    return [(n % width, n // width) for n in moves[base:base + 4] if n >= 0]
+
+def corridor_at(grid: Grid, cell: Cell) -> Optional[Tuple[List[Cell], Tuple[Cell, Cell]]]:
+    """
+    The chain of degree-2 cells through `cell` (end to end) and the two
+    cells it opens onto, or None if `cell` is not inside a corridor.
+    """
+    neighbors = _free_neighbors(grid, cell)
+    if len(neighbors) != 2:
+        return None
+    halves, ends = [], []
+    for first in neighbors:
+        half, prev, curr = [], cell, first
+        while len(_free_neighbors(grid, curr)) == 2:
+            if curr == cell:
+                return None # A loop, not a corridor
+            half.append(curr)
+            prev, curr = curr, next(n for n in _free_neighbors(grid, curr) if n != prev)
+        halves.append(half)
+        ends.append(curr)
+    return halves[0][::-1] + [cell] + halves[1], (ends[0], ends[1])
+
+def _first_visit(path: list, cell: Cell) -> Optional[int]:
+    for t, pose in enumerate(path):
+        if (pose[0], pose[1]) == cell:
+            return t
+    return None
+
+def _bypass_distance(grid: Grid, start: Cell, exit_cell: Cell, corridor: List[Cell]) -> float:
+    """Fewest moves from start to exit_cell without entering the corridor."""
+    key = (grid.fingerprint, start, exit_cell, corridor[0])
+    cached = _BYPASS_CACHE.get(key)
+    if cached is not None:
+        return cached
+    distance = _bfs_avoiding(grid, start, exit_cell, set(corridor))
+    _BYPASS_CACHE.put(key, distance)
+    return distance
+
+def _bfs_avoiding(grid: Grid, start: Cell, exit_cell: Cell, blocked: set) -> float:
+    seen, queue = {start}, deque([(start, 0)])
+    while queue:
+        cell, dist = queue.popleft()
+        if cell == exit_cell:
+            return dist
+        for n in _free_neighbors(grid, cell):
+            if n not in seen and n not in blocked:
+                seen.add(n)
+                queue.append((n, dist + 1))
+    return float('inf')
+
+def corridor_constraints(grid: Grid, conflict: Conflict, paths: List[list],
+                         starts: List[Tuple[int, int, int]]) -> Optional[List[Tuple[Constraint, ...]]]:
+    """
+    The two range-constraint branches for a head-on corridor conflict
+    (one tuple of vertex constraints per agent), or None if `conflict` is
+    not one and should be split the usual way.
+    """
+    cells = [(conflict.x, conflict.y)]
+    if conflict.type == 'edge':
+        cells.append((conflict.next_x, conflict.next_y))
+    found = None
+    for cell in cells:
+        found = found or corridor_at(grid, cell)
+    if found is None:
+        return None
+    corridor, ends = found
+    if ends[0] == ends[1] or any(c not in corridor and c not in ends for c in cells):
+        return None
+    a1, a2 = conflict.agent_1, conflict.agent_2
+    if any(tuple(starts[a][:2]) in corridor or tuple(starts[a][:2]) in ends for a in (a1, a2)):
+        return None # Agents that start inside do not have to traverse it
+    k = len(corridor) + 1
+
+    # Each agent's exit is the end its current path reaches second
+    exits = []
+    for a in (a1, a2):
+        visits = [_first_visit(paths[a], end) for end in ends]
+        if None in visits:
+            return None
+        exits.append(ends[0] if visits[0] > visits[1] else ends[1])
+    if exits[0] == exits[1]:
+        return None # Same direction: following, not head-on
+    exit_1, exit_2 = exits # exit_2 is the end agent 1 enters by
+
+    def earliest(agent, cell):
+        d = get_distance_table(grid, cell).get(*starts[agent])
+        return float('inf') if d == UNREACHABLE else d
+
+    range_1 = min(_bypass_distance(grid, tuple(starts[a1][:2]), exit_1, corridor) - 1, earliest(a2, exit_2) + k)
+    range_2 = min(_bypass_distance(grid, tuple(starts[a2][:2]), exit_2, corridor) - 1, earliest(a1, exit_1) + k)
+    if range_1 == float('inf') or range_2 == float('inf'):
+        return None
+    # Both children must rule out the current paths
+    if _first_visit(paths[a1], exit_1) > range_1 or _first_visit(paths[a2], exit_2) > range_2:
+        return None
+    return [tuple(Constraint(t, a1, *exit_1, is_vertex=True) for t in range(1, int(range_1) + 1)),
+            tuple(Constraint(t, a2, *exit_2, is_vertex=True) for t in range(1, int(range_2) + 1))]
@@ -0,0 +1,157 @@
+# backend/app/core/distance_store.py
+"""
+Precompiled distance tables for a fixed warehouse layout.
+
+The rotation-aware tables of core.heuristics only depend on the layout
+and the goal, yet every worker process builds them again on its first
+query for each goal. `compile_map` writes the layout's occupancy plus the
+table of every goal cell (or a chosen subset, e.g. the pick stations)
+into one binary file offline; `DistanceStore` memory-maps it read-only,
+so all workers share a single copy in the page cache and answer
+get_distance_table with no precomputation.
+
+File layout (little-endian):
+
+    header    magic "OPTDIST\\0", version, width, height, goal count,
+              layout fingerprint (40 ASCII hex digits)
+    occupancy width * height bytes, zero-padded to a multiple of 4
+    goals     goal count uint32 cell indices (y * width + x), ascending
+    tables    goal count uint32 tables, width * height * 4 entries each,
+              in goal order, indexed like DistanceTable.dist
+
+Every goal cell of a 60x60 warehouse takes about 130 MB: compile a
+subset for larger layouts.
+
+    cd backend && python -m app.core.distance_store warehouse.map warehouse.dist
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Optional, Tuple
+from .heuristics import DistanceTable, attach_distance_store, build_distance_table
+from ..utils.grid import Grid
+
+MAGIC = b"OPTDIST\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIII40s")
+
+def _padded(n: int) -> int:
+    return (n + 3) & ~3
+
+def compile_map(grid: Grid, path: str, goals: Optional[Iterable[Tuple[int, int]]] = None) -> int:
+    """
+    Write the distance store of `grid` to `path` (atomically, via a
+    temporary file next to it); `goals` defaults to every free cell.
+    Returns the number of tables written.
+    """
+    width = grid.width
+    if goals is None:
+        cells = [i for i, blocked in enumerate(grid.occupancy) if not blocked]
+    else:
+        cells = sorted({y * width + x for x, y in goals if grid.in_bounds(x, y) and not grid.is_blocked(x, y)})
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, width, grid.height, len(cells), grid.fingerprint.encode("ascii")))
+        f.write(bytes(grid.occupancy).ljust(_padded(len(grid.occupancy)), b"\0"))
+        f.write(_little_endian(array('I', cells)))
+        for cell in cells:
+            f.write(_little_endian(build_distance_table(grid, (cell % width, cell // width)).dist))
+    os.replace(tmp, path)
+    return len(cells)
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+class DistanceStore:
+    """
+    A compiled distance store, memory-mapped read-only. Tables are views
+    into the mapping: nothing is copied or built when they are looked up.
+    """
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise ValueError("Distance stores are little-endian; this platform cannot map them")
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"{path}: not a distance store")
+        magic, version, width, height, count, fingerprint = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a distance store")
+        if version != VERSION:
+            raise ValueError(f"{path}: distance store version {version}, expected {VERSION}; compile the map again")
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fingerprint = fingerprint.decode("ascii")
+        cells = width * height
+        occupancy_at = _HEADER.size
+        goals_at = occupancy_at + _padded(cells)
+        self._tables_at = goals_at + 4 * count
+        self._table_size = cells * 4
+        if len(self._mmap) != self._tables_at + 4 * self._table_size * count:
+            raise ValueError(f"{path}: truncated distance store")
+        self._occupancy = self._mmap[occupancy_at:occupancy_at + cells]
+        view = memoryview(self._mmap)
+        goals = view[goals_at:self._tables_at].cast('I')
+        self._index = {cell: i for i, cell in enumerate(goals)}
+        self._view = view
+        self._grid = None
+
+    @property
+    def grid(self) -> Grid:
+        """The compiled layout."""
+        if self._grid is None:
+            self._grid = Grid(self.width, self.height, occupancy=self._occupancy)
+        return self._grid
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def goals(self) -> List[Tuple[int, int]]:
+        return [(cell % self.width, cell // self.width) for cell in self._index]
+
+    def table(self, goal: Tuple[int, int]) -> Optional[DistanceTable]:
+        """The table for `goal`, or None if it was not compiled."""
+        x, y = goal
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        i = self._index.get(y * self.width + x)
+        if i is None:
+            return None
+        start = self._tables_at + 4 * self._table_size * i
+        dist = self._view[start:start + 4 * self._table_size].cast('I')
+        return DistanceTable(self.width, self.height, (x, y), dist)
+
+def attach_stores(paths: Optional[str]) -> List[DistanceStore]:
+    """
+    Map the stores named in `paths` (os.pathsep-separated, as in the
+    OPTICBS_DISTANCE_STORES variable) and let get_distance_table use them.
+    """
+    stores = []
+    for path in (paths or "").split(os.pathsep):
+        if path:
+            store = DistanceStore(path)
+            attach_distance_store(store)
+            stores.append(store)
+    return stores
+
+if __name__ == "__main__":
+    from ..utils.movingai import load_map
+    parser = argparse.ArgumentParser(description="Compile a MovingAI .map into a distance store")
+    parser.add_argument("map")
+    parser.add_argument("output")
+    parser.add_argument("--goals", help="File with one 'x y' goal per line (default: every free cell)")
+    args = parser.parse_args()
+    layout = load_map(args.map)
+    goal_cells = None
+    if args.goals:
+        with open(args.goals) as f:
+            goal_cells = [tuple(int(v) for v in line.split()) for line in f if line.strip()]
+    count = compile_map(layout, args.output, goal_cells)
+    print(f"{args.output}: {count} tables, {os.path.getsize(args.output) / 1e6:.1f} MB")
@@ -0,0 +1,135 @@
+# backend/app/core/ecbs.py
+import heapq
+import itertools
+from typing import Optional
+from .node import Constraint
+from .conflict import ConflictIndex
+from .constraint_table import ConstraintTable
+from .low_level import space_time_astar
+from .cbs import CBSSolver, CTNode, constraints_from_conflict
+from ..utils.grid import Grid
+
+class ECBSNode(CTNode):
+    """CT node that also tracks the low-level lower bound of every agent."""
+    def __init__(self, paths, lower_bounds, constraint=None, parent=None, conflicts=None):
+        super().__init__(paths, constraint, parent, conflicts)
+        self.lower_bounds = lower_bounds
+        self.lb = sum(lower_bounds)
+        self.expanded = False
+
+    def child(self, constraint: Constraint, path, lower_bound: int,
+              index: Optional[ConflictIndex] = None) -> "ECBSNode":
+        base = super().child(constraint, path, index)
+        lower_bounds = list(self.lower_bounds)
+        lower_bounds[constraint.agent_id] = lower_bound
+        return ECBSNode(base.paths, lower_bounds, constraint, self, base.conflicts)
+
+class ECBSSolver(CBSSolver):
+    """
+    Enhanced CBS: bounded-suboptimal CBS with focal search at both levels.
+    The returned sum of costs is at most w times the optimum.
+
+    High level: OPEN is ordered by the sum of the agents' lower bounds;
+    FOCAL holds every open node with cost <= w * min LB, ordered by number
+    of conflicts. Low level: focal space-time A* with the same w, preferring
+    moves that collide with fewer of the other agents' current paths.
+    """
+    def __init__(self, grid: Grid, w: float = 1.5,
+                 time_budget_ms: Optional[float] = None, node_budget: Optional[int] = None):
+        if w < 1.0:
+            raise ValueError("Suboptimality factor w must be >= 1")
+        super().__init__(grid, "astar", time_budget_ms, node_budget) # Focal search needs the A* engine
+        self.w = w
+
+    def _plan_focal(self, agent_id, start, goal, table: ConstraintTable, index: ConflictIndex):
+        with self.stats.low_level(self.budget):
+            path_res = space_time_astar(
+                self.grid,
+                start,
+                goal,
+                [],
+                agent_id,
+                current_battery=100,
+                constraint_table=table,
+                focal_w=self.w,
+                conflict_index=index,
+                budget=self.budget
+            )
+        self.stats.note_path(path_res)
+        return path_res
+
+    def _search(self, starts, goals):
+        num_agents = len(starts)
+
+        # 1. Root: plan agents in turn, each steering around the ones before it
+        root_paths, lower_bounds = [], []
+        index = ConflictIndex()
+        for i in range(num_agents):
+            path_res = self._plan_focal(i, starts[i], goals[i], ConstraintTable(), index)
+            if path_res is None:
+                return None
+            root_paths.append(path_res.path)
+            lower_bounds.append(path_res.lower_bound)
+            index.add_path(i, path_res.path)
+            self.best_paths[i] = path_res.path
+
+        with self.stats.conflict_timer():
+            root = ECBSNode(root_paths, lower_bounds)
+        self.stats.hl_generated += 1
+        self._record(root)
+
+        counter = itertools.count()
+        open_heap = [(root.lb, next(counter), root)]
+        focal_heap = [(root.num_conflicts, root.cost, next(counter), root)]
+        waiting = [] # (cost, counter, node) above the focal bound
+
+        while focal_heap or waiting:
+            # 2. Refresh the bound from the best lower bound still open
+            while open_heap and open_heap[0][2].expanded:
+                heapq.heappop(open_heap)
+            if not open_heap:
+                break
+            bound = self.w * open_heap[0][0]
+            while waiting and waiting[0][0] <= bound:
+                _, c, node = heapq.heappop(waiting)
+                heapq.heappush(focal_heap, (node.num_conflicts, node.cost, c, node))
+            if not focal_heap:
+                break
+
+            self.stats.note_open(len(open_heap))
+            curr_node = heapq.heappop(focal_heap)[3]
+            if curr_node.expanded:
+                continue
+            curr_node.expanded = True
+            self.stats.hl_expanded += 1
+            self.budget.charge()
+
+            if not curr_node.conflicts:
+                return curr_node.paths
+
+            # 3. Branching on the earliest conflict
+            conflict = curr_node.conflicts[0]
+            with self.stats.conflict_timer():
+                index = ConflictIndex(curr_node.paths)
+
+            for constraint in constraints_from_conflict(conflict):
+                agent_id = constraint.agent_id
+                agent_table = ConstraintTable(curr_node.constraints_for(agent_id))
+                agent_table.add(constraint)
+
+                path_res = self._plan_focal(agent_id, starts[agent_id], goals[agent_id], agent_table, index)
+                if path_res is None:
+                    continue
+
+                with self.stats.conflict_timer():
+                    child = curr_node.child(constraint, path_res.path, path_res.lower_bound, index)
+                self.stats.hl_generated += 1
+                self._record(child)
+                c = next(counter)
+                heapq.heappush(open_heap, (child.lb, c, child))
+                if child.cost <= bound:
+                    heapq.heappush(focal_heap, (child.num_conflicts, child.cost, c, child))
+                else:
+                    heapq.heappush(waiting, (child.cost, c, child))
+
+        return None
@@ -0,0 +1,14 @@
+# backend/app/core/engines.py
+from .low_level import space_time_astar
+from .sipp import sipp_astar
+
+# Interchangeable single-agent planners: same arguments, same PathResult
+LOW_LEVEL_ENGINES = {
+    "astar": space_time_astar,
+    "sipp": sipp_astar,
+}
+
+def get_low_level(name: str):
+    if name not in LOW_LEVEL_ENGINES:
+        raise ValueError(f"Unknown low-level engine '{name}', expected one of {sorted(LOW_LEVEL_ENGINES)}")
+    return LOW_LEVEL_ENGINES[name]
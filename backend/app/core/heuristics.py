@@ -0,0 +1,119 @@
+# backend/app/core/heuristics.py
+from array import array
+from typing import List, Tuple
+from ..utils.grid import Grid
+from ..utils.lru import LRUCache
+
+# Marker for states that can never reach the goal (walled-in cells etc.)
+UNREACHABLE = 0xFFFFFFFF
+
+class DistanceTable:
+    """
+    Exact cost-to-go from every (x, y, dir) state to a goal cell.
+    Moving forward and rotating both cost 1, so a robot facing away from its
+    goal correctly pays for the turns it has to make first.
+    The goal is reached in any direction.
+    """
+    def __init__(self, width: int, height: int, goal: Tuple[int, int], dist):
+        self.width = width
+        self.height = height
+        self.goal = goal
+        self.dist = dist # Flat array indexed by (y * width + x) * 4 + dir
+
+    def get(self, x: int, y: int, direction: int) -> int:
+        return self.dist[(y * self.width + x) * 4 + direction]
+
+    def is_reachable(self, x: int, y: int, direction: int) -> bool:
+        return self.get(x, y, direction) != UNREACHABLE
+
+def descend(grid: Grid, table: DistanceTable, pose: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
+    """
+    Poses after `pose` on a shortest path to the table's goal, ignoring other
+    agents: every step goes to a neighbouring state one unit closer.
+    Used to finish windowed plans beyond the horizon.
+    """
+    width, dist, moves = grid.width, table.dist, grid.moves
+    x, y, d = pose
+    cost = table.get(x, y, d)
+    tail = []
+    while cost != 0 and cost != UNREACHABLE:
+        nidx = moves[(y * width + x) * 4 + d]
+        if nidx >= 0 and dist[nidx * 4 + d] == cost - 1:
+            x, y = nidx % width, nidx // width
+        elif table.get(x, y, (d + 1) % 4) == cost - 1:
+            d = (d + 1) % 4
+        else:
+            d = (d - 1) % 4
+        cost -= 1
+        tail.append((x, y, d))
+    return tail
+
+def build_distance_table(grid: Grid, goal: Tuple[int, int]) -> DistanceTable:
+    """
+    Backward Dijkstra from the goal over (x, y, dir).
+    All actions cost 1, so the priority queue collapses into a BFS, run
+    level by level over packed states (cell * 4 + dir, the table index).
+    """
+    width = grid.width
+    dist = array('I', [UNREACHABLE]) * (width * grid.height * 4)
+    moves = grid.moves
+    gx, gy = goal
+    frontier = []
+
+    if grid.in_bounds(gx, gy) and not grid.is_blocked(gx, gy):
+        base = (gy * width + gx) * 4
+        for d in range(4):
+            dist[base + d] = 0
+            frontier.append(base + d)
+
+    cost = 0
+    while frontier:
+        cost += 1
+        level = []
+        append = level.append
+        for state in frontier:
+            cell, d = state >> 2, state & 3
+            # Predecessors by rotation: (x, y, d +/- 1) turns into (x, y, d)
+            for prev in ((cell << 2) | ((d + 1) & 3), (cell << 2) | ((d - 1) & 3)):
+                if dist[prev] == UNREACHABLE:
+                    dist[prev] = cost
+                    append(prev)
+            # Predecessor by moving forward: (x - dx, y - dy, d) drives into (x, y).
+            # That is the cell one step behind, i.e. forward from (x, y) facing d + 2.
+            pcell = moves[(cell << 2) | ((d + 2) & 3)]
+            if pcell >= 0:
+                prev = (pcell << 2) | d
+                if dist[prev] == UNREACHABLE:
+                    dist[prev] = cost
+                    append(prev)
+        frontier = level
+
+    return DistanceTable(width, grid.height, goal, dist)
+
+# Shared by CBS (root + every CT-node replan) and the PrioritizedPlanner
+_TABLE_CACHE = LRUCache(maxsize=256)
+# Compiled layouts (core.distance_store) by fingerprint, asked before building a table
+_STORES = {}
+
+def attach_distance_store(store) -> None:
+    _STORES[store.fingerprint] = store
+
+def detach_distance_store(fingerprint: str) -> None:
+    _STORES.pop(fingerprint, None)
+
+def get_distance_table(grid: Grid, goal: Tuple[int, int]) -> DistanceTable:
+    key = (grid.fingerprint, tuple(goal))
+    table = _TABLE_CACHE.get(key)
+    if table is None:
+        store = _STORES.get(grid.fingerprint)
+        table = store.table(tuple(goal)) if store is not None else None
+        if table is None:
+            table = build_distance_table(grid, tuple(goal))
+        _TABLE_CACHE.put(key, table)
+    return table
+
+def distance_cache_stats():
+    return _TABLE_CACHE.stats()
+
+def clear_distance_cache() -> None:
+    _TABLE_CACHE.clear()
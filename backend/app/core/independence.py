@@ -0,0 +1,214 @@
+# backend/app/core/independence.py
+"""
+Independence Detection (Standley 2010) in front of CBS.
+
+Every agent starts in a group of its own and is planned alone. While the
+groups' paths conflict, conflicting groups are merged and each merged
+group is solved optimally with CBS, ignoring every other group. Since the
+plan has no conflicts in the end, its cost is the optimum over all agents,
+but CBS only ever couples agents that actually get in each other's way:
+in a warehouse most robots never meet, so the search is over a few small
+groups instead of the whole fleet.
+
+Before two groups are merged, a single agent among them first tries to
+replan around everyone else's paths at the same cost (Standley's avoid
+step); if it can, the plan stays optimal and nothing is merged. Each pair
+of groups gets that chance once.
+
+Merges happen in rounds. In each round a group merges with at most one
+other (the pairs of the earliest conflicts first), since a replanned
+group often no longer collides with a third one; the merged groups of a
+round are independent of each other and are solved in a process pool.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .budget import SearchBudget
+from .cbs import CBSSolver
+from .conflict import Conflict, detect_all_conflicts
+from .lns import replan_neighborhood
+from .prioritized import PrioritizedPlanner
+from .stats import SolverStats
+from ..utils.grid import Grid
+
+# SolverStats counters that add up over groups; the rest are peaks
+_SUMMED = ("hl_generated", "hl_expanded", "ll_calls", "ll_expansions", "ll_reused", "conflict_time_s")
+
+def _solve_group(grid: Grid, low_level: str, starts, goals, time_budget_ms: Optional[float],
+                 node_budget: Optional[int], window: Optional[int], coupled: bool, cbs_options: Dict):
+    """Process-pool entry point for one group: (paths, status, stats)."""
+    if coupled:
+        solver = PrioritizedPlanner(grid, low_level, time_budget_ms=time_budget_ms, node_budget=node_budget)
+    else:
+        solver = CBSSolver(grid, low_level, time_budget_ms, node_budget, window=window, **cbs_options)
+    paths = solver.solve(starts, goals)
+    return paths, solver.status, solver.stats
+
+class IndependenceSolver:
+    def __init__(self, grid: Grid, low_level: str = "astar",
+                 time_budget_ms: Optional[float] = None, node_budget: Optional[int] = None,
+                 window: Optional[int] = None, workers: Optional[int] = None,
+                 max_group_size: Optional[int] = None, **cbs_options):
+        """
+        time_budget_ms / node_budget: limits for the whole solve; each group
+        gets whatever is left when its round starts. When they run out,
+        solve() returns the current plan and sets status to "Timeout".
+        window: rolling-horizon mode, passed to CBS; only conflicts in the
+        first `window` timesteps couple groups.
+        workers: > 1 solves the merged groups of a round in that many processes.
+        Leave it unset inside a process that already is a pool worker (the
+        API's job queue), which would nest pools and oversubscribe the CPUs.
+        max_group_size: groups larger than this are planned around everyone
+        else's paths, one agent at a time, instead of with CBS (fast, but no
+        longer optimal). If one of their agents finds no path, it stays put
+        and the plan is returned with status "Partial".
+        cbs_options: passed to CBSSolver (heuristic, prioritize, corridor).
+        """
+        self.grid = grid
+        self.low_level_name = low_level
+        self.time_budget_ms = time_budget_ms
+        self.node_budget = node_budget
+        self.window = window
+        self.workers = workers
+        self.max_group_size = max_group_size
+        self.cbs_options = cbs_options
+        self.status = "Idle"
+        self.stats = SolverStats()
+        self.groups: List[List[int]] = []
+
+    def solve(self, starts: List[Tuple[int, int, int]], goals: List[Tuple[int, int]]) -> Optional[List[List[Tuple[int, int, int]]]]:
+        starts = [tuple(s) if len(s) == 3 else (s[0], s[1], 0) for s in starts]
+        self.budget = SearchBudget(self.time_budget_ms, self.node_budget)
+        self.stats = SolverStats()
+        self.stats.groups = len(starts)
+        self.stats.largest_group = 1 if starts else 0
+        self.stats.merges = 0
+        self.stats.avoided = 0
+        self._tried = set()
+        t0 = time.perf_counter()
+        pool = None
+        try:
+            groups = [[i] for i in range(len(starts))]
+            paths: List[Optional[list]] = [None] * len(starts)
+            pending = list(groups)
+            while True:
+                if self.workers and self.workers > 1 and pool is None and sum(len(g) > 1 for g in pending) > 1:
+                    pool = ProcessPoolExecutor(max_workers=self.workers)
+                statuses = self._solve_groups(pending, starts, goals, paths, pool)
+                if "Failed" in statuses:
+                    self.status = "Failed"
+                    return None
+                if "Timeout" in statuses or self.budget.exhausted():
+                    self.status = "Timeout"
+                    return paths
+                conflicts = detect_all_conflicts(paths, self.window)
+                if not conflicts:
+                    self.status = "Solved"
+                    return paths
+                # An empty list: agents only avoided others, so check the plan again
+                pending = self._resolve(groups, conflicts, starts, goals, paths)
+                if pending is None:
+                    # Only conflicts inside groups planned one agent at a time, where
+                    # an agent without a path stays put (as in Prioritized Planning)
+                    self.status = "Partial"
+                    return paths
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            self.groups = groups
+            self.stats.groups = len(groups)
+            self.stats.solve_time_s = time.perf_counter() - t0
+
+    def _resolve(self, groups: List[List[int]], conflicts: List[Conflict], starts, goals,
+                 paths: List[list]) -> Optional[List[List[int]]]:
+        """
+        Handle the conflicts between groups: avoid or merge, each group at
+        most once. Updates `groups` (and `paths` of avoiding agents) in place
+        and returns the merged groups, which still need solving; None if
+        nothing changed.
+        """
+        group_of = {agent: g for g, group in enumerate(groups) for agent in group}
+        merged, touched, avoided = [], set(), False
+        for conflict in conflicts: # Earliest first
+            g1, g2 = group_of[conflict.agent_1], group_of[conflict.agent_2]
+            if g1 == g2 or g1 in touched or g2 in touched:
+                continue
+            touched.update((g1, g2))
+            pair = tuple(sorted((tuple(groups[g1]), tuple(groups[g2]))))
+            if pair not in self._tried:
+                self._tried.add(pair)
+                if any(len(groups[g]) == 1 and self._avoid(groups[g][0], starts, goals, paths) for g in (g1, g2)):
+                    avoided = True
+                    continue
+            merged.append(sorted(groups[g1] + groups[g2]))
+        if not merged:
+            return [] if avoided else None
+        done = {g for g, group in enumerate(groups) if any(a in group for m in merged for a in m)}
+        groups[:] = [group for g, group in enumerate(groups) if g not in done] + merged
+        self.stats.merges += len(merged)
+        self.stats.largest_group = max(self.stats.largest_group, max(len(g) for g in merged))
+        return merged
+
+    def _avoid(self, agent: int, starts, goals, paths: List[list]) -> bool:
+        """Replan one agent around everyone else; keep it only if its cost stays the same."""
+        new_paths = replan_neighborhood(self.grid, starts, goals, paths, [agent], low_level=self.low_level_name,
+                                        node_budget=self.budget.remaining_nodes())
+        if new_paths is None or len(new_paths[agent]) != len(paths[agent]):
+            return False
+        paths[agent] = new_paths[agent]
+        self.stats.avoided += 1
+        return True
+
+    def _solve_groups(self, groups: List[List[int]], starts, goals, paths: List[list],
+                      pool: Optional[ProcessPoolExecutor]) -> List[str]:
+        """Solve every group on its own, write its paths into `paths`; returns the statuses."""
+        statuses, rest = [], []
+        for group in groups:
+            if self.max_group_size is not None and len(group) > self.max_group_size and self._plan_around(group, starts, goals, paths):
+                statuses.append("Solved")
+            else:
+                rest.append(group)
+
+        def args(group):
+            coupled = self.max_group_size is not None and len(group) > self.max_group_size
+            return (self.grid, self.low_level_name, [starts[i] for i in group], [goals[i] for i in group],
+                    self.budget.remaining_ms(), self.budget.remaining_nodes(), self.window, coupled,
+                    self.cbs_options)
+
+        # Single agents are just a low-level search: not worth a round trip to the pool
+        remote = [g for g in rest if len(g) > 1] if pool is not None else []
+        futures = [(group, pool.submit(_solve_group, *args(group))) for group in remote]
+        results = [(group, _solve_group(*args(group))) for group in rest if group not in remote]
+        results += [(group, future.result()) for group, future in futures]
+
+        for group, (group_paths, status, stats) in results:
+            statuses.append(status)
+            self._add_stats(stats)
+            if group_paths is not None:
+                for agent, path in zip(group, group_paths):
+                    paths[agent] = path
+        return statuses
+
+    def _plan_around(self, group: List[int], starts, goals, paths: List[list]) -> bool:
+        """
+        Plan an oversized group one agent at a time around everyone else's
+        current paths, so it does not run into (and swallow) further groups.
+        False if some agent found no path; the group is then planned alone.
+        """
+        if any(paths[i] is None for i in range(len(paths)) if i not in group):
+            return False
+        new_paths = replan_neighborhood(self.grid, starts, goals, paths, group, low_level=self.low_level_name,
+                                        node_budget=self.budget.remaining_nodes())
+        if new_paths is None:
+            return False
+        for agent, path in new_paths.items():
+            paths[agent] = path
+        return True
+
+    def _add_stats(self, stats: SolverStats) -> None:
+        for name in _SUMMED:
+            setattr(self.stats, name, getattr(self.stats, name) + getattr(stats, name))
+        self.stats.hl_peak_open = max(self.stats.hl_peak_open, stats.hl_peak_open)
+        self.stats.ll_peak_open = max(self.stats.ll_peak_open, stats.ll_peak_open)
+        # Groups ran on budgets of their own; count their nodes against the whole solve
+        self.budget.nodes += stats.hl_expanded + stats.ll_expansions
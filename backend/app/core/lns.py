@@ -0,0 +1,284 @@
+# backend/app/core/lns.py
+"""
+MAPF-LNS (Li et al. 2021): anytime improvement of a joint plan.
+
+Every iteration picks a neighborhood of a few agents, throws their paths
+away and replans them one by one (random order) against reservations of
+everyone else's paths, then keeps the new paths if the plan got better:
+fewer conflicts first, then a lower sum of costs. Starting from a plan
+with conflicts (e.g. Prioritized Planning's parked failures) it therefore
+repairs before it optimizes.
+
+Neighborhoods (chosen by adaptive weights that follow recent gains):
+  random        any k agents
+  agent         the most delayed agent plus agents that use the cells of
+                its shortest path (they are likely what delays it)
+  intersection  agents that pass through the area around a junction cell
+  collision     while there are conflicts: a colliding agent and the
+                agents it collides with
+
+Replanning runs in `replan_neighborhood`, a plain function so a process
+pool can evaluate several neighborhoods at once; the LNSImprover in the
+calling process only proposes neighborhoods and accepts results.
+"""
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from .budget import SearchBudget, BudgetExhausted
+from .conflict import ConflictIndex
+from .constraint_table import ReservationTable
+from .engines import get_low_level
+from .heuristics import get_distance_table, descend
+from ..utils.grid import Grid
+
+NEIGHBORHOODS = ("random", "agent", "intersection")
+# Share of a neighborhood's gain that goes into its selection weight
+REACTION = 0.1
+
+@dataclass
+class Improvement:
+    iteration: int
+    neighborhood: str
+    sum_of_costs: int
+    conflicts: int
+    paths: Dict[int, List[Tuple[int, int, int]]] # Only the agents that changed
+
+def replan_neighborhood(grid: Grid, starts, goals, paths, agents: List[int], seed: int = 0,
+                        low_level: str = "sipp", node_budget: Optional[int] = None) -> Optional[Dict[int, list]]:
+    """
+    New paths for `agents`, planned in random order around everyone else's
+    `paths`, or None if one of them finds no path within `node_budget`.
+    """
+    engine = get_low_level(low_level)
+    neighborhood = set(agents)
+    table = ReservationTable()
+    for i, path in enumerate(paths):
+        if i not in neighborhood:
+            table.reserve_path(path)
+    # The paths being replaced can be longer than the 100 steps other solvers
+    # assume a battery allows, so the horizon bounds both
+    max_time = max(len(p) for p in paths) + grid.width + grid.height
+    order = list(agents)
+    random.Random(seed).shuffle(order)
+    budget = SearchBudget(node_budget=node_budget)
+    new_paths = {}
+    for i in order:
+        try:
+            result = engine(grid, tuple(starts[i]), tuple(goals[i]), [], i, current_battery=max_time,
+                            max_time=max_time, constraint_table=table, budget=budget)
+        except BudgetExhausted:
+            return None
+        if not result:
+            return None
+        new_paths[i] = result.path
+        table.reserve_path(result.path)
+    return new_paths
+
+class LNSImprover:
+    def __init__(self, grid: Grid, starts, goals, paths: List[list], neighborhood_size: int = 8,
+                 seed: int = 0, low_level: str = "sipp", replan_budget: Optional[int] = 200000):
+        """
+        paths: the plan to improve (any complete plan, conflicts allowed).
+        replan_budget: node budget of one neighborhood replan; hopeless
+        neighborhoods are dropped instead of searched to exhaustion.
+        """
+        self.grid = grid
+        self.starts = [tuple(s) if len(s) == 3 else (s[0], s[1], 0) for s in starts]
+        self.goals = [tuple(g) for g in goals]
+        self.paths = [list(p) for p in paths]
+        self.neighborhood_size = min(neighborhood_size, len(paths))
+        self.rng = random.Random(seed)
+        self.low_level = low_level
+        self.replan_budget = replan_budget
+        self.weights = {kind: 1.0 for kind in NEIGHBORHOODS}
+        self.iterations = 0
+        self.accepted = {kind: 0 for kind in NEIGHBORHOODS + ("collision",)}
+        self.busy: Set[int] = set() # Agents in neighborhoods still being replanned
+        self._tabu: Set[int] = set()
+        self._intersections = None
+        # Cost of each agent's path if it had the map to itself
+        self.ideal_costs = [get_distance_table(grid, g).get(*s) for s, g in zip(self.starts, self.goals)]
+        # Conflict bookkeeping: total count and who collides with whom
+        self.index = ConflictIndex()
+        self.conflicts = 0
+        self.partners: Dict[int, Set[int]] = {i: set() for i in range(len(paths))}
+        for i, path in enumerate(self.paths):
+            self._add(i, path)
+
+    @property
+    def sum_of_costs(self) -> int:
+        return sum(len(p) - 1 for p in self.paths)
+
+    def _add(self, i: int, path: list) -> int:
+        conflicts = self.index.conflicts_for(i, path)
+        for c in conflicts:
+            self.partners[i].add(c.agent_1)
+            self.partners[c.agent_1].add(i)
+        self.index.add_path(i, path)
+        self.conflicts += len(conflicts)
+        return len(conflicts)
+
+    def _remove(self, i: int) -> int:
+        self.index.remove_path(i)
+        conflicts = self.index.conflicts_for(i, self.paths[i])
+        for other in self.partners[i]:
+            self.partners[other].discard(i)
+        self.partners[i] = set()
+        self.conflicts -= len(conflicts)
+        return len(conflicts)
+
+    # --- Neighborhoods ---
+
+    def propose(self) -> Tuple[str, List[int]]:
+        """A neighborhood of agents not already out for replanning."""
+        colliding = [i for i, p in self.partners.items() if p and i not in self.busy]
+        if colliding:
+            kind = "collision"
+            seed_agent = self.rng.choice(colliding)
+            agents = [seed_agent] + [j for j in self.partners[seed_agent] if j not in self.busy]
+        else:
+            kinds = list(self.weights)
+            kind = self.rng.choices(kinds, weights=[self.weights[k] for k in kinds])[0]
+            agents = getattr(self, f"_{kind}_neighborhood")()
+        agents = agents[:self.neighborhood_size]
+        self._fill(agents)
+        self.busy.update(agents)
+        return kind, agents
+
+    def _free_agents(self) -> List[int]:
+        return [i for i in range(len(self.paths)) if i not in self.busy]
+
+    def _fill(self, agents: List[int]) -> None:
+        """Top up with random agents."""
+        chosen = set(agents)
+        free = [i for i in self._free_agents() if i not in chosen]
+        self.rng.shuffle(free)
+        agents.extend(free[:self.neighborhood_size - len(agents)])
+
+    def _random_neighborhood(self) -> List[int]:
+        return []
+
+    def _delay(self, i: int) -> int:
+        return len(self.paths[i]) - 1 - self.ideal_costs[i]
+
+    def _agent_neighborhood(self) -> List[int]:
+        candidates = [i for i in self._free_agents() if i not in self._tabu]
+        if not candidates:
+            self._tabu.clear()
+            candidates = self._free_agents()
+        if not candidates:
+            return []
+        worst = max(candidates, key=lambda i: (self._delay(i), self.rng.random()))
+        self._tabu.add(worst)
+        agents = [worst]
+        ideal = [self.starts[worst]] + descend(self.grid, get_distance_table(self.grid, self.goals[worst]),
+                                               self.starts[worst])
+        for pose in ideal:
+            for _, other in self.index.cell_visits.get(tuple(pose[:2]), ()):
+                if other not in agents and other not in self.busy:
+                    agents.append(other)
+                    if len(agents) >= self.neighborhood_size:
+                        return agents
+        return agents
+
+    def _intersection_neighborhood(self) -> List[int]:
+        if self._intersections is None:
+            grid = self.grid
+            self._intersections = [(x, y) for y in range(grid.height) for x in range(grid.width)
+                                   if not grid.is_blocked(x, y)
+                                   and sum(grid.moves[(y * grid.width + x) * 4 + d] >= 0 for d in range(4)) >= 3]
+        if not self._intersections:
+            return []
+        # Agents visiting the cells nearest to a random junction
+        start = self.rng.choice(self._intersections)
+        agents, seen, queue = [], {start}, deque([start])
+        while queue and len(agents) < self.neighborhood_size:
+            cell = queue.popleft()
+            for _, other in self.index.cell_visits.get(cell, ()):
+                if other not in agents and other not in self.busy:
+                    agents.append(other)
+            x, y = cell
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if (nx, ny) not in seen and self.grid.in_bounds(nx, ny) and not self.grid.is_blocked(nx, ny):
+                    seen.add((nx, ny))
+                    queue.append((nx, ny))
+        return agents
+
+    # --- Evaluation ---
+
+    def task_args(self, agents: List[int]) -> tuple:
+        """Arguments of replan_neighborhood for this neighborhood on the current plan."""
+        return (self.grid, self.starts, self.goals, self.paths, agents, self.rng.randrange(1 << 30),
+                self.low_level, self.replan_budget)
+
+    def offer(self, kind: str, agents: List[int], new_paths: Optional[Dict[int, list]]) -> Optional[Improvement]:
+        """
+        Accept `new_paths` for the neighborhood if the plan improves. The
+        paths were planned against the plan as it was when proposed, so they
+        are checked again against the current one.
+        """
+        self.iterations += 1
+        self.busy.difference_update(agents)
+        if not new_paths:
+            self._reward(kind, 0)
+            return None
+        old_paths = {i: self.paths[i] for i in agents}
+        old_cost = sum(len(p) - 1 for p in old_paths.values())
+        new_cost = sum(len(p) - 1 for p in new_paths.values())
+        old_conflicts = sum(self._remove(i) for i in agents)
+        new_conflicts = 0
+        for i in agents:
+            self.paths[i] = new_paths[i]
+            new_conflicts += self._add(i, new_paths[i])
+        if (new_conflicts, new_cost) < (old_conflicts, old_cost):
+            self.accepted[kind] += 1
+            self._reward(kind, old_cost - new_cost)
+            return Improvement(self.iterations, kind, self.sum_of_costs, self.conflicts, dict(new_paths))
+        for i in agents: # Worse: put the old paths back
+            self._remove(i)
+        for i in agents:
+            self.paths[i] = old_paths[i]
+            self._add(i, old_paths[i])
+        self._reward(kind, 0)
+        return None
+
+    def _reward(self, kind: str, gain: int) -> None:
+        if kind in self.weights:
+            self.weights[kind] = (1 - REACTION) * self.weights[kind] + REACTION * max(gain, 0) / max(1, self.neighborhood_size)
+            self.weights[kind] = max(self.weights[kind], 0.01) # Never starve a neighborhood kind
+
+    def improve(self, deadline_s: float, workers: Optional[int] = None) -> Iterator[Improvement]:
+        """
+        Run until `deadline_s` seconds have passed, yielding every improvement.
+        workers > 1 evaluates that many neighborhoods at once in a process pool.
+        """
+        deadline = time.monotonic() + deadline_s
+        if not workers or workers <= 1:
+            while time.monotonic() < deadline:
+                kind, agents = self.propose()
+                improvement = self.offer(kind, agents, replan_neighborhood(*self.task_args(agents)))
+                if improvement is not None:
+                    yield improvement
+            return
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            pending = {}
+            while True:
+                while len(pending) < workers and time.monotonic() < deadline:
+                    kind, agents = self.propose()
+                    pending[pool.submit(replan_neighborhood, *self.task_args(agents))] = (kind, agents)
+                if not pending:
+                    return
+                done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done:
+                    return # Deadline hit
+                for future in done:
+                    kind, agents = pending.pop(future)
+                    improvement = self.offer(kind, agents, future.result())
+                    if improvement is not None:
+                        yield improvement
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -1,13 +1,15 @@
 # backend/app/core/low_level.py
 import heapq
+import re
+from array import array
 from typing import List, Tuple, Optional
 from .node import Constraint, PathResult
+from .heuristics import get_distance_table, descend, UNREACHABLE
+from .constraint_table import ConstraintTable
+from .conflict import ConflictIndex
+from .budget import SearchBudget
 from ..utils.grid import Grid
 
-# Directions: 0: East, 1: South, 2: West, 3: North
-# Deltas match the directions indices
-DELTAS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
-
 class State:
     def __init__(self, time: int, x: int, y: int, direction: int, g: int, h: int, parent=None, battery: int = 100):
         self.time = time
@@ -18,6 +20,7 @@ class State:
         self.h = h
         self.parent = parent
         self.battery = battery
+        self.conflicts = 0 # Conflicts along the path so far (focal search only)
 
     @property
     def f(self):
@@ -35,6 +38,7 @@ def manhattan_distance(x1, y1, x2, y2):
     return abs(x1 - x2) + abs(y1 - y2)
 
 def is_constrained(curr_x, curr_y, next_x, next_y, next_time, constraints):
+    """Linear scan over a constraint list (the low level uses ConstraintTable instead)."""
     for c in constraints:
         if c.time != next_time:
             continue
@@ -53,82 +57,370 @@ def space_time_astar(grid: Grid,
                      agent_id: int,
                      current_battery: int,
                      min_battery: int = 10,
-                     max_time: int = 300) -> Optional[PathResult]: # <--- CHANGED FROM 100 TO 300
-    
-    agent_constraints = [c for c in constraints if c.agent_id == agent_id]
+                     max_time: int = 300, # <--- CHANGED FROM 100 TO 300
+                     heuristic: str = "distance_table",
+                     constraint_table: Optional[ConstraintTable] = None,
+                     focal_w: float = 1.0,
+                     conflict_index: Optional[ConflictIndex] = None,
+                     budget: Optional[SearchBudget] = None,
+                     window: Optional[int] = None,
+                     resume: Optional[Tuple["SearchTree", int]] = None,
+                     record: Optional["SearchTree"] = None) -> Optional[PathResult]:
+    """
+    heuristic: "distance_table" (default) uses the cached rotation-aware
+    true distances from heuristics.py; "manhattan" is kept for comparison.
+    constraint_table: prebuilt table to use instead of `constraints`
+    (e.g. a reservation table shared by all agents).
+    focal_w: > 1 switches to focal search (ECBS low level): any path within
+    focal_w * optimal is acceptable, and among those the search prefers
+    the fewest conflicts with the paths in `conflict_index`.
+    budget: shared SearchBudget; raises BudgetExhausted when it runs out.
+    window: rolling-horizon mode. Constraints are only honoured up to this
+    time; the first state to reach it is finished along the distance table
+    (the relaxed cost-to-go), so search effort no longer grows with path length.
+    resume / record: incremental mode (plain A* with the distance table only).
+    `record` is filled with this search's tree; `resume` = (tree, since)
+    continues the recorded search of the same agent, goal and horizon under
+    a subset of these constraints, where the new ones all apply at or after
+    time `since`, instead of starting over.
+    """
+    if constraint_table is None:
+        constraint_table = ConstraintTable(constraints, agent_id)
+    constrained = constraint_table.is_constrained
+    goal = tuple(goal)
+    # The agent may only stop on its goal once nobody needs the cell any more
+    goal_free_after = constraint_table.latest_constraint_at(goal[0], goal[1])
+    if goal_free_after >= max_time:
+        return None # The goal never frees up within the horizon
     
-    open_list = []
-    closed_set = set()
+    if heuristic == "manhattan":
+        h_fn = lambda x, y, d: manhattan_distance(x, y, goal[0], goal[1])
+    else:
+        table = get_distance_table(grid, goal)
+        h_fn = table.get
     
     start_x, start_y, start_dir = start_pose
-    start_h = manhattan_distance(start_x, start_y, goal[0], goal[1])
+    start_h = h_fn(start_x, start_y, start_dir)
+    if start_h == UNREACHABLE:
+        return None # Goal is walled off from the start, no need to search
+
+    if focal_w > 1.0:
+        start_node = State(0, start_x, start_y, start_dir, 0, start_h, battery=current_battery)
+        return _focal_search(grid, start_node, goal, goal_free_after, constrained, h_fn,
+                             agent_id, max_time, focal_w, conflict_index, budget)
+
+    if heuristic == "manhattan":
+        w = grid.width
+        h_table = array('I', (manhattan_distance((s >> 2) % w, (s >> 2) // w, goal[0], goal[1])
+                              for s in range(w * grid.height * 4)))
+    else:
+        h_table = table.dist
+    # Nothing is expanded at or after this time (horizon / flat battery)
+    limit = min(max_time, current_battery)
+    if heuristic == "manhattan":
+        resume = record = None # Trees assume the table's h values
+    return _astar(grid, start_pose, goal, goal_free_after, constrained, h_table, limit, budget, window,
+                  resume, record)
+
+# How each state was reached, stored per packed state key (0 = not generated yet)
+_START, _WAIT, _TURN_LEFT, _TURN_RIGHT, _FORWARD = 1, 2, 3, 4, 5
+# Above this many (t, x, y, dir) states, `came` is a dict instead of a bytearray
+MAX_DENSE_STATES = 1 << 25
+# Timesteps a dense `came` first covers beyond the start's heuristic; it
+# doubles when the search goes deeper, so short searches stay cheap to set up
+HORIZON_SLACK = 2
+
+class _SparseMarks(dict):
+    """Dict stand-in for the bytearray of `came` marks on huge horizons."""
+    def __missing__(self, key):
+        return 0
+
+# Any generated state in a `came` bytearray
+_MARKED = re.compile(b"[^\x00]")
+
+class SearchTree:
+    """
+    What a finished packed A* search leaves behind: its `came` marks (cut
+    after the last generated state), its open list and the state it
+    stopped on (None if it ran dry), so a search for the same agent under
+    more constraints can branch off it instead of starting over.
+    """
+    __slots__ = ("came", "open_list", "stop", "layer", "nbytes")
+
+    def __init__(self):
+        self.came = None
+        self.open_list = None
+        self.stop = None
+        self.layer = 0
+        self.nbytes = 0 # Rough memory footprint, for callers that bound what they keep
+
+    def capture(self, came: bytearray, used: int, open_list: list, stop: Optional[int], layer: int) -> None:
+        self.came = came[:used] # Every state generated lies before `used`
+        self.open_list = open_list
+        self.stop = stop
+        self.layer = layer
+        self.nbytes = used + 80 * len(open_list) # An entry is a 3-tuple of ints plus its list slot
+
+    def branch(self, since: int, h_table) -> Tuple[bytearray, list, int]:
+        """
+        `came`, open list and reused expansion count to start a search whose
+        extra constraints all apply at or after time `since`. Every state
+        before `since` keeps its cost (g == t) and parent, and every
+        expansion there stays valid; the states at since - 1 that were
+        expanded (or stopped on) are opened again, so their successors get
+        generated under the new constraints.
+        """
+        layer = self.layer
+        cut = min(since * layer, len(self.came))
+        last = max(0, (since - 1) * layer) # First state at since - 1
+        came = bytearray(self.came[:cut]) # The search grows it past `cut` as it goes
+        open_list = [entry for entry in self.open_list if entry[2] < cut]
+        pending = {entry[2] for entry in open_list}
+        reopen = [m.start() for m in _MARKED.finditer(came, last, cut) if m.start() not in pending]
+        if self.stop is not None and self.stop < last:
+            reopen.append(self.stop) # Popped but never expanded
+        kept = len(open_list)
+        for key in reopen:
+            t = key // layer
+            open_list.append((t + h_table[key - t * layer], -t, key))
+        heapq.heapify(open_list)
+        reused = cut - came.count(0, 0, cut) - kept - len(reopen)
+        return came, open_list, reused
+
+def _astar(grid: Grid, start_pose, goal, goal_free_after: int, constrained, h_table,
+           limit: int, budget: Optional[SearchBudget], window: Optional[int],
+           resume: Optional[Tuple[SearchTree, int]] = None, record: Optional[SearchTree] = None) -> Optional[PathResult]:
+    """
+    Space-time A* on packed states. A state (t, x, y, dir) is the int
+    ((t * height + y) * width + x) * 4 + dir; heap entries are (f, -t, key)
+    tuples, so ties still go to the deeper state.
+    Since every action costs 1, g == t and a state's cost is known when it is
+    generated: it is pushed at most once, and `came` (one byte per state:
+    the action that reached it) doubles as the closed list and parent table.
+    A bytearray `came` starts a few timesteps past the start's heuristic and
+    is extended as the search goes deeper, not sized for the whole `limit`.
+    """
+    width = grid.width
+    layer = width * grid.height * 4 # States per timestep
+    moves = grid.moves
+    goal_cell = goal[1] * width + goal[0]
+    start_key = (start_pose[1] * width + start_pose[0]) * 4 + start_pose[2]
+    num_states = layer * (limit + 1)
+    dense = num_states <= MAX_DENSE_STATES
+    since = 0 # States before this time were taken over from `resume`
+    if resume is not None and dense and resume[0].came is not None and resume[1] > 0:
+        came, open_list, reused = resume[0].branch(resume[1], h_table)
+        since = resume[1]
+    else:
+        if dense:
+            h0 = h_table[start_key]
+            horizon = h0 + HORIZON_SLACK if h0 != UNREACHABLE else limit
+            came = bytearray(min(limit + 1, horizon + 2) * layer)
+        else:
+            came = _SparseMarks()
+        came[start_key] = _START
+        open_list = [(h_table[start_key], 0, start_key)]
+        reused = 0
+    heappush, heappop = heapq.heappush, heapq.heappop
+    expansions = 0
+    peak_open = len(open_list)
+    result = stop = None
+    f = 0
+    size = len(came) if dense else num_states # States `came` covers
+
+    while open_list:
+        if len(open_list) > peak_open:
+            peak_open = len(open_list)
+        f, neg_t, key = heappop(open_list)
+        expansions += 1
+        if budget is not None:
+            budget.charge()
+
+        t = -neg_t
+        state = key - t * layer # Index of (x, y, dir) within the layer
+        cell = state >> 2
+        if cell == goal_cell and t > goal_free_after:
+            result, stop = _packed_path(key, came, layer, width, moves, expansions, peak_open), key
+            break
+
+        if window is not None and t >= window:
+            result, stop = _packed_path(key, came, layer, width, moves, expansions, peak_open), key
+            result = complete_beyond_window(grid, result, goal)
+            break
+
+        if t >= limit:
+            continue
+
+        x, y, d = cell % width, cell // width, state & 3
+        nt = t + 1
+        base = nt * layer # Successor keys; nt is also their g
+        if base + layer > size:
+            grown = min(num_states, max(2 * size, base + layer))
+            came.extend(bytes(grown - size))
+            size = grown
+
+        # WAIT / ROTATE: same cell, so one vertex check covers all three
+        if not constrained(x, y, x, y, nt):
+            cell4 = cell << 2
+            for nd, action in ((d, _WAIT), ((d - 1) & 3, _TURN_LEFT), ((d + 1) & 3, _TURN_RIGHT)):
+                nkey = base + cell4 + nd
+                if not came[nkey]:
+                    came[nkey] = action
+                    heappush(open_list, (nt + h_table[cell4 + nd], -nt, nkey))
+
+        # MOVE FORWARD through the grid's move table
+        nidx = moves[state]
+        if nidx >= 0:
+            nstate = (nidx << 2) + d
+            nkey = base + nstate
+            h = h_table[nstate]
+            if not came[nkey] and h != UNREACHABLE and not constrained(x, y, nidx % width, nidx // width, nt):
+                came[nkey] = _FORWARD
+                heappush(open_list, (nt + h, -nt, nkey))
+
+    if record is not None and dense:
+        # The heuristic is consistent, so f never drops from pop to pop: nothing
+        # was expanded beyond time f or generated beyond f + 1
+        used = min(max(f + 2, since), limit + 1) * layer
+        record.capture(came, used, open_list, stop, layer)
+    if result is not None:
+        result.reused = reused
+    return result
+
+def _packed_path(key: int, came, layer: int, width: int, moves, expansions: int, peak_open: int = 0) -> PathResult:
+    """Walks the `came` marks back from a packed state key to the start."""
+    path = []
+    t = key // layer
+    state = key - t * layer
+    end_time = t
+    while True:
+        cell, d = state >> 2, state & 3
+        path.append((cell % width, cell // width, d))
+        action = came[t * layer + state]
+        if action == _START:
+            break
+        if action == _TURN_LEFT:
+            state = (cell << 2) + ((d + 1) & 3)
+        elif action == _TURN_RIGHT:
+            state = (cell << 2) + ((d - 1) & 3)
+        elif action == _FORWARD:
+            state = (moves[(cell << 2) + ((d + 2) & 3)] << 2) + d # One cell back
+        t -= 1
+    path.reverse()
+    return PathResult(path=path, cost=end_time, expansions=expansions, lower_bound=end_time, peak_open=peak_open)
+
+def _successors(grid: Grid, curr: State, constrained, h_fn):
+    """Yields the unconstrained WAIT / ROTATE / MOVE successors of `curr`."""
+    next_time = curr.time + 1
+    next_battery = curr.battery - 1 # Simple drain model
+
+    # --- Generate Actions ---
     
-    start_node = State(0, start_x, start_y, start_dir, 0, start_h, battery=current_battery)
-    heapq.heappush(open_list, start_node)
+    # 1. WAIT (Cost 1)
+    # 2. ROTATE Left / 3. ROTATE Right (Cost 1)
+    # All three keep the robot on its cell, so they share one vertex check.
+    if not constrained(curr.x, curr.y, curr.x, curr.y, next_time):
+        yield State(
+            next_time, curr.x, curr.y, curr.direction, 
+            curr.g + 1, curr.h, curr, next_battery
+        )
+        for new_dir in ((curr.direction - 1) % 4, (curr.direction + 1) % 4):
+            yield State(
+                next_time, curr.x, curr.y, new_dir, 
+                curr.g + 1, h_fn(curr.x, curr.y, new_dir), curr, next_battery
+            )
+
+    # 4. MOVE FORWARD (Cost 1), looked up in the grid's precomputed move table
+    width = grid.width
+    nidx = grid.moves[(curr.y * width + curr.x) * 4 + curr.direction]
     
-    best_solution = None
+    if nidx >= 0:
+        nx, ny = nidx % width, nidx // width
+        new_h = h_fn(nx, ny, curr.direction)
+        if new_h != UNREACHABLE and not constrained(curr.x, curr.y, nx, ny, next_time):
+            yield State(
+                next_time, nx, ny, curr.direction, 
+                curr.g + 1, new_h, curr, next_battery
+            )
 
-    while open_list:
-        curr = heapq.heappop(open_list)
-        
-        state_key = (curr.time, curr.x, curr.y, curr.direction)
+def _focal_search(grid: Grid, start_node: State, goal, goal_free_after, constrained, h_fn,
+                  agent_id: int, max_time: int, w: float,
+                  conflict_index: Optional[ConflictIndex],
+                  budget: Optional[SearchBudget] = None) -> Optional[PathResult]:
+    """
+    Focal search: OPEN is ordered by f, FOCAL holds every open node with
+    f <= w * f_min and is ordered by conflicts so far, then f.
+    Nodes above the bound wait in a third heap until f_min rises.
+    Heaps are cleaned lazily through the closed set.
+    """
+    counter = 0
+    open_heap = [(start_node.f, counter, start_node)]
+    focal_heap = [(0, start_node.f, counter, start_node)]
+    waiting = [] # (f, counter, node) above the focal bound
+    closed_set = set()
+    expansions = 0
+    peak_open = 1
+    f_min = start_node.f
+
+    while focal_heap or waiting:
+        # Refresh f_min and admit newly eligible nodes into FOCAL
+        while open_heap and _key(open_heap[0][2]) in closed_set:
+            heapq.heappop(open_heap)
+        if not open_heap:
+            break
+        peak_open = max(peak_open, len(open_heap))
+        f_min = open_heap[0][0]
+        bound = w * f_min
+        while waiting and waiting[0][0] <= bound:
+            _, c, node = heapq.heappop(waiting)
+            heapq.heappush(focal_heap, (node.conflicts, node.f, c, node))
+        if not focal_heap:
+            break
+
+        curr = heapq.heappop(focal_heap)[3]
+        state_key = _key(curr)
         if state_key in closed_set:
             continue
         closed_set.add(state_key)
-        
-        # --- Goal Check ---
-        # Note: We don't care about final direction at the goal, usually.
-        if (curr.x, curr.y) == goal:
-            # Check if staying at goal is safe for at least 1 step
-            # Real implementation needs 'Safe Interval' check
-            return reconstruct_path(curr)
+        expansions += 1
+        if budget is not None:
+            budget.charge()
+
+        if (curr.x, curr.y) == goal and curr.time > goal_free_after:
+            result = reconstruct_path(curr, expansions)
+            result.lower_bound = f_min
+            result.peak_open = peak_open
+            return result
 
         if curr.time >= max_time or curr.battery <= 0:
             continue
 
-        next_time = curr.time + 1
-        next_battery = curr.battery - 1 # Simple drain model
-
-        # --- Generate Actions ---
-        
-        # 1. WAIT (Cost 1)
-        if not is_constrained(curr.x, curr.y, curr.x, curr.y, next_time, agent_constraints):
-            heapq.heappush(open_list, State(
-                next_time, curr.x, curr.y, curr.direction, 
-                curr.g + 1, curr.h, curr, next_battery
-            ))
-
-        # 2. ROTATE Left (Cost 1)
-        new_dir = (curr.direction - 1) % 4
-        if not is_constrained(curr.x, curr.y, curr.x, curr.y, next_time, agent_constraints):
-            heapq.heappush(open_list, State(
-                next_time, curr.x, curr.y, new_dir, 
-                curr.g + 1, curr.h, curr, next_battery
-            ))
-
-        # 3. ROTATE Right (Cost 1)
-        new_dir = (curr.direction + 1) % 4
-        if not is_constrained(curr.x, curr.y, curr.x, curr.y, next_time, agent_constraints):
-            heapq.heappush(open_list, State(
-                next_time, curr.x, curr.y, new_dir, 
-                curr.g + 1, curr.h, curr, next_battery
-            ))
-
-        # 4. MOVE FORWARD (Cost 1)
-        dx, dy = DELTAS[curr.direction]
-        nx, ny = curr.x + dx, curr.y + dy
-        
-        if grid.in_bounds(nx, ny) and not grid.is_blocked(nx, ny):
-            if not is_constrained(curr.x, curr.y, nx, ny, next_time, agent_constraints):
-                new_h = manhattan_distance(nx, ny, goal[0], goal[1])
-                heapq.heappush(open_list, State(
-                    next_time, nx, ny, curr.direction, 
-                    curr.g + 1, new_h, curr, next_battery
-                ))
+        for child in _successors(grid, curr, constrained, h_fn):
+            child.conflicts = curr.conflicts
+            if conflict_index is not None:
+                child.conflicts += conflict_index.count_move_conflicts(
+                    agent_id, child.time, curr.x, curr.y, child.x, child.y)
+            counter += 1
+            heapq.heappush(open_heap, (child.f, counter, child))
+            if child.f <= bound:
+                heapq.heappush(focal_heap, (child.conflicts, child.f, counter, child))
+            else:
+                heapq.heappush(waiting, (child.f, counter, child))
 
     return None
 
-def reconstruct_path(node: State) -> PathResult:
+def _key(state: State):
+    return (state.time, state.x, state.y, state.direction)
+
+def complete_beyond_window(grid: Grid, result: PathResult, goal: Tuple[int, int]) -> PathResult:
+    """Appends the unconstrained shortest route from the end of `result` to the goal."""
+    tail = descend(grid, get_distance_table(grid, goal), result.path[-1])
+    result.path.extend(tail)
+    result.cost += len(tail)
+    result.lower_bound += len(tail)
+    return result
+
+def reconstruct_path(node: State, expansions: int = 0) -> PathResult:
     path = []
     curr = node
     while curr:
@@ -136,4 +428,4 @@ def reconstruct_path(node: State) -> PathResult:
         path.append((curr.x, curr.y, curr.direction))
         curr = curr.parent
     path.reverse()
-    return PathResult(path=path, cost=node.g)
\ No newline at end of file
+    return PathResult(path=path, cost=node.g, expansions=expansions, lower_bound=node.g)
\ No newline at end of file
@@ -0,0 +1,111 @@
+# backend/app/core/mdd.py
+"""
+Multi-valued decision diagrams (MDDs) for conflict classification in CBS.
+
+The MDD of an agent at cost c holds, level by level, every (x, y, dir)
+state the agent can be in at time t on SOME path of cost exactly c that
+respects its constraints. A conflict is cardinal for an agent when every
+such path uses the conflicting cell (or move) at that time: constraining
+it away must then raise the agent's cost.
+
+  cardinal       cardinal for both agents: both children cost more
+  semi-cardinal  cardinal for one of them
+  non-cardinal   neither; a child may find an equally cheap detour
+"""
+from typing import List, Optional, Set, Tuple
+from .conflict import Conflict
+from .constraint_table import ConstraintTable
+from .heuristics import get_distance_table
+from ..utils.grid import Grid
+
+CARDINAL = "cardinal"
+SEMI_CARDINAL = "semi-cardinal"
+NON_CARDINAL = "non-cardinal"
+# Branching order: conflicts that raise the lower bound first
+CONFLICT_RANK = {CARDINAL: 0, SEMI_CARDINAL: 1, NON_CARDINAL: 2}
+
+class MDD:
+    """
+    Levels of packed states (cell * 4 + dir, cell = y * width + x).
+    After its last level the agent waits on its goal forever.
+    """
+    def __init__(self, width: int, goal: Tuple[int, int], levels: List[Set[int]]):
+        self.width = width
+        self.goal = goal
+        self.levels = levels
+        self.cost = len(levels) - 1
+        # Cells per level: rotations do not change who collides with whom
+        self.cells = [{key >> 2 for key in level} for level in levels]
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def only(self, t: int, x: int, y: int, prev: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        Every path is on (x, y) at time t (and, for a move, on `prev` at t - 1).
+        """
+        cell = y * self.width + x
+        if t > self.cost:
+            goal = self.goal[1] * self.width + self.goal[0]
+            return cell == goal and (prev is None or tuple(prev) == tuple(self.goal))
+        if self.cells[t] != {cell}:
+            return False
+        return prev is None or self.cells[t - 1] == {prev[1] * self.width + prev[0]}
+
+def build_mdd(grid: Grid, start: Tuple[int, int, int], goal: Tuple[int, int], cost: int,
+              table: ConstraintTable) -> MDD:
+    """
+    MDD of the cost-`cost` paths from `start` to `goal` under `table`.
+    A forward sweep keeps states whose distance-table bound still fits in
+    the cost; a backward sweep drops the ones with no way on to the goal.
+    `cost` must be the agent's optimal cost under `table` (its CT-node path).
+    """
+    width, moves = grid.width, grid.moves
+    dist = get_distance_table(grid, goal).dist
+    constrained = table.is_constrained
+    start_key = (start[1] * width + start[0]) * 4 + start[2]
+    levels = [{start_key}]
+    children = [] # children[t][key]: successors of key at t + 1 inside the bound
+    for t in range(1, cost + 1):
+        level, links = set(), {}
+        for key in levels[-1]:
+            cell, d = key >> 2, key & 3
+            x, y = cell % width, cell // width
+            succs = []
+            if not constrained(x, y, x, y, t):
+                # Wait and rotate in place
+                for succ in (key, (cell << 2) | ((d + 1) & 3), (cell << 2) | ((d - 1) & 3)):
+                    if t + dist[succ] <= cost:
+                        succs.append(succ)
+            ncell = moves[key]
+            if ncell >= 0:
+                succ = (ncell << 2) | d
+                if t + dist[succ] <= cost and not constrained(x, y, ncell % width, ncell // width, t):
+                    succs.append(succ)
+            links[key] = succs
+            level.update(succs)
+        levels.append(level)
+        children.append(links)
+
+    # Only goal states survive on the last level (distance 0); prune backwards
+    for t in range(cost - 1, -1, -1):
+        alive = levels[t + 1]
+        levels[t] = {key for key in levels[t] if any(s in alive for s in children[t][key])}
+    return MDD(width, tuple(goal), levels)
+
+def classify_conflict(conflict: Conflict, mdd_1: MDD, mdd_2: MDD) -> str:
+    """Cardinality of `conflict` given the MDDs of its agent_1 and agent_2."""
+    t = conflict.time
+    if conflict.type == 'vertex':
+        blocks_1 = mdd_1.only(t, conflict.x, conflict.y)
+        blocks_2 = mdd_2.only(t, conflict.x, conflict.y)
+    else:
+        # agent_1 moved (x, y) -> (next_x, next_y), agent_2 the other way
+        here, there = (conflict.x, conflict.y), (conflict.next_x, conflict.next_y)
+        blocks_1 = mdd_1.only(t, *there, prev=here)
+        blocks_2 = mdd_2.only(t, *here, prev=there)
+    if blocks_1 and blocks_2:
+        return CARDINAL
+    if blocks_1 or blocks_2:
+        return SEMI_CARDINAL
+    return NON_CARDINAL
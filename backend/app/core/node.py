@@ -2,6 +2,10 @@
 from dataclasses import dataclass, field
 from typing import List, Dict, Tuple, Set
 
+# Directions: 0: East, 1: South, 2: West, 3: North
+# Deltas match the directions indices
+DELTAS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
 @dataclass(frozen=True, eq=True)
 class Constraint:
     """
@@ -21,4 +25,8 @@ class Constraint:
 @dataclass
 class PathResult:
     path: List[Tuple[int, int]]  # The sequence of coordinates (x, y)
-    cost: int
\ No newline at end of file
+    cost: int
+    expansions: int = 0  # Low-level nodes expanded to find this path
+    lower_bound: int = 0  # Proven lower bound on the optimal cost (== cost unless bounded-suboptimal)
+    peak_open: int = 0  # Largest open list seen during the search
+    reused: int = 0  # Expansions taken over from an earlier search instead of redone (incremental mode)
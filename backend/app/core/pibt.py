@@ -0,0 +1,330 @@
+# backend/app/core/pibt.py
+"""
+PIBT (Priority Inheritance with Backtracking, Okumura et al. 2019) for
+rotate-then-move robots, optionally wrapped in LaCAM (Okumura 2023).
+
+PIBT plans one timestep for everyone at once: agents pick their next cell
+in priority order, best cost-to-go first. An agent that wants a cell held
+by an agent that has not moved yet lends it its priority and has it move
+out first; if that agent cannot, the requester backtracks to its next
+option. Cells then become actions: a robot facing its chosen cell drives
+into it, any other robot turns towards it (or towards where its way goes
+on, if it stays). A drive into a cell whose robot does not leave this
+tick is called off, so a pushed robot that first has to turn holds up
+its pusher for a tick instead of colliding with it.
+
+Plain PIBT can livelock. LaCAM makes it complete: it runs a depth-first
+search over joint configurations where PIBT generates the successor and
+each revisit of a configuration fixes the next state of one more agent
+(a lazily built constraint tree), so in the limit every successor is tried.
+
+States are packed as cell * 4 + dir, which is also the index into a
+DistanceTable's flat array and Grid.moves.
+"""
+import random
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from .budget import SearchBudget, BudgetExhausted
+from .heuristics import get_distance_table, UNREACHABLE
+from .stats import SolverStats
+from ..utils.grid import Grid
+
+# Extra cost for a pushed robot to keep going the way it is pushed
+SIDESTEP_BIAS = 3
+
+class _Constraint:
+    """LaCAM low-level node: agent `who` goes to `state`, on top of `parent`."""
+    __slots__ = ("parent", "who", "state", "depth")
+
+    def __init__(self, parent: Optional["_Constraint"] = None, who: int = -1, state: int = -1):
+        self.parent = parent
+        self.who = who
+        self.state = state
+        self.depth = parent.depth + 1 if parent is not None else 0
+
+    def fixed(self) -> Dict[int, int]:
+        assignment = {}
+        node = self
+        while node.parent is not None:
+            assignment[node.who] = node.state
+            node = node.parent
+        return assignment
+
+class _Config:
+    """LaCAM high-level node: one joint configuration and its pending constraints."""
+    __slots__ = ("states", "parent", "priorities", "order", "tree")
+
+    def __init__(self, states: Tuple[int, ...], parent: Optional["_Config"], priorities: List[float]):
+        self.states = states
+        self.parent = parent
+        self.priorities = priorities
+        self.order = sorted(range(len(states)), key=lambda i: -priorities[i])
+        self.tree = deque([_Constraint()])
+
+class PIBTSolver:
+    def __init__(self, grid: Grid, lacam: bool = True, max_steps: Optional[int] = None, seed: int = 0,
+                 time_budget_ms: Optional[float] = None, node_budget: Optional[int] = None):
+        """
+        lacam: search over configurations (complete) instead of following a
+        single PIBT rollout, which gives up after `max_steps` timesteps
+        (default: 4 * (width + height)).
+        time_budget_ms / node_budget: cooperative limits; node_budget counts
+        agent decisions. On expiry the plan towards the configuration closest
+        to the goals comes back with status "Timeout".
+        """
+        self.grid = grid
+        self.lacam = lacam
+        self.max_steps = max_steps if max_steps is not None else 4 * (grid.width + grid.height)
+        self.seed = seed
+        self.time_budget_ms = time_budget_ms
+        self.node_budget = node_budget
+        self.status = "Idle"
+        self.stats = SolverStats()
+
+    def solve(self, starts: List[Tuple[int, int, int]], goals: List[Tuple[int, int]]) -> Optional[List[List[Tuple[int, int, int]]]]:
+        starts = [tuple(s) if len(s) == 3 else (s[0], s[1], 0) for s in starts]
+        self.budget = SearchBudget(self.time_budget_ms, self.node_budget)
+        self.stats = SolverStats()
+        self.rng = random.Random(self.seed)
+        t0 = time.perf_counter()
+        width = self.grid.width
+        self.moves = self.grid.moves
+        self.dist = [get_distance_table(self.grid, goal).dist for goal in goals]
+        self.goal_cells = [gy * width + gx for gx, gy in goals]
+        start_states = tuple((y * width + x) * 4 + d for x, y, d in starts)
+        if any(dist[s] == UNREACHABLE for dist, s in zip(self.dist, start_states)):
+            self.status = "Failed"
+            return None
+        # Push chains can be as long as the fleet
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, 4 * len(starts) + 1000))
+        try:
+            if self.lacam:
+                chain = self._lacam(start_states)
+            else:
+                chain = self._rollout(start_states)
+        finally:
+            sys.setrecursionlimit(limit)
+        self.stats.solve_time_s = time.perf_counter() - t0
+        return None if chain is None else self._paths(chain)
+
+    def _initial_priorities(self, n: int) -> List[float]:
+        # Fractional tie-breakers below 1: elapsed steps always dominate
+        return [self.rng.random() for _ in range(n)]
+
+    def _next_priorities(self, priorities: List[float], states) -> List[float]:
+        """Agents off their goal gain priority each step; arrival resets it."""
+        goal_cells = self.goal_cells
+        return [p - int(p) if s >> 2 == goal_cells[i] else p + 1 for i, (p, s) in enumerate(zip(priorities, states))]
+
+    def _at_goals(self, states) -> bool:
+        return all(s >> 2 == g for s, g in zip(states, self.goal_cells))
+
+    def _cost_to_go(self, states) -> int:
+        return sum(dist[s] for dist, s in zip(self.dist, states))
+
+    def _successors(self, state: int) -> List[int]:
+        cell, d = state >> 2, state & 3
+        succ = [state, (cell << 2) + ((d - 1) & 3), (cell << 2) + ((d + 1) & 3)]
+        ncell = self.moves[state]
+        if ncell >= 0:
+            succ.append((ncell << 2) + d)
+        return succ
+
+    # --- One PIBT timestep ---
+
+    def _step(self, states, order: List[int], fixed: Dict[int, int]) -> Optional[List[int]]:
+        """
+        Next joint state from `states`, or None if `fixed` is infeasible.
+        PIBT picks a target cell for every agent; an agent facing its target
+        drives into it, any other turns towards it. A drive is called off when
+        the robot on the target cell does not leave it this tick, which in
+        turn may call off drives into the caller's cell.
+        """
+        n = len(states)
+        self.budget.charge(n)
+        self.stats.ll_calls += 1
+        self.stats.ll_expansions += n
+        occupied = {s >> 2: i for i, s in enumerate(states)}
+        target = [-1] * n
+        nxt = [-1] * n
+        for i, s in fixed.items():
+            if s >> 2 in occupied and occupied[s >> 2] != i and fixed.get(occupied[s >> 2], -1) >> 2 == states[i] >> 2:
+                return None # Fixed agents swapping cells
+            target[i] = s >> 2
+            nxt[i] = s
+        reserved = {}
+        for i, s in fixed.items():
+            if s >> 2 in reserved:
+                return None # Fixed agents on one cell
+            reserved[s >> 2] = i
+        self._valid = True
+        for i in order:
+            if target[i] < 0:
+                self._pibt(i, -1, states, target, reserved, occupied)
+        if not self._valid:
+            return None
+
+        # Cells to actions
+        moves = self.moves
+        for i, s in enumerate(states):
+            if nxt[i] >= 0:
+                continue
+            cell, d = s >> 2, s & 3
+            if target[i] == cell:
+                # Staying anyway: turn if that is where the way continues
+                dist = self.dist[i]
+                nxt[i] = min((s, (cell << 2) + ((d - 1) & 3), (cell << 2) + ((d + 1) & 3)), key=lambda x: (dist[x] + (x != s), x == s))
+            elif moves[s] == target[i]:
+                nxt[i] = (target[i] << 2) + d
+            else:
+                want = next(dd for dd in range(4) if moves[(cell << 2) + dd] == target[i])
+                nxt[i] = (cell << 2) + ((d + 1) & 3 if (want - d) & 3 == 1 else (d - 1) & 3)
+
+        # Call off drives into cells that are not vacated, transitively
+        entering = {}
+        stopped = []
+        for i, s in enumerate(states):
+            if nxt[i] >> 2 != s >> 2:
+                entering[nxt[i] >> 2] = i
+            else:
+                stopped.append(i)
+        while stopped:
+            k = stopped.pop()
+            i = entering.pop(states[k] >> 2, None)
+            if i is not None:
+                if i in fixed:
+                    return None
+                nxt[i] = states[i]
+                stopped.append(i)
+        return nxt
+
+    def _pibt(self, i: int, parent: int, states, target: List[int], reserved: Dict[int, int],
+              occupied: Dict[int, int]) -> bool:
+        """Choose agent i's target cell, pushing unplanned agents out of the way."""
+        state = states[i]
+        here, d = state >> 2, state & 3
+        dist = self.dist[i]
+        moves = self.moves
+        # Pushed straight down a corridor, the pusher follows us cell by cell;
+        # stepping aside at the first junction lets it pass, so going on
+        # ahead is charged extra (turning first makes it look dearer otherwise)
+        ahead = -1
+        if parent >= 0:
+            pcell = states[parent] >> 2
+            push = next((dd for dd in range(4) if moves[(pcell << 2) + dd] == here), -1)
+            if push >= 0:
+                ahead = moves[(here << 2) + push]
+        # (cost-to-go via that cell, staying last among equals, random tie-break)
+        options = [(dist[state], 1, self.rng.random(), here)]
+        for dd in range(4):
+            cell = moves[(here << 2) + dd]
+            if cell >= 0:
+                turns = (dd - d) & 3
+                cost = (2 if turns == 2 else turns) + 1 + dist[(cell << 2) + dd]
+                options.append((cost + (SIDESTEP_BIAS if cell == ahead else 0), 0, self.rng.random(), cell))
+        options.sort()
+        for _, _, _, cell in options:
+            if cell in reserved:
+                continue
+            if parent >= 0 and cell == states[parent] >> 2:
+                continue # Would swap with the agent pushing us
+            k = occupied.get(cell)
+            if k is not None and k != i and target[k] == here:
+                continue # Would swap with an agent already heading here
+            reserved[cell] = i
+            target[i] = cell
+            if k is not None and k != i and target[k] < 0 and not self._pibt(k, i, states, target, reserved, occupied):
+                continue # k could not make room; it now holds `cell` itself
+            return True
+        # Stuck: stay put. Only the agent pushing us may have claimed our cell.
+        if reserved.get(here, i) not in (i, parent):
+            self._valid = False
+        reserved[here] = i
+        target[i] = here
+        return False
+
+    # --- Drivers ---
+
+    def _rollout(self, states) -> Optional[List[Tuple[int, ...]]]:
+        """Plain PIBT: follow one rollout until everyone is home or max_steps."""
+        chain = [tuple(states)]
+        priorities = self._initial_priorities(len(states))
+        try:
+            for _ in range(self.max_steps):
+                if self._at_goals(chain[-1]):
+                    self.status = "Solved"
+                    return chain
+                priorities = self._next_priorities(priorities, chain[-1])
+                order = sorted(range(len(states)), key=lambda i: -priorities[i])
+                chain.append(tuple(self._step(chain[-1], order, {})))
+        except BudgetExhausted:
+            self.status = "Timeout"
+            return chain
+        self.status = "Solved" if self._at_goals(chain[-1]) else "Timeout"
+        return chain
+
+    def _lacam(self, states) -> Optional[List[Tuple[int, ...]]]:
+        root = _Config(tuple(states), None, self._next_priorities(self._initial_priorities(len(states)), states))
+        explored = {root.states: root}
+        open_list = [root]
+        best, best_h = root, self._cost_to_go(root.states)
+        self.stats.hl_generated = 1
+        try:
+            while open_list:
+                node = open_list[-1]
+                if self._at_goals(node.states):
+                    self.status = "Solved"
+                    return self._chain(node)
+                if not node.tree:
+                    open_list.pop() # Every successor tried
+                    continue
+                self.stats.hl_expanded += 1
+                constraint = node.tree.popleft()
+                if constraint.depth < len(node.states):
+                    # Lazily grow the constraint tree by one more agent
+                    i = node.order[constraint.depth]
+                    successors = self._successors(node.states[i])
+                    self.rng.shuffle(successors)
+                    node.tree.extend(_Constraint(constraint, i, s) for s in successors)
+                nxt = self._step(node.states, node.order, constraint.fixed())
+                if nxt is None:
+                    continue
+                key = tuple(nxt)
+                if key in explored:
+                    continue
+                child = _Config(key, node, self._next_priorities(node.priorities, key))
+                explored[key] = child
+                open_list.append(child)
+                self.stats.hl_generated += 1
+                self.stats.note_open(len(open_list))
+                h = self._cost_to_go(key)
+                if h < best_h:
+                    best, best_h = child, h
+        except BudgetExhausted:
+            self.status = "Timeout"
+            return self._chain(best)
+        self.status = "Failed" # Searched every configuration
+        return None
+
+    @staticmethod
+    def _chain(node: _Config) -> List[Tuple[int, ...]]:
+        chain = []
+        while node is not None:
+            chain.append(node.states)
+            node = node.parent
+        chain.reverse()
+        return chain
+
+    def _paths(self, chain: List[Tuple[int, ...]]) -> List[List[Tuple[int, int, int]]]:
+        width = self.grid.width
+        paths = []
+        for i in range(len(chain[0])):
+            column = [states[i] for states in chain]
+            # Parked from its last move on: agents stay on their last pose anyway
+            while len(column) > 1 and column[-1] == column[-2]:
+                column.pop()
+            paths.append([((s >> 2) % width, (s >> 2) // width, s & 3) for s in column])
+        return paths
@@ -1,12 +1,43 @@
 # backend/app/core/prioritized.py
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from typing import List, Tuple, Optional
-from .low_level import space_time_astar
-from .node import Constraint
+from .engines import get_low_level
+from .constraint_table import ReservationTable
+from .conflict import ConflictIndex
+from .heuristics import get_distance_table
+from .budget import SearchBudget, BudgetExhausted
+from .stats import SolverStats
 from ..utils.grid import Grid
 
 class PrioritizedPlanner:
-    def __init__(self, grid: Grid):
+    def __init__(self, grid: Grid, low_level: str = "astar", restarts: int = 0,
+                 deadline_s: Optional[float] = None, workers: Optional[int] = None, seed: int = 0,
+                 time_budget_ms: Optional[float] = None, node_budget: Optional[int] = None):
+        """
+        low_level: single-agent engine, "astar" (space-time A*) or "sipp".
+        restarts: extra priority orders to try besides the given one; they are
+        planned concurrently in a process pool and the best complete plan found
+        before `deadline_s` seconds wins. workers=0 plans them in this process
+        instead, one after another (for callers that already are pool workers).
+        time_budget_ms / node_budget: cooperative limits (per priority order).
+        Agents not planned when they run out stay at their start and status
+        becomes "Timeout".
+        Agents that find no path stay at their start too; status is then
+        "Partial" (the other paths are valid around them).
+        """
         self.grid = grid
+        self.low_level_name = low_level
+        self.low_level = get_low_level(low_level)
+        self.restarts = restarts
+        self.deadline_s = deadline_s
+        self.workers = workers
+        self.seed = seed
+        self.time_budget_ms = time_budget_ms
+        self.node_budget = node_budget
+        self.status = "Idle"
+        self.stats = SolverStats() # Low-level counters of this process only
 
     def solve(self, starts: List[Tuple[int, int, int]], goals: List[Tuple[int, int]]) -> List[List[Tuple[int, int, int]]]:
         """
@@ -15,49 +46,189 @@ class PrioritizedPlanner:
         Path 1 is planned avoiding Path 0.
         Path 2 is planned avoiding Path 0 and Path 1.
         """
-        paths = []
-        # We need a global table of "reserved cells" (time, x, y) -> boolean
-        reserved_table = set() 
-
-        for i in range(len(starts)):
-            # 1. Build Constraints from ALL previous paths
-            constraints = []
-            
-            # This is a simplified implementation. 
-            # In a full version, we'd optimize this lookup to not be O(N^2)
-            # But for 20-50 agents, this is fine.
-            for t, x, y in reserved_table:
-                # Vertex Constraint: Don't be at (x,y) at time t
-                constraints.append(Constraint(t, i, x, y, is_vertex=True))
-                
-                # We should also add edge constraints if we want to be perfect,
-                # but for a "Fast Mode" demo, vertex collision avoidance is usually enough.
-
-            # 2. Plan for current agent
+        starts = [tuple(s) if len(s) == 3 else (s[0], s[1], 0) for s in starts]
+        self.budget = SearchBudget(self.time_budget_ms, self.node_budget)
+        self.stats = SolverStats()
+        t0 = time.perf_counter()
+        if self.restarts <= 0:
+            paths, failures, timed_out = self.plan_in_order(starts, goals, list(range(len(starts))), self.budget)
+        else:
+            paths, failures, timed_out = self._solve_with_restarts(starts, goals)
+        self.stats.solve_time_s = time.perf_counter() - t0
+        self.status = "Timeout" if timed_out else "Partial" if failures else "Solved"
+        return paths
+
+    def plan_in_order(self, starts, goals, order: List[int],
+                      budget: Optional[SearchBudget] = None) -> Tuple[List[List[Tuple[int, int, int]]], int, bool]:
+        """
+        Plans agents in the given priority order.
+        Returns (paths, number of failed agents, whether the budget ran out).
+        """
+        if budget is None:
+            budget = SearchBudget(self.time_budget_ms, self.node_budget)
+        paths = [None] * len(starts)
+        failures = 0
+        timed_out = False
+        # One reservation table shared by every agent (vertices, swaps and
+        # parked goals). The low level queries it directly, so planning agent i
+        # costs nothing extra per reserved cell.
+        reserved_table = ReservationTable()
+
+        for i in order:
+            # 1. Plan for current agent against every reservation so far
             # We assume battery=100 for this mode
-            result = space_time_astar(
-                self.grid, 
-                starts[i], 
-                goals[i], 
-                constraints, 
-                i,
-                current_battery=100,
-                max_time=200 # Allow longer paths
-            )
+            result = None
+            if not timed_out:
+                try:
+                    with self.stats.low_level(budget):
+                        result = self.low_level(
+                            self.grid,
+                            starts[i],
+                            goals[i],
+                            [],
+                            i,
+                            current_battery=100,
+                            max_time=200, # Allow longer paths
+                            constraint_table=reserved_table,
+                            budget=budget
+                        )
+                    self.stats.note_path(result)
+                except BudgetExhausted:
+                    timed_out = True # Everyone from here on stays put
 
             if result:
-                paths.append(result.path)
-                # Reserve these cells for future agents
-                for t, (x, y, dir) in enumerate(result.path):
-                    reserved_table.add((t, x, y))
-                    # Also reserve the goal for a while after arrival to prevent collisions
-                    # (Simplified: reserve for 5 extra steps)
-                    if t == len(result.path) - 1:
-                         for wait_t in range(1, 10):
-                             reserved_table.add((t + wait_t, x, y))
+                paths[i] = result.path
             else:
                 # If no path found (e.g. boxed in), just stay put (fail safe)
-                # or return empty path
-                paths.append([(starts[i][0], starts[i][1], starts[i][2])])
-                
-        return paths
\ No newline at end of file
+                paths[i] = [(starts[i][0], starts[i][1], starts[i][2])]
+                failures += 1
+            # 2. Reserve these cells (and the parking spot) for future agents
+            reserved_table.reserve_path(paths[i])
+
+        return paths, failures, timed_out
+
+    def repair(self, starts, goals, previous: List[Optional[List[Tuple[int, int, int]]]],
+               window: Optional[int] = None) -> Tuple[List[List[Tuple[int, int, int]]], List[int]]:
+        """
+        Warm-started replanning for lifelong operation.
+        previous[i] is agent i's remaining path from the last plan (starting at
+        its current pose), or None if its goal changed or it left the plan.
+        Kept paths are checked in order and any that conflicts with an earlier
+        kept one is dropped; the dropped agents are then planned against
+        reservations of everyone else's committed paths.
+        window: conflicts and reservations only count up to this timestep.
+        An agent that finds no path waits where it is, as in plan_in_order,
+        and is tried again on the next tick.
+        Returns (paths, replanned agents); status is "Partial" if some of
+        them found no path and "Timeout" if the budget ran out first.
+        """
+        budget = SearchBudget(self.time_budget_ms, self.node_budget)
+        index = ConflictIndex()
+        replan = []
+        for i, path in enumerate(previous):
+            if path is None or index.conflicts_for(i, path, window):
+                replan.append(i)
+            else:
+                index.add_path(i, path)
+
+        reserved_table = ReservationTable()
+        for path in index.paths.values():
+            reserved_table.reserve_path(path, window)
+
+        paths = list(previous)
+        failed = timed_out = False
+        for i in replan:
+            result = None
+            if not timed_out:
+                try:
+                    with self.stats.low_level(budget):
+                        result = self.low_level(self.grid, starts[i], goals[i], [], i,
+                                                current_battery=100, max_time=200,
+                                                constraint_table=reserved_table,
+                                                budget=budget, window=window)
+                    self.stats.note_path(result)
+                except BudgetExhausted:
+                    timed_out = True # Everyone from here on stays put
+            # No path (or out of budget): stay put (fail safe)
+            paths[i] = result.path if result else [tuple(starts[i])]
+            failed = failed or not result
+            reserved_table.reserve_path(paths[i], window)
+        self.status = "Timeout" if timed_out else "Partial" if failed else "Solved"
+        return paths, replan
+
+    def priority_orders(self, starts, goals) -> List[List[int]]:
+        """The given order, two distance-based heuristic orders, then random shuffles."""
+        n = len(starts)
+        identity = list(range(n))
+        dist = [get_distance_table(self.grid, goals[i]).get(*starts[i]) for i in identity]
+        orders = [
+            identity,
+            sorted(identity, key=lambda i: -dist[i]), # Longest trip first
+            sorted(identity, key=lambda i: dist[i]),  # Shortest trip first (clears goals early)
+        ]
+        rng = random.Random(self.seed)
+        while len(orders) < self.restarts + 1:
+            shuffled = identity[:]
+            rng.shuffle(shuffled)
+            orders.append(shuffled)
+        return orders[:self.restarts + 1]
+
+    def _solve_with_restarts(self, starts, goals):
+        orders = self.priority_orders(starts, goals)
+        budget = self.budget
+        deadline_s = self.deadline_s
+        if budget.deadline is not None:
+            deadline_s = min(deadline_s or float('inf'), self.time_budget_ms / 1000.0)
+        deadline = time.monotonic() + deadline_s if deadline_s else None
+        best = None # (failures, sum of costs, paths, timed out)
+
+        def consider(paths, failures, timed_out):
+            nonlocal best
+            candidate = (failures, sum(len(p) - 1 for p in paths), paths, timed_out)
+            if best is None or candidate[:2] < best[:2]:
+                best = candidate
+
+        if self.workers == 0:
+            result = self.plan_in_order(starts, goals, orders[0], budget)
+            consider(*result)
+            for order in orders[1:]:
+                if result[2] or (deadline is not None and time.monotonic() >= deadline):
+                    break # Budget or deadline hit
+                # Orders after the first stop at the deadline too
+                limit_ms = None if deadline is None else (deadline - time.monotonic()) * 1000.0
+                result = self.plan_in_order(starts, goals, order, SearchBudget(limit_ms, self.node_budget))
+                consider(*result)
+            return best[2], best[0], best[3]
+
+        # Orders in the pool stop at the deadline themselves: shutting the pool
+        # down below only drops the ones that have not started yet
+        until = min((t for t in (deadline, budget.deadline) if t is not None), default=None)
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            # The given order runs here, so there is always an answer by the deadline
+            pending = {pool.submit(_plan_order, self.grid, self.low_level_name, starts, goals, order,
+                                   until, self.node_budget)
+                       for order in orders[1:]}
+            consider(*self.plan_in_order(starts, goals, orders[0], budget))
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break # Deadline hit
+                for future in done:
+                    consider(*future.result())
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return best[2], best[0], best[3]
+
+def _plan_order(grid: Grid, low_level: str, starts, goals, order, until=None, node_budget=None):
+    """
+    Process-pool entry point for one priority order. `until` is a
+    time.monotonic() deadline (the clock is system-wide, so it holds in
+    the worker too), counted from submission rather than from when the
+    order got a worker.
+    """
+    time_budget_ms = None if until is None else max(0.0, until - time.monotonic()) * 1000.0
+    planner = PrioritizedPlanner(grid, low_level, time_budget_ms=time_budget_ms, node_budget=node_budget)
+    return planner.plan_in_order(starts, goals, order)
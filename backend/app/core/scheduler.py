@@ -1,6 +1,10 @@
 # backend/app/core/scheduler.py
-from typing import List, Tuple, Dict
+from collections import deque
+from typing import List, Tuple, Dict, Optional
 import random
+from .assignment import hungarian, SpatialIndex
+from .heuristics import get_distance_table, UNREACHABLE
+from ..utils.grid import Grid
 
 # Enum for Lifecycle
 TASK_IDLE = "IDLE"
@@ -22,31 +26,172 @@ class RobotState:
         self.current_goal = None # (x, y)
         self.held_item = None # ID of shelf/pod
 
+# Orders considered per idle robot in one batch assignment
+ORDER_LOOKAHEAD = 2
+# Shelves priced per idle robot: its nearest ones by Manhattan distance
+ASSIGN_CANDIDATES = 4
+# Larger batches are matched greedily, the Hungarian method being O(n^2 m)
+HUNGARIAN_MAX_ROBOTS = 50
+
 class WarehouseManager:
-    def __init__(self, width, height, shelves: List[Tuple[int, int]], stations: List[Tuple[int, int]], chargers: List[Tuple[int, int]]):
+    def __init__(self, width, height, shelves: List[Tuple[int, int]], stations: List[Tuple[int, int]], chargers: List[Tuple[int, int]],
+                 grid: Optional[Grid] = None):
+        """
+        grid: layout used to rank shelves by true driving distance (rotations
+        included) in batch assignment; without it Manhattan distance is used.
+        """
         self.width = width
         self.height = height
         self.shelves = shelves   # Locations of pods
         self.stations = stations # Packing stations
         self.chargers = chargers # Charging pads
+        self.grid = grid
         self.robots: Dict[int, RobotState] = {}
+        # Nearest-station / nearest-charger queries without scanning them all
+        self.station_index = SpatialIndex(stations, width, height)
+        self.charger_index = SpatialIndex(chargers, width, height)
+        # Open pick orders (shelf cells), oldest first
+        self.orders = deque()
+        # Last joint plan, the goals it was made for and ticks executed since
+        self.plan: Optional[List[List[Tuple[int, int, int]]]] = None
+        self.plan_goals: List[Tuple[int, int]] = []
+        self.plan_age = 0
+
+    def store_plan(self, paths: List[List[Tuple[int, int, int]]], goals: Optional[List[Tuple[int, int]]] = None) -> None:
+        self.plan = paths
+        if goals is not None:
+            self.plan_goals = [tuple(g) for g in goals]
+        self.plan_age = 0
+
+    def _remaining(self, i: int, pose: Tuple[int, int, int], age: int) -> Optional[List[Tuple[int, int, int]]]:
+        """Robot i's stored path from `age` on, if the robot is where it should be by then."""
+        if self.plan is None or i >= len(self.plan):
+            return None
+        path = self.plan[i]
+        rest = path[min(age, len(path) - 1):]
+        return rest if tuple(rest[0]) == tuple(pose) else None
+
+    def carry_over(self, poses: List[Tuple[int, int, int]], goals: List[Tuple[int, int]]) -> List[Optional[List[Tuple[int, int, int]]]]:
+        """
+        Warm start for the next replan: per robot, the rest of its stored path,
+        or None if its goal changed or it is not where the plan put it.
+        """
+        age = self.plan_age + 1
+        previous = []
+        for i, (pose, goal) in enumerate(zip(poses, goals)):
+            same_goal = i < len(self.plan_goals) and self.plan_goals[i] == tuple(goal)
+            rest = self._remaining(i, pose, age) if same_goal else None
+            if rest is not None and tuple(rest[-1][:2]) != tuple(goal):
+                rest = None # Robot was left waiting last time: give it another try
+            previous.append(rest)
+        return previous
+
+    def advance_plan(self, poses: List[Tuple[int, int, int]], replan_period: int) -> Optional[List[List[Tuple[int, int, int]]]]:
+        """
+        The stored plan moved on by one tick, or None when it is time to replan:
+        the period is up, or some robot is not where the plan put it.
+        """
+        if self.plan is None or len(self.plan) != len(poses):
+            return None
+        age = self.plan_age + 1
+        if age >= replan_period:
+            return None
+        remaining = [self._remaining(i, pose, age) for i, pose in enumerate(poses)]
+        if any(rest is None for rest in remaining):
+            return None
+        self.plan_age = age
+        return remaining
+
+    def _next_orders(self, count: int) -> List[Tuple[int, int]]:
+        """The `count` oldest open orders; new ones arrive at random shelves."""
+        while len(self.orders) < count:
+            self.orders.append(random.choice(self.shelves))
+        return [self.orders[k] for k in range(count)]
+
+    def travel_cost(self, robot: RobotState, target: Tuple[int, int]) -> int:
+        if self.grid is None:
+            return abs(target[0] - robot.x) + abs(target[1] - robot.y)
+        cost = get_distance_table(self.grid, target).get(robot.x, robot.y, robot.direction)
+        return cost if cost != UNREACHABLE else self.grid.width * self.grid.height * 4
+
+    def assign_idle(self) -> Dict[int, Tuple[int, int]]:
+        """
+        Batch pass: all idle robots get a shelf in one go, matched to the
+        oldest open orders by minimum total travel cost (Hungarian method)
+        instead of one random shelf per robot. Only each robot's
+        ASSIGN_CANDIDATES nearest shelves are priced; above
+        HUNGARIAN_MAX_ROBOTS robots the cheapest pairs are taken greedily.
+        Returns {robot_id: shelf} for the robots assigned.
+        """
+        idle = [r for r in self.robots.values()
+                if r.task_state == TASK_IDLE and r.battery >= 20]
+        if not idle or not self.shelves:
+            return {}
+        orders = self._next_orders(len(idle) * ORDER_LOOKAHEAD)
+        slots: Dict[Tuple[int, int], List[int]] = {} # Shelf -> its orders, oldest first
+        for k, shelf in enumerate(orders):
+            slots.setdefault(shelf, []).append(k)
+        index = SpatialIndex(slots, self.width, self.height)
+        near: Dict[Tuple[int, int], List[int]] = {}
+        for i, robot in enumerate(idle):
+            for shelf in index.k_nearest(robot.x, robot.y, ASSIGN_CANDIDATES):
+                near.setdefault(shelf, []).append(i)
+        # Shelf by shelf, so each distance table is fetched once
+        prices = {(i, shelf): self.travel_cost(idle[i], shelf) for shelf, robots in near.items() for i in robots}
+        if len(idle) <= HUNGARIAN_MAX_ROBOTS:
+            far = self.width * self.height * 4 # Shelves a robot was not priced for come after all it was
+            cost = [[prices.get((i, shelf), far + abs(shelf[0] - r.x) + abs(shelf[1] - r.y)) for shelf in orders]
+                    for i, r in enumerate(idle)]
+            columns = hungarian(cost)
+        else:
+            columns = self._greedy(len(idle), slots, prices)
+        assigned = {}
+        for robot, col in zip(idle, columns):
+            robot.task_state = TASK_TO_SHELF
+            robot.current_goal = orders[col]
+            assigned[robot.id] = orders[col]
+        # Orders nobody took stay at the front of the queue
+        taken = set(columns)
+        for _ in orders:
+            self.orders.popleft()
+        self.orders.extendleft(reversed([o for k, o in enumerate(orders) if k not in taken]))
+        return assigned
+
+    @staticmethod
+    def _greedy(count: int, slots: Dict[Tuple[int, int], List[int]],
+                prices: Dict[Tuple[int, Tuple[int, int]], int]) -> List[int]:
+        """Cheapest priced pairs first; robots whose shelves all went take the oldest orders left."""
+        columns: List[Optional[int]] = [None] * count
+        free = {shelf: deque(ks) for shelf, ks in slots.items()}
+        for _, i, shelf in sorted((c, i, shelf) for (i, shelf), c in prices.items()):
+            if columns[i] is None and free[shelf]:
+                columns[i] = free[shelf].popleft()
+        rest = sorted(k for ks in free.values() for k in ks)
+        rest.reverse()
+        return [col if col is not None else rest.pop() for col in columns]
 
     def get_next_goal(self, robot_id: int) -> Tuple[int, int]:
         robot = self.robots[robot_id]
         
         # 1. CRITICAL BATTERY CHECK
-        if robot.battery < 20 and robot.task_state != TASK_CHARGING:
+        if robot.battery < 20 and robot.task_state not in (TASK_CHARGING, TASK_TO_CHARGE):
             robot.task_state = TASK_TO_CHARGE
             # Find nearest charger
-            nearest = min(self.chargers, key=lambda c: abs(c[0]-robot.x) + abs(c[1]-robot.y))
+            nearest = self.charger_index.nearest(robot.x, robot.y)
             robot.current_goal = nearest
             return nearest
 
+        # Still on the way: keep the goal, so the plan for it stays valid
+        if robot.task_state in (TASK_TO_SHELF, TASK_TO_PACK, TASK_TO_CHARGE) \
+                and robot.current_goal is not None and (robot.x, robot.y) != tuple(robot.current_goal):
+            return robot.current_goal
+
         # 2. State Machine
         if robot.task_state == TASK_IDLE:
-            # Assign new random shelf
+            # Take the oldest open order (assign_idle does this for everyone at once)
             robot.task_state = TASK_TO_SHELF
-            target = random.choice(self.shelves)
+            self._next_orders(1)
+            target = self.orders.popleft()
             robot.current_goal = target
             return target
             
@@ -54,7 +199,7 @@ class WarehouseManager:
             # Reached shelf? Transition to Pickup
             robot.task_state = TASK_TO_PACK
             # Find nearest packing station
-            target = min(self.stations, key=lambda s: abs(s[0]-robot.x) + abs(s[1]-robot.y))
+            target = self.station_index.nearest(robot.x, robot.y)
             robot.current_goal = target
             return target
 
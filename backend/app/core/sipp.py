@@ -0,0 +1,147 @@
+# backend/app/core/sipp.py
+import heapq
+from typing import List, Tuple, Optional
+from .node import Constraint, PathResult
+from .heuristics import get_distance_table, UNREACHABLE
+from .constraint_table import ConstraintTable, SAFE_FOREVER
+from .budget import SearchBudget
+from .low_level import complete_beyond_window
+from ..utils.grid import Grid
+
+class SIPPNode:
+    """
+    Search node of Safe Interval Path Planning: a (x, y, dir) pose inside
+    one safe interval of its cell, reached at the earliest possible time.
+    Waiting inside the interval is implicit, so long idle waits cost one
+    expansion instead of one per timestep.
+    """
+    __slots__ = ("time", "x", "y", "direction", "interval", "parent")
+
+    def __init__(self, time: int, x: int, y: int, direction: int, interval: int, parent=None):
+        self.time = time
+        self.x = x
+        self.y = y
+        self.direction = direction
+        self.interval = interval # Index into the cell's safe intervals
+        self.parent = parent
+
+def sipp_astar(grid: Grid,
+               start_pose: Tuple[int, int, int],
+               goal: Tuple[int, int],
+               constraints: List[Constraint],
+               agent_id: int,
+               current_battery: int,
+               min_battery: int = 10,
+               max_time: int = 300,
+               constraint_table: Optional[ConstraintTable] = None,
+               budget: Optional[SearchBudget] = None,
+               window: Optional[int] = None) -> Optional[PathResult]:
+    """
+    Drop-in replacement for low_level.space_time_astar: same constraints,
+    same rotate-then-move kinematics, same per-timestep PathResult
+    (including the rolling-horizon `window`).
+    """
+    if constraint_table is None:
+        constraint_table = ConstraintTable(constraints, agent_id)
+    constrained = constraint_table.is_constrained
+    goal = tuple(goal)
+    h_fn = get_distance_table(grid, goal).get
+    if constraint_table.latest_constraint_at(goal[0], goal[1]) >= max_time:
+        return None # The goal never frees up within the horizon
+    # Nothing may be expanded at or after this time (horizon / flat battery)
+    limit = min(max_time, current_battery)
+
+    intervals_cache = {}
+    def intervals(x, y):
+        if (x, y) not in intervals_cache:
+            intervals_cache[(x, y)] = constraint_table.safe_intervals(x, y)
+        return intervals_cache[(x, y)]
+
+    start_x, start_y, start_dir = start_pose
+    start_h = h_fn(start_x, start_y, start_dir)
+    if start_h == UNREACHABLE:
+        return None
+    start_intervals = intervals(start_x, start_y)
+    if not start_intervals or start_intervals[0][0] > 0:
+        return None # The start cell itself is taken at t=0
+
+    counter = 0
+    open_list = [(start_h, 0, counter, SIPPNode(0, start_x, start_y, start_dir, 0))]
+    best_time = {} # Earliest known arrival per (x, y, dir, interval)
+    closed_set = set()
+    expansions = 0
+    peak_open = 1
+
+    while open_list:
+        peak_open = max(peak_open, len(open_list))
+        _, _, _, curr = heapq.heappop(open_list)
+
+        state_key = (curr.x, curr.y, curr.direction, curr.interval)
+        if state_key in closed_set:
+            continue
+        closed_set.add(state_key)
+        expansions += 1
+        if budget is not None:
+            budget.charge()
+
+        cell_intervals = intervals(curr.x, curr.y)
+        interval_end = cell_intervals[curr.interval][1]
+
+        # --- Goal Check: only an open-ended interval lets the robot stay for good ---
+        if (curr.x, curr.y) == goal and interval_end == SAFE_FOREVER:
+            return reconstruct_sipp_path(curr, expansions, peak_open)
+
+        if window is not None and curr.time >= window:
+            return complete_beyond_window(grid, reconstruct_sipp_path(curr, expansions, peak_open), goal)
+
+        if curr.time >= limit:
+            continue
+
+        successors = []
+
+        # 1. ROTATE Left / Right: one step later, same cell and interval
+        if curr.time + 1 <= interval_end:
+            for new_dir in ((curr.direction - 1) % 4, (curr.direction + 1) % 4):
+                successors.append(SIPPNode(curr.time + 1, curr.x, curr.y, new_dir, curr.interval, curr))
+
+        # 2. MOVE FORWARD into every reachable safe interval of the next cell,
+        #    waiting here as long as needed (but no longer than our interval allows)
+        nidx = grid.moves[(curr.y * grid.width + curr.x) * 4 + curr.direction]
+        nx, ny = nidx % grid.width, nidx // grid.width
+        if nidx >= 0 and h_fn(nx, ny, curr.direction) != UNREACHABLE:
+            latest_arrival = min(interval_end + 1, limit)
+            for idx, (lo, hi) in enumerate(intervals(nx, ny)):
+                if lo > latest_arrival:
+                    break
+                arrival = max(curr.time + 1, lo)
+                # Edge constraints may forbid particular departure times
+                while arrival <= min(hi, latest_arrival) and constrained(curr.x, curr.y, nx, ny, arrival):
+                    arrival += 1
+                if arrival <= min(hi, latest_arrival):
+                    successors.append(SIPPNode(arrival, nx, ny, curr.direction, idx, curr))
+
+        for child in successors:
+            child_key = (child.x, child.y, child.direction, child.interval)
+            if child_key in closed_set or best_time.get(child_key, SAFE_FOREVER) <= child.time:
+                continue
+            best_time[child_key] = child.time
+            counter += 1
+            f = child.time + h_fn(child.x, child.y, child.direction)
+            heapq.heappush(open_list, (f, -child.time, counter, child))
+
+    return None
+
+def reconstruct_sipp_path(node: SIPPNode, expansions: int = 0, peak_open: int = 0) -> PathResult:
+    """Expands interval hops back into one (x, y, dir) pose per timestep."""
+    path = []
+    curr = node
+    while curr.parent is not None:
+        parent = curr.parent
+        path.append((curr.x, curr.y, curr.direction))
+        # Implicit waits at the parent pose before this transition
+        for _ in range(curr.time - parent.time - 1):
+            path.append((parent.x, parent.y, parent.direction))
+        curr = parent
+    path.append((curr.x, curr.y, curr.direction))
+    path.reverse()
+    return PathResult(path=path, cost=node.time, expansions=expansions, lower_bound=node.time, peak_open=peak_open)
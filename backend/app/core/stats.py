@@ -0,0 +1,68 @@
+# backend/app/core/stats.py
+import cProfile
+import pstats
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+from .budget import SearchBudget
+
+class SolverStats:
+    """
+    Counters and timers filled in by one solve call.
+    Low-level expansions are read off the shared SearchBudget, which every
+    search charges per expansion, so failed and interrupted searches count too.
+    """
+    def __init__(self):
+        self.hl_generated = 0   # CT nodes created (root included)
+        self.hl_expanded = 0    # CT nodes popped and branched on
+        self.hl_peak_open = 0
+        self.ll_calls = 0       # Low-level searches actually run (cache hits excluded)
+        self.ll_expansions = 0
+        self.ll_reused = 0      # Expansions incremental searches took over instead of redoing
+        self.ll_peak_open = 0
+        self.conflict_time_s = 0.0
+        self.solve_time_s = 0.0
+
+    @contextmanager
+    def low_level(self, budget: SearchBudget):
+        before = budget.nodes
+        try:
+            yield
+        finally:
+            self.ll_calls += 1
+            self.ll_expansions += budget.nodes - before
+
+    @contextmanager
+    def conflict_timer(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.conflict_time_s += time.perf_counter() - t0
+
+    def note_path(self, result) -> None:
+        if result is not None and result.peak_open > self.ll_peak_open:
+            self.ll_peak_open = result.peak_open
+
+    def note_open(self, size: int) -> None:
+        if size > self.hl_peak_open:
+            self.hl_peak_open = size
+
+    def as_dict(self) -> Dict[str, Any]:
+        stats = dict(vars(self))
+        stats["conflict_time_s"] = round(self.conflict_time_s, 6)
+        stats["solve_time_s"] = round(self.solve_time_s, 6)
+        return stats
+
+def profile_summary(profiler: cProfile.Profile, limit: int = 20) -> List[Dict[str, Any]]:
+    """Top `limit` functions of a finished profile by cumulative time."""
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in pstats.Stats(profiler).stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({name})",
+            "calls": calls,
+            "tottime_s": round(tottime, 6),
+            "cumtime_s": round(cumtime, 6),
+        })
+    rows.sort(key=lambda r: r["cumtime_s"], reverse=True)
+    return rows[:limit]
@@ -2,6 +2,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .api import routes
+from .api.jobs import JOBS
 
 app = FastAPI(title="Autonomous Logistics MAPF API")
 
@@ -21,6 +22,10 @@ app.add_middleware(
 
 app.include_router(routes.router, prefix="/api/v1")
 
+@app.on_event("shutdown")
+def stop_workers():
+    JOBS.shutdown()
+
 @app.get("/")
 def read_root():
     return {"message": "MAPF Solver is ready. Send POST to /api/v1/solve"}
\ No newline at end of file
@@ -1,24 +1,100 @@
 # backend/app/utils/grid.py
-from typing import List, Tuple
+import hashlib
+from array import array
+from typing import Iterable, List, Optional, Set, Tuple
+
+# Same direction order as core.node.DELTAS (0:E, 1:S, 2:W, 3:N)
+_DELTAS = ((1, 0), (0, 1), (-1, 0), (0, -1))
 
 class Grid:
-    def __init__(self, width: int, height: int, obstacles: List[Tuple[int, int]] = None):
+    """
+    Static warehouse layout.
+    Occupancy is one byte per cell in a flat bytearray indexed by
+    y * width + x (1 = shelf / wall), so a 200x200 map is 40 KB instead of
+    a set of tuples. `moves` precomputes where driving forward from each
+    (cell, dir) leads, which is all the low level ever asks of the map.
+    """
+    def __init__(self, width: int, height: int, obstacles: Iterable[Tuple[int, int]] = None,
+                 occupancy: Optional[bytes] = None):
         self.width = width
         self.height = height
-        # Obstacles is a set of (x, y) tuples for O(1) lookup
-        self.obstacles = set(obstacles) if obstacles else set()
+        if occupancy is not None:
+            if len(occupancy) != width * height:
+                raise ValueError("Occupancy must have width * height cells")
+            self.occupancy = bytearray(occupancy)
+        else:
+            self.occupancy = bytearray(width * height)
+        for x, y in obstacles or ():
+            if self.in_bounds(x, y): # Obstacles off the map are meaningless
+                self.occupancy[y * width + x] = 1
+        self._fingerprint = None
+        self._moves = None
+
+    # Derived tables are rebuilt on demand instead of being pickled to workers
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_moves"] = None
+        return state
+
+    @property
+    def obstacles(self) -> Set[Tuple[int, int]]:
+        """Blocked cells as (x, y) tuples (built on demand, prefer is_blocked)."""
+        w = self.width
+        return {(i % w, i // w) for i, blocked in enumerate(self.occupancy) if blocked}
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable hash of the layout, used to key per-map caches."""
+        if self._fingerprint is None:
+            h = hashlib.sha1(f"{self.width}x{self.height}".encode())
+            h.update(self.occupancy)
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    @property
+    def moves(self) -> array:
+        """
+        Flat table indexed by (y * width + x) * 4 + dir holding the cell index
+        reached by moving forward, or -1 if that leaves the map or hits an obstacle.
+        """
+        if self._moves is None:
+            w, h, occ = self.width, self.height, self.occupancy
+            moves = array('i', [-1]) * (w * h * 4)
+            for y in range(h):
+                for x in range(w):
+                    base = (y * w + x) * 4
+                    for d, (dx, dy) in enumerate(_DELTAS):
+                        nx, ny = x + dx, y + dy
+                        if 0 <= nx < w and 0 <= ny < h and not occ[ny * w + nx]:
+                            moves[base + d] = ny * w + nx
+            self._moves = moves
+        return self._moves
+
+    def forward(self, x: int, y: int, direction: int) -> Optional[Tuple[int, int]]:
+        """Cell reached by driving forward from (x, y) facing `direction`, or None."""
+        idx = self.moves[(y * self.width + x) * 4 + direction]
+        if idx < 0:
+            return None
+        return idx % self.width, idx // self.width
+
+    @property
+    def num_obstacles(self) -> int:
+        return sum(self.occupancy)
 
     def in_bounds(self, x: int, y: int) -> bool:
         return 0 <= x < self.width and 0 <= y < self.height
 
     def is_blocked(self, x: int, y: int) -> bool:
-        return (x, y) in self.obstacles
-    
+        # Off-map cells count as blocked
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return True
+        return self.occupancy[y * self.width + x] == 1
+
     def get_neighbors(self, x: int, y: int) -> List[Tuple[int, int]]:
         """Returns valid static neighbors (Up, Down, Left, Right, Wait)."""
         moves = [(0, 1), (0, -1), (1, 0), (-1, 0), (0, 0)] # (0,0) is 'Wait'
         neighbors = []
-        
+
         for dx, dy in moves:
             nx, ny = x + dx, y + dy
             if self.in_bounds(nx, ny) and not self.is_blocked(nx, ny):
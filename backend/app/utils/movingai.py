@@ -0,0 +1,66 @@
+# backend/app/utils/movingai.py
+"""
+Readers for the MovingAI MAPF benchmark formats
+(https://movingai.com/benchmarks/mapf.html).
+
+A .map file has a 4-line header (type, height, width, "map") followed by
+one row per line: '.', 'G' and 'S' are passable, everything else ('@',
+'O', 'T', 'W') is blocked. A .scen file starts with "version 1" and has
+one agent per line: bucket, map file, map width, map height, start x,
+start y, goal x, goal y, optimal length. x is the column, y the row.
+"""
+import os
+from dataclasses import dataclass
+from typing import List, Tuple
+from .grid import Grid
+
+PASSABLE = frozenset(".GS")
+
+@dataclass(frozen=True)
+class ScenarioEntry:
+    bucket: int
+    map_name: str
+    start: Tuple[int, int]
+    goal: Tuple[int, int]
+    optimal_length: float
+
+def parse_map(text: str) -> Grid:
+    lines = text.splitlines()
+    header = {}
+    row = 0
+    while row < len(lines) and lines[row].strip() != "map":
+        parts = lines[row].split()
+        if len(parts) == 2:
+            header[parts[0]] = parts[1]
+        row += 1
+    if row == len(lines) or "width" not in header or "height" not in header:
+        raise ValueError("Not a MovingAI map: missing width/height header")
+    width, height = int(header["width"]), int(header["height"])
+    rows = lines[row + 1:row + 1 + height]
+    if len(rows) != height or any(len(r.rstrip("\r")) < width for r in rows):
+        raise ValueError(f"Map body does not match its {width}x{height} header")
+    occupancy = bytearray(width * height)
+    for y, line in enumerate(rows):
+        for x in range(width):
+            if line[x] not in PASSABLE:
+                occupancy[y * width + x] = 1
+    return Grid(width, height, occupancy=occupancy)
+
+def load_map(path: str) -> Grid:
+    with open(path) as f:
+        return parse_map(f.read())
+
+def parse_scenario(text: str) -> List[ScenarioEntry]:
+    entries = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) != 9 or parts[0] == "version":
+            continue
+        bucket, map_name = int(parts[0]), os.path.basename(parts[1])
+        sx, sy, gx, gy = (int(p) for p in parts[4:8])
+        entries.append(ScenarioEntry(bucket, map_name, (sx, sy), (gx, gy), float(parts[8])))
+    return entries
+
+def load_scenario(path: str) -> List[ScenarioEntry]:
+    with open(path) as f:
+        return parse_scenario(f.read())
@@ -0,0 +1,67 @@
+# backend/benchmarks/bench_cbs_reasoning.py
+"""
+High-level nodes of optimal CBS on aisle-heavy warehouse maps (1-wide
+aisles between shelf racks), adding one technique at a time:
+
+  plain        branch on the earliest conflict
+  +prioritize  branch on cardinal / semi-cardinal conflicts first (MDDs)
+  +corridor    range constraints for head-on conflicts in aisles
+  +cg          cardinal conflict graph heuristic (the default)
+  +wdg         weighted dependency graph heuristic instead
+
+"expanded" is the mean over the instances every configuration solved;
+all of them are optimal, so their costs must agree.
+
+    cd backend && python -m benchmarks.bench_cbs_reasoning
+    cd backend && python -m benchmarks.bench_cbs_reasoning --agents 6 8 --instances 10
+"""
+import argparse
+import time
+from app.core.cache import PATH_CACHE
+from app.core.cbs import CBSSolver
+from app.core.heuristics import get_distance_table
+from .maps import warehouse_grid, random_instance
+
+CONFIGS = {
+    "plain": dict(heuristic="none", prioritize=False, corridor=False),
+    "+prioritize": dict(heuristic="none", corridor=False),
+    "+corridor": dict(heuristic="none"),
+    "+cg": dict(heuristic="cg"),
+    "+wdg": dict(heuristic="wdg"),
+}
+
+def run(agent_counts, instances: int, budget_ms: float, width: int = 17, height: int = 16):
+    grid = warehouse_grid(width, height, aisle=1)
+    print(f"{width}x{height} warehouse, 1-wide aisles, {budget_ms / 1000:.0f}s per solve")
+    for n in agent_counts:
+        results = {name: [] for name in CONFIGS}
+        for seed in range(instances):
+            starts, goals = random_instance(grid, n, seed)
+            for goal in goals:
+                get_distance_table(grid, goal) # Keep table builds out of the timings
+            for name, options in CONFIGS.items():
+                PATH_CACHE.clear() # No configuration reuses another's low-level searches
+                solver = CBSSolver(grid, time_budget_ms=budget_ms, **options)
+                t0 = time.perf_counter()
+                paths = solver.solve(starts, goals)
+                seconds = time.perf_counter() - t0
+                cost = sum(len(p) - 1 for p in paths) if solver.status == "Solved" else None
+                results[name].append((cost, solver.stats.hl_expanded, seconds))
+        solved_by_all = [i for i in range(instances) if all(results[name][i][0] is not None for name in CONFIGS)]
+        for i in solved_by_all:
+            assert len({results[name][i][0] for name in CONFIGS}) == 1, f"Costs disagree on instance {i}"
+        print(f"{n} agents ({len(solved_by_all)}/{instances} instances solved by all)")
+        for name, rows in results.items():
+            solved = sum(cost is not None for cost, _, _ in rows)
+            expanded = sum(rows[i][1] for i in solved_by_all) / max(1, len(solved_by_all))
+            seconds = sum(rows[i][2] for i in solved_by_all)
+            print(f"  {name:<12} solved={solved}/{instances}  expanded={expanded:9.1f}  "
+                  f"time={seconds:7.2f}s  total_time={sum(s for _, _, s in rows):7.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, nargs="+", default=[4, 6, 8, 10])
+    parser.add_argument("--instances", type=int, default=10)
+    parser.add_argument("--time-budget-ms", type=float, default=10000)
+    args = parser.parse_args()
+    run(args.agents, args.instances, args.time_budget_ms)
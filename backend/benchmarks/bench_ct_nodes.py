@@ -0,0 +1,68 @@
+# backend/benchmarks/bench_ct_nodes.py
+"""
+Memory and throughput of constraint-tree node creation on a 10-agent
+warehouse instance: the old deepcopy + constraint-list concatenation vs.
+CTNode's parent-linked constraints and shared paths.
+
+Children are grown from random open nodes with a synthetic constraint and
+a freshly copied path for the constrained agent (standing in for the
+low-level replan), so only the high-level bookkeeping is measured.
+
+    cd backend && python -m benchmarks.bench_ct_nodes
+"""
+import copy
+import random
+import time
+import tracemalloc
+from app.core.cbs import CTNode
+from app.core.low_level import space_time_astar
+from app.core.node import Constraint
+from .maps import warehouse_grid, random_instance
+
+class LegacyCTNode:
+    """CTNode as it was: full constraint list and deep-copied paths per node."""
+    def __init__(self, constraints, paths):
+        self.constraints = constraints
+        self.paths = paths
+        self.cost = sum(len(p) - 1 for p in paths)
+
+def legacy_child(node, constraint, path):
+    new_paths = copy.deepcopy(node.paths)
+    new_paths[constraint.agent_id] = path
+    return LegacyCTNode(node.constraints + [constraint], new_paths)
+
+def shared_child(node, constraint, path):
+    return node.child(constraint, path)
+
+def grow(root, make_child, num_nodes, num_agents, seed):
+    rng = random.Random(seed)
+    nodes = [root]
+    for t in range(num_nodes):
+        parent = nodes[rng.randrange(len(nodes))]
+        agent = rng.randrange(num_agents)
+        x, y, _ = parent.paths[agent][0]
+        constraint = Constraint(t, agent, x, y, is_vertex=True)
+        nodes.append(make_child(parent, constraint, list(parent.paths[agent])))
+    return nodes
+
+def run(num_agents: int = 10, num_nodes: int = 5000, seed: int = 0):
+    grid = warehouse_grid(30, 30)
+    starts, goals = random_instance(grid, num_agents, seed)
+    root_paths = [space_time_astar(grid, s, g, [], i, current_battery=100).path
+                  for i, (s, g) in enumerate(zip(starts, goals))]
+
+    variants = [
+        ("deepcopy", LegacyCTNode([], root_paths), legacy_child),
+        ("shared", CTNode(root_paths), shared_child),
+    ]
+    for name, root, make_child in variants:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        nodes = grow(root, make_child, num_nodes, num_agents, seed)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>9}: {len(nodes)} nodes, {len(nodes) / elapsed:,.0f} nodes/s, peak {peak / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    run()
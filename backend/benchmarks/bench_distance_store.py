@@ -0,0 +1,50 @@
+# backend/benchmarks/bench_distance_store.py
+"""
+Cold-start cost of the distance tables: building them in a fresh worker
+against looking them up in a compiled, memory-mapped distance store, and
+the low-level search time on top of each (mapped tables must not slow it).
+
+    cd backend && python -m benchmarks.bench_distance_store
+    cd backend && python -m benchmarks.bench_distance_store --size 60 --queries 200
+"""
+import argparse
+import os
+import tempfile
+import time
+from app.core.distance_store import compile_map, DistanceStore
+from app.core.heuristics import attach_distance_store, clear_distance_cache, detach_distance_store, get_distance_table
+from app.core.low_level import space_time_astar
+from .maps import warehouse_grid, random_instance
+
+def run(size: int, queries: int, seed: int = 0):
+    grid = warehouse_grid(size, size)
+    starts, goals = random_instance(grid, queries, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "layout.dist")
+        t0 = time.perf_counter()
+        count = compile_map(grid, path)
+        print(f"{size}x{size} warehouse: compiled {count} tables ({os.path.getsize(path) / 1e6:.1f} MB) "
+              f"in {time.perf_counter() - t0:.2f}s")
+        store = DistanceStore(path)
+        for name in ("built", "mapped"):
+            clear_distance_cache()
+            if name == "mapped":
+                attach_distance_store(store)
+            t0 = time.perf_counter()
+            for goal in goals:
+                get_distance_table(grid, goal)
+            tables = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for i, (start, goal) in enumerate(zip(starts, goals)):
+                space_time_astar(grid, start, goal, [], i, current_battery=size * size)
+            search = time.perf_counter() - t0
+            print(f"  {name:>6}: tables for {queries} goals {tables * 1000:8.1f}ms  search {search * 1000:7.1f}ms")
+        detach_distance_store(grid.fingerprint)
+        clear_distance_cache()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+    run(args.size, args.queries)
@@ -0,0 +1,36 @@
+# backend/benchmarks/bench_heuristics.py
+"""
+Low-level expansions with the Manhattan heuristic vs. the cached
+rotation-aware distance tables.
+
+    cd backend && python -m benchmarks.bench_heuristics
+"""
+import time
+from app.core.heuristics import get_distance_table
+from app.core.low_level import space_time_astar
+from .maps import warehouse_grid, random_instance
+
+def run(num_queries: int = 200, seed: int = 0):
+    grid = warehouse_grid(30, 30)
+    starts, goals = random_instance(grid, num_queries, seed)
+
+    # Table construction is a one-off per (map, goal); time it separately
+    t0 = time.perf_counter()
+    for goal in goals:
+        get_distance_table(grid, goal)
+    print(f"table build: {len(goals)} goals in {(time.perf_counter() - t0) * 1000:.1f}ms")
+
+    for heuristic in ("manhattan", "distance_table"):
+        expansions = 0
+        solved = 0
+        t0 = time.perf_counter()
+        for i, (start, goal) in enumerate(zip(starts, goals)):
+            res = space_time_astar(grid, start, goal, [], i, current_battery=100, heuristic=heuristic)
+            if res:
+                solved += 1
+                expansions += res.expansions
+        elapsed = time.perf_counter() - t0
+        print(f"{heuristic:>15}: solved={solved} expansions={expansions} time={elapsed * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    run()
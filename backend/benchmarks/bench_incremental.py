@@ -0,0 +1,55 @@
+# backend/benchmarks/bench_incremental.py
+"""
+Low-level work of CBS with and without incremental replanning, where a
+CT child's search continues its parent's instead of starting over.
+"saved/HL node" is the low-level expansions taken over from parent
+searches per CT node generated; both runs are optimal, so their costs
+must agree.
+
+    cd backend && python -m benchmarks.bench_incremental
+    cd backend && python -m benchmarks.bench_incremental --size 40 --agents 10 20
+"""
+import argparse
+import time
+from app.core.cache import PATH_CACHE
+from app.core.cbs import CBSSolver
+from app.core.heuristics import get_distance_table
+from .maps import warehouse_grid, random_instance
+
+def run(size: int, agent_counts, instances: int, budget_ms: float):
+    grid = warehouse_grid(size, size, aisle=1)
+    print(f"{size}x{size} warehouse, 1-wide aisles, {budget_ms / 1000:.0f}s per solve")
+    for n in agent_counts:
+        totals = {}
+        for seed in range(instances):
+            starts, goals = random_instance(grid, n, seed)
+            for goal in goals:
+                get_distance_table(grid, goal) # Keep table builds out of the timings
+            costs = set()
+            for incremental in (False, True):
+                PATH_CACHE.clear() # Cached paths run no search, so nothing to continue
+                solver = CBSSolver(grid, time_budget_ms=budget_ms, incremental=incremental)
+                t0 = time.perf_counter()
+                paths = solver.solve(starts, goals)
+                seconds = time.perf_counter() - t0
+                costs.add(sum(len(p) - 1 for p in paths) if solver.status == "Solved" else solver.status)
+                row = totals.setdefault(incremental, [0, 0, 0, 0, 0.0])
+                stats = solver.stats
+                for i, value in enumerate((solver.status == "Solved", stats.hl_generated, stats.ll_expansions,
+                                           stats.ll_reused, seconds)):
+                    row[i] += value
+            assert len(costs) == 1, f"Runs disagree on instance {seed}: {costs}"
+        print(f"{n} agents")
+        for incremental, (solved, generated, expansions, reused, seconds) in totals.items():
+            print(f"  {'incremental' if incremental else 'from scratch':<13} solved={solved}/{instances}  "
+                  f"ll_expansions={expansions:8d}  reused={reused:7d}  saved/HL node={reused / max(1, generated):6.1f}  "
+                  f"time={seconds:7.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=30)
+    parser.add_argument("--agents", type=int, nargs="+", default=[10, 15, 20])
+    parser.add_argument("--instances", type=int, default=6)
+    parser.add_argument("--time-budget-ms", type=float, default=10000)
+    args = parser.parse_args()
+    run(args.size, args.agents, args.instances, args.time_budget_ms)
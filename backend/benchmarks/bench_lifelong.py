@@ -0,0 +1,53 @@
+# backend/benchmarks/bench_lifelong.py
+"""
+Lifelong /step ticks: replanning the whole fleet every tick vs. warm-started
+repair (keep the previous joint plan, replan only robots with a new goal or
+a broken path around everyone else's committed paths).
+
+Robots move one step per tick along the current plan; a robot that reaches
+its goal draws a new random one.
+
+    cd backend && python -m benchmarks.bench_lifelong
+"""
+import random
+import time
+from app.core.prioritized import PrioritizedPlanner
+from app.core.heuristics import get_distance_table
+from app.core.scheduler import WarehouseManager
+from .maps import warehouse_grid, random_instance
+
+def simulate(grid, num_agents: int, ticks: int, warm: bool, seed: int = 1):
+    rng = random.Random(seed)
+    free = [(x, y) for x in range(grid.width) for y in range(grid.height) if not grid.is_blocked(x, y)]
+    poses, goals = random_instance(grid, num_agents, seed)
+    manager = WarehouseManager(grid.width, grid.height, [], [], [])
+    replanned, elapsed = 0, 0.0
+    for _ in range(ticks):
+        for i, pose in enumerate(poses):
+            if pose[:2] == tuple(goals[i]):
+                goals[i] = rng.choice(free)
+                get_distance_table(grid, goals[i]) # Keep table builds out of the timings
+        t0 = time.perf_counter()
+        planner = PrioritizedPlanner(grid, low_level="sipp")
+        if warm and manager.plan is not None:
+            paths, agents = planner.repair(poses, goals, manager.carry_over(poses, goals))
+            replanned += len(agents)
+        else:
+            paths = planner.solve(poses, goals)
+            replanned += num_agents
+        elapsed += time.perf_counter() - t0
+        manager.store_plan(paths, goals)
+        poses = [tuple(p[1]) if len(p) > 1 else tuple(p[0]) for p in paths]
+    return replanned / ticks, elapsed / ticks
+
+def run(ticks: int = 10):
+    grid = warehouse_grid(60, 60)
+    print(f"Lifelong ticks on a 60x60 warehouse ({ticks} ticks)")
+    for num_agents in (50, 100, 150):
+        for warm in (False, True):
+            per_tick, seconds = simulate(grid, num_agents, ticks, warm)
+            label = "warm" if warm else "cold"
+            print(f"  agents={num_agents:<4} {label}: {seconds * 1e3:8.1f}ms/tick  replanned/tick={per_tick:6.1f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,46 @@
+# backend/benchmarks/bench_lns.py
+"""
+Anytime LNS improvement of large-fleet plans: sum of costs (and conflicts,
+for Prioritized Planning's plans) over time, starting from PIBT/LaCAM and
+from Prioritized Planning on warehouse layouts with 2-wide aisles.
+
+    cd backend && python -m benchmarks.bench_lns
+    cd backend && python -m benchmarks.bench_lns --agents 500 --seconds 60 --workers 4
+"""
+import argparse
+import time
+from app.core.lns import LNSImprover
+from app.core.pibt import PIBTSolver
+from app.core.prioritized import PrioritizedPlanner
+from .bench_pibt import SIZES
+from .maps import warehouse_grid, random_instance
+
+INITIAL = {
+    "lacam": lambda grid: PIBTSolver(grid, time_budget_ms=60000),
+    "prioritized": lambda grid: PrioritizedPlanner(grid, low_level="sipp"),
+}
+
+def run(agent_counts, seconds: float, workers: int, seed: int = 1):
+    for n in agent_counts:
+        side = SIZES.get(n, int((n * 8) ** 0.5) + 2)
+        grid = warehouse_grid(side, side, aisle=2)
+        starts, goals = random_instance(grid, n, seed)
+        for name, make in INITIAL.items():
+            paths = make(grid).solve(starts, goals)
+            lns = LNSImprover(grid, starts, goals, paths, seed=seed)
+            print(f"{n} agents, {name} plan: sum_of_costs={lns.sum_of_costs} conflicts={lns.conflicts}")
+            t0 = time.perf_counter()
+            checkpoints = [seconds * f for f in (0.1, 0.25, 0.5)]
+            for _ in lns.improve(seconds, workers):
+                while checkpoints and time.perf_counter() - t0 >= checkpoints[0]:
+                    print(f"  {checkpoints.pop(0):6.1f}s  sum_of_costs={lns.sum_of_costs} conflicts={lns.conflicts}")
+            print(f"  {seconds:6.1f}s  sum_of_costs={lns.sum_of_costs} conflicts={lns.conflicts}  "
+                  f"iterations={lns.iterations} accepted={lns.accepted}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    run(args.agents, args.seconds, args.workers)
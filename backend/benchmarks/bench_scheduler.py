@@ -0,0 +1,43 @@
+# backend/benchmarks/bench_scheduler.py
+"""
+Scheduler costs on a 200x200 layout: nearest station / charger lookups
+(bucket index vs. linear scan) and one batch assignment of idle robots.
+
+    cd backend && python -m benchmarks.bench_scheduler
+"""
+import random
+import time
+from app.core.assignment import SpatialIndex
+from app.core.scheduler import WarehouseManager
+
+def run(seed: int = 1):
+    rng = random.Random(seed)
+    size = 200
+    stations = [(x, size - 1) for x in range(0, size, 2)] + [(0, y) for y in range(0, size, 4)]
+    robots = [(rng.randrange(size), rng.randrange(size)) for _ in range(5000)]
+
+    index = SpatialIndex(stations, size, size)
+    t0 = time.perf_counter()
+    for x, y in robots:
+        index.nearest(x, y)
+    indexed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for x, y in robots:
+        min(stations, key=lambda s: abs(s[0] - x) + abs(s[1] - y))
+    scanned = time.perf_counter() - t0
+    print(f"Nearest of {len(stations)} stations, {len(robots)} queries")
+    print(f"  bucket index: {indexed / len(robots) * 1e6:7.1f}us/query")
+    print(f"  linear scan:  {scanned / len(robots) * 1e6:7.1f}us/query")
+
+    shelves = [(x, y) for x in range(size) for y in range(2)]
+    print("Batch assignment (Manhattan costs)")
+    for idle in (10, 50, 100):
+        manager = WarehouseManager(size, size, shelves, stations, stations[:4])
+        for i in range(idle):
+            manager.update_robot(i, *robots[i], 0)
+        t0 = time.perf_counter()
+        manager.assign_idle()
+        print(f"  idle={idle:<4} {(time.perf_counter() - t0) * 1e3:8.2f}ms")
+
+if __name__ == "__main__":
+    run()
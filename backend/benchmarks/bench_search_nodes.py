@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_search_nodes.py
+"""
+Low-level expansions per second: the old object-per-state space-time A*
+(State instances with a Python __lt__, 4-tuple closed set) vs. the packed
+search (int state keys, (f, -t, key) heap tuples, bytearray parent marks).
+
+Each query gets a band of random vertex constraints along its route so the
+search has to wait and detour instead of walking straight to the goal.
+
+    cd backend && python -m benchmarks.bench_search_nodes
+"""
+import heapq
+import random
+import time
+from app.core.constraint_table import ConstraintTable
+from app.core.heuristics import get_distance_table, UNREACHABLE
+from app.core.low_level import State, space_time_astar, _successors, reconstruct_path
+from app.core.node import Constraint
+from .maps import warehouse_grid, random_instance
+
+def legacy_astar(grid, start_pose, goal, table: ConstraintTable, max_time: int = 300, battery: int = 100):
+    """The object-based search loop as it was."""
+    constrained = table.is_constrained
+    goal_free_after = table.latest_constraint_at(*goal)
+    h_fn = get_distance_table(grid, goal).get
+    start_h = h_fn(*start_pose)
+    if start_h == UNREACHABLE:
+        return None
+    open_list = [State(0, *start_pose, 0, start_h, battery=battery)]
+    closed_set = set()
+    expansions = 0
+    while open_list:
+        curr = heapq.heappop(open_list)
+        state_key = (curr.time, curr.x, curr.y, curr.direction)
+        if state_key in closed_set:
+            continue
+        closed_set.add(state_key)
+        expansions += 1
+        if (curr.x, curr.y) == goal and curr.time > goal_free_after:
+            return reconstruct_path(curr, expansions)
+        if curr.time >= max_time or curr.battery <= 0:
+            continue
+        for child in _successors(grid, curr, constrained, h_fn):
+            heapq.heappush(open_list, child)
+    return None
+
+def queries(grid, count: int, seed: int):
+    rng = random.Random(seed)
+    starts, goals = random_instance(grid, count, seed)
+    free = [(x, y) for x in range(grid.width) for y in range(grid.height) if not grid.is_blocked(x, y)]
+    for start, goal in zip(starts, goals):
+        constraints = [Constraint(rng.randint(1, 40), 0, *rng.choice(free), is_vertex=True) for _ in range(400)]
+        yield start, tuple(goal), ConstraintTable(constraints)
+
+def run(count: int = 200, seed: int = 1):
+    grid = warehouse_grid(60, 60)
+    cases = list(queries(grid, count, seed))
+    for _, goal, _ in cases:
+        get_distance_table(grid, goal) # Keep table builds out of the timings
+
+    results = {}
+    for name, search in (("legacy", lambda s, g, t: legacy_astar(grid, s, g, t)),
+                         ("packed", lambda s, g, t: space_time_astar(grid, s, g, [], 0, 100, constraint_table=t))):
+        t0 = time.perf_counter()
+        found = [search(start, goal, table) for start, goal, table in cases]
+        elapsed = time.perf_counter() - t0
+        expansions = sum(r.expansions for r in found if r)
+        results[name] = [r.cost if r else None for r in found]
+        print(f"  {name}: {elapsed * 1e3:8.1f}ms  expansions={expansions:<8} "
+              f"{expansions / elapsed / 1e3:8.1f}k expansions/s")
+    assert results["legacy"] == results["packed"], "Searches disagree on path costs"
+
+if __name__ == "__main__":
+    print("Space-time A*, 60x60 warehouse, 200 constrained queries")
+    run()
@@ -0,0 +1,174 @@
+# backend/benchmarks/harness.py
+"""
+Regression harness on MovingAI MAPF benchmarks read from local disk.
+
+Put the .map and .scen files of the families you care about in one
+directory (e.g. warehouse-10-20-10-2-1, random-32-32-20, maze-32-32-2 from
+https://movingai.com/benchmarks/mapf.html). Every .scen found is run with
+the first N agents for each N in --agents and each solver, and the results
+(success, runtime, sum of costs, expansions) go to a JSON report.
+
+    cd backend && python -m benchmarks.harness DIR --agents 5 10 20 --out report.json
+    cd backend && python -m benchmarks.harness DIR --out new.json --baseline report.json
+
+With --baseline, runs that lost success or got slower / costlier / more
+expansive than the tolerance allows are listed and the exit code is 1.
+A run succeeds when every agent reaches its goal with no conflicts.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+from app.core.cache import PATH_CACHE
+from app.core.cbs import CBSSolver
+from app.core.conflict import detect_all_conflicts
+from app.core.pibt import PIBTSolver
+from app.core.prioritized import PrioritizedPlanner
+from app.utils.movingai import load_map, load_scenario
+
+SOLVERS = {
+    "cbs": lambda grid, budget_ms: CBSSolver(grid, time_budget_ms=budget_ms),
+    "prioritized": lambda grid, budget_ms: PrioritizedPlanner(grid, time_budget_ms=budget_ms),
+    "prioritized-sipp": lambda grid, budget_ms: PrioritizedPlanner(grid, low_level="sipp", time_budget_ms=budget_ms),
+    "lacam": lambda grid, budget_ms: PIBTSolver(grid, time_budget_ms=budget_ms),
+}
+FAMILIES = ("warehouse", "random", "maze")
+# Runtimes below this are too noisy to call regressions
+MIN_RUNTIME_S = 0.05
+
+def family_of(map_name: str) -> str:
+    prefix = map_name.split("-")[0]
+    return prefix if prefix in FAMILIES else "other"
+
+def run_case(grid, entries, solver_name: str, budget_ms: Optional[float]) -> Dict:
+    starts = [(e.start[0], e.start[1], 0) for e in entries]
+    goals = [e.goal for e in entries]
+    PATH_CACHE.clear() # Every run starts cold
+    solver = SOLVERS[solver_name](grid, budget_ms)
+    t0 = time.perf_counter()
+    paths = solver.solve(starts, goals)
+    runtime = time.perf_counter() - t0
+    success = (solver.status == "Solved" and paths is not None
+               and all(tuple(p[-1][:2]) == tuple(g) for p, g in zip(paths, goals))
+               and not detect_all_conflicts(paths))
+    return {
+        "success": success,
+        "status": solver.status,
+        "runtime_s": round(runtime, 4),
+        "sum_of_costs": sum(len(p) - 1 for p in paths) if success else None,
+        "expansions": solver.budget.nodes,
+    }
+
+def run(directory: str, agent_counts: List[int], solvers: List[str], families: List[str],
+        budget_ms: Optional[float], scen_limit: Optional[int]) -> Dict:
+    results = []
+    maps = {}
+    scen_files = sorted(glob.glob(os.path.join(directory, "**", "*.scen"), recursive=True))
+    per_map = defaultdict(int)
+    for scen_path in scen_files:
+        entries = load_scenario(scen_path)
+        if not entries:
+            continue
+        map_name = entries[0].map_name
+        family = family_of(map_name)
+        if family not in families:
+            continue
+        if scen_limit is not None and per_map[map_name] >= scen_limit:
+            continue
+        per_map[map_name] += 1
+        if map_name not in maps:
+            found = glob.glob(os.path.join(directory, "**", map_name), recursive=True)
+            if not found:
+                print(f"skip {scen_path}: {map_name} not found", file=sys.stderr)
+                continue
+            maps[map_name] = load_map(found[0])
+        grid = maps[map_name]
+        for solver_name in solvers:
+            for n in agent_counts:
+                if n > len(entries):
+                    continue
+                record = {"map": map_name, "scen": os.path.basename(scen_path), "family": family,
+                          "solver": solver_name, "agents": n}
+                record.update(run_case(grid, entries[:n], solver_name, budget_ms))
+                print(f"{record['scen']:<40} {solver_name:<17} n={n:<4} "
+                      f"{'ok  ' if record['success'] else 'FAIL'} {record['runtime_s']:8.3f}s", file=sys.stderr)
+                results.append(record)
+    return {"meta": {"time_budget_ms": budget_ms, "agents": agent_counts, "solvers": solvers},
+            "summary": summarize(results), "results": results}
+
+def summarize(results: List[Dict]) -> List[Dict]:
+    groups = defaultdict(list)
+    for r in results:
+        groups[(r["family"], r["solver"], r["agents"])].append(r)
+    summary = []
+    for (family, solver, agents), runs in sorted(groups.items()):
+        solved = [r for r in runs if r["success"]]
+        summary.append({
+            "family": family, "solver": solver, "agents": agents, "runs": len(runs),
+            "success_rate": round(len(solved) / len(runs), 3),
+            "mean_runtime_s": round(sum(r["runtime_s"] for r in runs) / len(runs), 4),
+            "mean_sum_of_costs": round(sum(r["sum_of_costs"] for r in solved) / len(solved), 1) if solved else None,
+            "mean_expansions": round(sum(r["expansions"] for r in runs) / len(runs), 1),
+        })
+    return summary
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of `report` against `baseline` (same run keys only)."""
+    key = lambda r: (r["map"], r["scen"], r["solver"], r["agents"])
+    old = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in report["results"]:
+        b = old.get(key(r))
+        if b is None:
+            continue
+        name = "{} {} n={}".format(r["scen"], r["solver"], r["agents"])
+        if b["success"] and not r["success"]:
+            regressions.append(f"{name}: no longer solved ({r['status']})")
+            continue
+        if not (b["success"] and r["success"]):
+            continue
+        if r["runtime_s"] > max(b["runtime_s"], MIN_RUNTIME_S) * (1 + tolerance):
+            regressions.append(f"{name}: runtime {b['runtime_s']:.3f}s -> {r['runtime_s']:.3f}s")
+        if r["sum_of_costs"] > b["sum_of_costs"]:
+            regressions.append(f"{name}: sum of costs {b['sum_of_costs']} -> {r['sum_of_costs']}")
+        if r["expansions"] > b["expansions"] * (1 + tolerance):
+            regressions.append(f"{name}: expansions {b['expansions']} -> {r['expansions']}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Directory with MovingAI .map and .scen files")
+    parser.add_argument("--agents", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--solvers", nargs="+", choices=sorted(SOLVERS), default=["cbs", "prioritized"])
+    parser.add_argument("--families", nargs="+", default=list(FAMILIES) + ["other"])
+    parser.add_argument("--time-budget-ms", type=float, default=30000)
+    parser.add_argument("--scen-limit", type=int, default=None, help="Scenarios per map")
+    parser.add_argument("--out", default="benchmark_report.json")
+    parser.add_argument("--baseline", help="Earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    report = run(args.directory, args.agents, args.solvers, args.families,
+                 args.time_budget_ms, args.scen_limit)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    for row in report["summary"]:
+        print("{family:<10} {solver:<17} n={agents:<4} success={success_rate:5.2f} "
+              "runtime={mean_runtime_s:.3f}s".format(**row))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print("REGRESSION " + line)
+        if regressions:
+            return 1
+        print("No regressions against " + args.baseline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+# backend/benchmarks/maps.py
+import random
+from typing import List, Tuple
+from app.utils.grid import Grid
+
+def warehouse_obstacles(width: int, height: int, shelf_len: int = 4, aisle: int = 1) -> List[Tuple[int, int]]:
+    """
+    Shelf-dense layout: 1-wide shelf columns of `shelf_len` cells separated by
+    `aisle`-wide corridors, with an open border and cross aisles between blocks.
+    """
+    obstacles = []
+    for x in range(1, width - 1, aisle + 1):
+        for y in range(1, height - 1):
+            # Leave a cross aisle after every shelf block
+            if (y - 1) % (shelf_len + 1) != shelf_len:
+                obstacles.append((x, y))
+    return obstacles
+
+def warehouse_grid(width: int = 30, height: int = 30, **kwargs) -> Grid:
+    return Grid(width, height, warehouse_obstacles(width, height, **kwargs))
+
+def random_instance(grid: Grid, num_agents: int, seed: int = 0):
+    """Distinct random free start cells (facing East) and distinct free goals."""
+    rng = random.Random(seed)
+    free = [(x, y) for x in range(grid.width) for y in range(grid.height) if not grid.is_blocked(x, y)]
+    starts = rng.sample(free, num_agents)
+    goals = rng.sample(free, num_agents)
+    return [(x, y, rng.randrange(4)) for x, y in starts], goals
@@ -0,0 +1,74 @@
+import itertools
+import random
+import unittest
+from app.core.assignment import hungarian, SpatialIndex
+from app.core import scheduler
+from app.core.scheduler import WarehouseManager, TASK_TO_SHELF
+from app.utils.grid import Grid
+
+class TestAssignment(unittest.TestCase):
+
+    def test_hungarian_matches_brute_force(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            n, m = rng.randint(1, 4), rng.randint(4, 6)
+            cost = [[rng.randint(0, 20) for _ in range(m)] for _ in range(n)]
+            cols = hungarian(cost)
+            self.assertEqual(len(set(cols)), n)
+            best = min(sum(cost[i][c] for i, c in enumerate(perm))
+                       for perm in itertools.permutations(range(m), n))
+            self.assertEqual(sum(cost[i][c] for i, c in enumerate(cols)), best)
+
+    def test_spatial_index_nearest(self):
+        rng = random.Random(1)
+        points = list({(rng.randrange(100), rng.randrange(100)) for _ in range(40)})
+        index = SpatialIndex(points, 100, 100, bucket_size=8)
+        for _ in range(200):
+            x, y = rng.randrange(-10, 110), rng.randrange(-10, 110)
+            expected = min(abs(px - x) + abs(py - y) for px, py in points)
+            px, py = index.nearest(x, y)
+            self.assertEqual(abs(px - x) + abs(py - y), expected)
+
+    def test_spatial_index_k_nearest(self):
+        rng = random.Random(2)
+        points = list({(rng.randrange(60), rng.randrange(40)) for _ in range(50)})
+        index = SpatialIndex(points, 60, 40, bucket_size=8)
+        for _ in range(200):
+            x, y, k = rng.randrange(-5, 65), rng.randrange(-5, 45), rng.randint(1, 8)
+            expected = sorted(points, key=lambda p: (abs(p[0] - x) + abs(p[1] - y), p))[:k]
+            self.assertEqual(index.k_nearest(x, y, k), expected)
+        self.assertEqual(len(index.k_nearest(0, 0, 100)), len(points))
+
+    def test_batch_assignment_uses_true_distance(self):
+        # (0, 0) is 2 cells away as the crow flies but 8 steps around the
+        # wall; (3, 2) is 3 steps straight ahead
+        grid = Grid(width=5, height=3, obstacles=[(0, 1), (1, 1)])
+        manager = WarehouseManager(5, 3, [(0, 0)], [(4, 2)], [(0, 2)], grid=grid)
+        manager.update_robot(0, 0, 2, 0)
+        manager.update_robot(1, 4, 0, 2)
+        manager.orders.extend([(0, 0), (3, 2), (1, 0), (2, 0)])
+
+        assigned = manager.assign_idle()
+
+        self.assertEqual(assigned, {0: (3, 2), 1: (2, 0)})
+        self.assertEqual(manager.robots[0].task_state, TASK_TO_SHELF)
+        self.assertEqual(list(manager.orders), [(0, 0), (1, 0)]) # Untaken orders keep their place
+
+    def test_large_batches_assigned_greedily(self):
+        grid = Grid(width=6, height=1)
+        manager = WarehouseManager(6, 1, [(0, 0)], [(5, 0)], [(5, 0)], grid=grid)
+        for i, x in enumerate((0, 2, 4)):
+            manager.update_robot(i, x, 0, 0)
+        manager.orders.extend([(5, 0), (5, 0), (1, 0), (3, 0), (2, 0), (0, 0)])
+        limit = scheduler.HUNGARIAN_MAX_ROBOTS
+        scheduler.HUNGARIAN_MAX_ROBOTS = 2
+        try:
+            assigned = manager.assign_idle()
+        finally:
+            scheduler.HUNGARIAN_MAX_ROBOTS = limit
+        # Robots 0 and 1 stand on an order; robot 2 faces east, so (5, 0) is one step and (3, 0) three
+        self.assertEqual(assigned, {0: (0, 0), 1: (2, 0), 2: (5, 0)})
+        self.assertEqual(list(manager.orders), [(5, 0), (1, 0), (3, 0)])
+
+if __name__ == '__main__':
+    unittest.main()
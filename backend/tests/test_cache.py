@@ -0,0 +1,31 @@
+import unittest
+from app.utils.grid import Grid
+from app.core.cache import PATH_CACHE, canonical_hash
+from app.core.cbs import CBSSolver
+
+class TestCache(unittest.TestCase):
+
+    def test_canonical_hash_ignores_obstacle_order(self):
+        a = Grid(5, 5, [(1, 1), (2, 3)])
+        b = Grid(5, 5, [(2, 3), (1, 1), (2, 3)])
+        self.assertEqual(canonical_hash(a, [(0, 0)], [(4, 4)]), canonical_hash(b, [(0, 0, 0)], [(4, 4)]))
+        self.assertNotEqual(canonical_hash(a, [(0, 0)], [(4, 4)]), canonical_hash(a, [(0, 0)], [(4, 3)]))
+        self.assertNotEqual(canonical_hash(a, [(0, 0)], [(4, 4)], w=1.0), canonical_hash(a, [(0, 0)], [(4, 4)], w=2.0))
+        self.assertNotEqual(canonical_hash(a, [(0, 0)], [(4, 4)], window=None),
+                            canonical_hash(a, [(0, 0)], [(4, 4)], window=5))
+
+    def test_repeated_solve_hits_path_cache(self):
+        PATH_CACHE.clear()
+        grid = Grid(width=3, height=3)
+        starts, goals = [(0, 1), (2, 1)], [(2, 1), (0, 1)]
+
+        first = CBSSolver(grid).solve(starts, goals)
+        misses = PATH_CACHE.misses
+        second = CBSSolver(grid).solve(starts, goals)
+
+        self.assertEqual(first, second)
+        self.assertEqual(PATH_CACHE.misses, misses)
+        self.assertGreater(PATH_CACHE.hits, 0)
+
+if __name__ == '__main__':
+    unittest.main()
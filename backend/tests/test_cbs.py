@@ -1,7 +1,10 @@
 # backend/tests/test_cbs.py
 import unittest
 from app.utils.grid import Grid
+from app.core import cbs
 from app.core.cbs import CBSSolver
+from app.core.ecbs import ECBSSolver
+from app.core.cache import PATH_CACHE
 
 class TestCBS(unittest.TestCase):
     
@@ -62,5 +65,73 @@ class TestCBS(unittest.TestCase):
         is_valid, msg = self.validate_solution(paths)
         self.assertTrue(is_valid, msg)
 
+    def test_ecbs_within_suboptimality_bound(self):
+        print("\n--- Test 3: ECBS Bound ---")
+        grid = Grid(width=4, height=4, obstacles=[(1, 1), (2, 2)])
+        starts = [(0, 0), (3, 3), (0, 3), (3, 0)]
+        goals = [(3, 3), (0, 0), (3, 0), (0, 3)]
+
+        optimal = CBSSolver(grid).solve(starts, goals)
+        bounded = ECBSSolver(grid, w=1.5).solve(starts, goals)
+
+        self.assertIsNotNone(bounded, "Solver returned None")
+        is_valid, msg = self.validate_solution([[p[:2] for p in path] for path in bounded])
+        self.assertTrue(is_valid, msg)
+        cost = lambda paths: sum(len(p) - 1 for p in paths)
+        self.assertLessEqual(cost(bounded), 1.5 * cost(optimal))
+
+    def test_budget_returns_best_so_far(self):
+        print("\n--- Test 4: Node Budget ---")
+        grid = Grid(width=3, height=3)
+        solver = CBSSolver(grid, node_budget=2) # Below the two expansions the best search needs
+
+        paths = solver.solve([(0, 1), (2, 1)], [(2, 1), (0, 1)])
+
+        self.assertEqual(solver.status, "Timeout")
+        self.assertEqual(len(paths), 2)
+        self.assertEqual(paths[0][0], (0, 1, 0))
+
+    def test_windowed_resolves_near_conflicts_only(self):
+        print("\n--- Test 5: Rolling Horizon ---")
+        grid = Grid(width=3, height=3)
+        starts, goals = [(0, 1), (1, 0)], [(2, 1), (1, 2)]
+        solver = CBSSolver(grid, window=3)
+
+        paths = solver.solve(starts, goals)
+
+        self.assertEqual(solver.status, "Solved")
+        is_valid, msg = self.validate_solution([[p[:2] for p in path[:4]] for path in paths])
+        self.assertTrue(is_valid, msg)
+        self.assertEqual([p[-1][:2] for p in paths], goals)
+
+    def test_incremental_low_level(self):
+        print("\n--- Test 6: Incremental Replanning ---")
+        # Swapping ends of a corridor: one agent has to go round through the bottom rows
+        grid = Grid(width=7, height=4, obstacles=[(x, 1) for x in range(1, 6)])
+        starts, goals = [(0, 0, 0), (6, 0, 2)], [(6, 0), (0, 0)]
+        PATH_CACHE.clear() # Replans served from the cache run no search to continue
+        fresh = CBSSolver(grid, incremental=False)
+        expected = fresh.solve(starts, goals)
+        PATH_CACHE.clear()
+        solver = CBSSolver(grid, incremental=True)
+        paths = solver.solve(starts, goals)
+
+        self.assertEqual(solver.status, "Solved")
+        self.assertEqual(sum(len(p) for p in paths), sum(len(p) for p in expected))
+        self.assertGreater(solver.stats.ll_reused, 0)
+        self.assertEqual(fresh.stats.ll_reused, 0)
+        self.assertLess(solver.stats.ll_expansions, fresh.stats.ll_expansions)
+
+        # Kept trees stay within the byte limit, however many searches ran
+        limit, cbs.SEARCH_TREE_BYTES = cbs.SEARCH_TREE_BYTES, 200
+        try:
+            PATH_CACHE.clear()
+            bounded = CBSSolver(grid, incremental=True)
+            self.assertEqual(len(bounded.solve(starts, goals)), 2)
+        finally:
+            cbs.SEARCH_TREE_BYTES = limit
+        self.assertLessEqual(bounded._tree_bytes, 200)
+        self.assertEqual(bounded._tree_bytes, sum(t.nbytes for t in bounded._trees.values()))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
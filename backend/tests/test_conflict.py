@@ -0,0 +1,62 @@
+import random
+import unittest
+from app.core.conflict import ConflictIndex, detect_all_conflicts, detect_conflict
+
+def brute_force_pairs(paths):
+    """Colliding agent pairs by rescanning every timestep (agents park at their last cell)."""
+    pairs = set()
+    max_t = max(len(p) for p in paths) + 1
+    at = lambda p, t: p[min(t, len(p) - 1)][:2]
+    for t in range(max_t):
+        for i in range(len(paths)):
+            for j in range(i + 1, len(paths)):
+                if at(paths[i], t) == at(paths[j], t):
+                    pairs.add((i, j))
+                elif t > 0 and at(paths[i], t - 1) == at(paths[j], t) and at(paths[i], t) == at(paths[j], t - 1):
+                    pairs.add((i, j))
+    return pairs
+
+class TestConflict(unittest.TestCase):
+
+    def test_vertex_conflict_ignores_direction(self):
+        # Both robots reach (1, 0) at t=1, facing different ways
+        paths = [[(0, 0, 0), (1, 0, 0)], [(1, 1, 3), (1, 0, 3)]]
+        conflict = detect_conflict(paths)
+        self.assertEqual((conflict.type, conflict.time, conflict.x, conflict.y), ('vertex', 1, 1, 0))
+
+    def test_edge_conflict(self):
+        paths = [[(0, 0, 0), (1, 0, 0)], [(1, 0, 2), (0, 0, 2)]]
+        conflict = detect_conflict(paths)
+        self.assertEqual(conflict.type, 'edge')
+        self.assertEqual((conflict.agent_1, conflict.agent_2), (0, 1))
+
+    def test_parked_agent_is_hit_later(self):
+        # Agent 0 parks on (1, 0) at t=1; agent 1 drives through it at t=3
+        paths = [[(0, 0), (1, 0)], [(3, 0), (3, 0), (2, 0), (1, 0), (0, 0)]]
+        conflict = detect_conflict(paths)
+        self.assertEqual((conflict.time, conflict.x, conflict.y), (3, 1, 0))
+
+    def test_index_matches_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            paths = []
+            for _ in range(4):
+                x, y = rng.randrange(3), rng.randrange(3)
+                path = [(x, y)]
+                for _ in range(rng.randrange(6)):
+                    dx, dy = rng.choice([(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)])
+                    x, y = min(2, max(0, x + dx)), min(2, max(0, y + dy))
+                    path.append((x, y))
+                paths.append(path)
+            found = {(min(c.agent_1, c.agent_2), max(c.agent_1, c.agent_2)) for c in detect_all_conflicts(paths)}
+            self.assertEqual(found, brute_force_pairs(paths), paths)
+
+    def test_replacing_one_path(self):
+        paths = [[(0, 0), (1, 0)], [(1, 1), (1, 0)], [(2, 2)]]
+        index = ConflictIndex(paths)
+        self.assertEqual(len(index.conflicts_for(1, paths[1])), 1)
+        index.remove_path(1)
+        self.assertEqual(index.conflicts_for(1, [(1, 1), (1, 1), (2, 1)]), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from app.utils.grid import Grid
+from app.core.distance_store import DistanceStore, attach_stores, compile_map
+from app.core.heuristics import (build_distance_table, clear_distance_cache, detach_distance_store,
+                                 get_distance_table)
+
+class TestDistanceStore(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = Grid(width=5, height=4, obstacles=[(1, 1), (2, 1), (3, 2)])
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "layout.dist")
+
+    def tearDown(self):
+        detach_distance_store(self.grid.fingerprint)
+        clear_distance_cache()
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        print("\n--- Test 1: Compiled Tables Match ---")
+        self.assertEqual(compile_map(self.grid, self.path), 5 * 4 - 3)
+        store = DistanceStore(self.path)
+        self.assertEqual(store.fingerprint, self.grid.fingerprint)
+        self.assertEqual(store.grid.fingerprint, self.grid.fingerprint)
+        for goal in store.goals():
+            self.assertEqual(list(store.table(goal).dist), list(build_distance_table(self.grid, goal).dist))
+        self.assertIsNone(store.table((1, 1))) # Shelf
+        self.assertIsNone(store.table((9, 9)))
+
+    def test_lookup_hook(self):
+        print("\n--- Test 2: get_distance_table Reads the Store ---")
+        compile_map(self.grid, self.path, goals=[(4, 3)])
+        clear_distance_cache()
+        attach_stores(self.path)
+        mapped = get_distance_table(self.grid, (4, 3))
+        self.assertIsInstance(mapped.dist, memoryview)
+        self.assertEqual(mapped.get(0, 0, 0), build_distance_table(self.grid, (4, 3)).get(0, 0, 0))
+        # Goals that were not compiled are still built on demand
+        self.assertNotIsInstance(get_distance_table(self.grid, (0, 3)).dist, memoryview)
+
+    def test_rejects_other_versions(self):
+        print("\n--- Test 3: Version Check ---")
+        compile_map(self.grid, self.path, goals=[(0, 0)])
+        with open(self.path, "r+b") as f:
+            f.seek(8)
+            f.write((99).to_bytes(4, "little"))
+        with self.assertRaises(ValueError):
+            DistanceStore(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from app.utils.grid import Grid
+from app.core.cbs import CBSSolver
+from app.api.encoding import encode_actions, decode_actions, compact_paths, pose_delta
+
+class TestEncoding(unittest.TestCase):
+
+    def test_actions_round_trip(self):
+        grid = Grid(width=4, height=3, obstacles=[(1, 1)])
+        paths = CBSSolver(grid).solve([(0, 0, 0), (3, 2, 2)], [(0, 2), (3, 0)])
+        for path in paths:
+            actions = encode_actions(path)
+            self.assertEqual(len(actions), len(path) - 1)
+            self.assertEqual(decode_actions(path[0], actions), [tuple(p) for p in path])
+
+    def test_rejects_impossible_step(self):
+        with self.assertRaises(ValueError):
+            encode_actions([(0, 0, 0), (0, 1, 0)]) # Sideways
+        with self.assertRaises(ValueError):
+            encode_actions([(0, 0, 0), (0, 0, 2)]) # Half turn in one step
+
+    def test_compact_keeps_other_fields(self):
+        doc = {"status": "Running", "paths": [
+            {"agent_id": 0, "path": [[0, 0, 0], [0, 0, 1], [0, 1, 1], [0, 1, 1]], "battery": 90}]}
+        self.assertEqual(compact_paths(doc)["paths"],
+                         [{"agent_id": 0, "battery": 90, "start": [0, 0, 0], "actions": "RFW"}])
+
+    def test_pose_delta_sends_only_changes(self):
+        shown = {}
+        self.assertEqual(pose_delta([(0, 0, 0), (2, 2, 1)], shown), [[0, 0, 0, 0], [1, 2, 2, 1]])
+        self.assertEqual(pose_delta([(1, 0, 0), (2, 2, 1)], shown), [[0, 1, 0, 0]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import pickle
+import unittest
+from app.utils.grid import Grid
+from app.api.maps import MapRegistry
+
+class TestGrid(unittest.TestCase):
+
+    def test_bitmap_matches_obstacle_list(self):
+        grid = Grid(4, 3, [(1, 0), (3, 2), (9, 9)]) # (9, 9) is off the map
+        self.assertEqual(grid.obstacles, {(1, 0), (3, 2)})
+        self.assertTrue(grid.is_blocked(1, 0))
+        self.assertFalse(grid.is_blocked(0, 0))
+        self.assertTrue(grid.is_blocked(-1, 0))
+        self.assertEqual(grid.num_obstacles, 2)
+
+    def test_move_table(self):
+        grid = Grid(3, 3, [(1, 0)])
+        self.assertIsNone(grid.forward(0, 0, 0))   # East into the obstacle
+        self.assertIsNone(grid.forward(0, 0, 3))   # North off the map
+        self.assertEqual(grid.forward(0, 0, 1), (0, 1))
+        self.assertEqual(grid.forward(2, 1, 2), (1, 1))
+
+    def test_pickle_drops_move_table(self):
+        grid = Grid(3, 3, [(1, 1)])
+        grid.moves
+        clone = pickle.loads(pickle.dumps(grid))
+        self.assertIsNone(clone._moves)
+        self.assertEqual(clone.fingerprint, grid.fingerprint)
+        self.assertEqual(list(clone.moves), list(grid.moves))
+
+    def test_registry_is_content_addressed(self):
+        registry = MapRegistry(max_maps=1)
+        a = registry.register(5, 5, [(1, 1), (2, 2)])
+        b = registry.register(5, 5, [(2, 2), (1, 1)])
+        self.assertIs(a, b)
+        self.assertIs(registry.get(a.fingerprint), a)
+        registry.register(6, 6, [])
+        self.assertIsNone(registry.get(a.fingerprint)) # Evicted
+
+if __name__ == '__main__':
+    unittest.main()
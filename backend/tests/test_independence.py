@@ -0,0 +1,72 @@
+import unittest
+from app.utils.grid import Grid
+from app.core.cbs import CBSSolver
+from app.core.conflict import detect_all_conflicts
+from app.core.independence import IndependenceSolver
+from benchmarks.maps import warehouse_grid, random_instance
+
+def cost(paths):
+    return sum(len(p) - 1 for p in paths)
+
+class TestIndependenceDetection(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = Grid(width=7, height=7, obstacles=[(3, 1), (3, 2), (3, 4), (3, 5)])
+        # Agents 0 and 1 swap sides through the same gaps; 2 and 3 stay out of the way
+        self.starts = [(0, 3, 0), (6, 3, 2), (0, 0, 0), (6, 6, 2)]
+        self.goals = [(6, 3), (0, 3), (2, 0), (4, 6)]
+
+    def test_independent_agents_stay_apart(self):
+        print("\n--- Test 1: Independent Groups ---")
+        solver = IndependenceSolver(self.grid)
+        paths = solver.solve(self.starts[2:], self.goals[2:])
+        self.assertEqual(solver.status, "Solved")
+        self.assertEqual(solver.groups, [[0], [1]])
+        self.assertEqual(solver.stats.merges, 0)
+        self.assertEqual(cost(paths), 2 + 2)
+
+    def test_matches_cbs(self):
+        print("\n--- Test 2: Optimal Like CBS ---")
+        expected = cost(CBSSolver(self.grid).solve(self.starts, self.goals))
+        for workers in (None, 2):
+            solver = IndependenceSolver(self.grid, workers=workers)
+            paths = solver.solve(self.starts, self.goals)
+            self.assertEqual(solver.status, "Solved")
+            self.assertEqual(detect_all_conflicts(paths), [])
+            self.assertEqual(cost(paths), expected)
+            self.assertLessEqual(solver.stats.largest_group, 2)
+
+    def test_avoid_before_merge(self):
+        print("\n--- Test 3: Avoiding Instead of Merging ---")
+        grid = warehouse_grid(20, 20)
+        starts, goals = random_instance(grid, 3, seed=5)
+        solver = IndependenceSolver(grid)
+        paths = solver.solve(starts, goals)
+        self.assertEqual(solver.status, "Solved")
+        self.assertGreater(solver.stats.avoided, 0)
+        self.assertEqual(solver.stats.merges, 0) # One agent found an equally cheap way around
+        self.assertEqual(detect_all_conflicts(paths), [])
+        self.assertEqual(cost(paths), cost(CBSSolver(grid).solve(starts, goals)))
+
+    def test_oversized_groups(self):
+        print("\n--- Test 4: Groups Above max_group_size ---")
+        solver = IndependenceSolver(self.grid, max_group_size=1)
+        paths = solver.solve(self.starts, self.goals)
+        self.assertEqual(solver.status, "Solved")
+        self.assertEqual(detect_all_conflicts(paths), [])
+        self.assertEqual([tuple(p[-1][:2]) for p in paths], self.goals)
+
+    def test_rechecks_after_avoiding(self):
+        print("\n--- Test 5: Plan Checked Again After Avoiding ---")
+        # A round that only avoids leaves conflicts whose groups were busy that round
+        grid = Grid(width=8, height=7, obstacles=[(4, 6), (2, 2), (7, 5), (2, 5), (0, 0), (5, 3), (6, 6), (0, 2), (4, 1)])
+        starts = [(3, 5, 0), (2, 3, 0), (5, 4, 2), (4, 5, 0), (2, 1, 2), (5, 1, 0)]
+        goals = [(3, 4), (7, 3), (6, 5), (1, 4), (4, 0), (4, 4)]
+        solver = IndependenceSolver(grid)
+        paths = solver.solve(starts, goals)
+        self.assertEqual(solver.status, "Solved")
+        self.assertEqual(detect_all_conflicts(paths), [])
+        self.assertEqual(cost(paths), cost(CBSSolver(grid).solve(starts, goals)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import time
+import unittest
+from app.api.jobs import JobQueue, QueueFull
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = JobQueue(max_workers=2, max_pending=2)
+
+    def tearDown(self):
+        self.jobs.shutdown()
+
+    def test_submit_and_wait(self):
+        job_id = self.jobs.submit(pow, 2, 10)
+        asyncio.run(self.jobs.wait(job_id, timeout=30))
+        self.assertEqual(self.jobs.status(job_id), {"job_id": job_id, "status": "done", "result": 1024})
+
+    def test_wait_reports_failure_and_propagates_cancel(self):
+        failed = self.jobs.submit(pow, 2, "bad")
+        asyncio.run(self.jobs.wait(failed, timeout=30))
+        self.assertEqual(self.jobs.status(failed)["status"], "failed")
+
+        slow = self.jobs.submit(time.sleep, 1)
+        async def cancelled_waiter():
+            waiter = asyncio.ensure_future(self.jobs.wait(slow))
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            await waiter
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancelled_waiter())
+        self.assertNotEqual(self.jobs.status(slow)["status"], "cancelled") # The job itself runs on
+
+    def test_backpressure(self):
+        self.jobs.submit(time.sleep, 1)
+        self.jobs.submit(time.sleep, 1)
+        with self.assertRaises(QueueFull):
+            self.jobs.submit(time.sleep, 1)
+
+    def test_cancel(self):
+        job_id = self.jobs.submit(time.sleep, 1)
+        self.assertTrue(self.jobs.cancel(job_id))
+        self.assertEqual(self.jobs.status(job_id)["status"], "cancelled")
+
+    def test_stream_bounds_in_flight(self):
+        pulled = []
+        async def tasks():
+            for i, exponent in enumerate([3, "bad", 5]):
+                pulled.append(i)
+                yield i, pow, (2, exponent)
+            yield 3, None, (ValueError("unparsable line"),)
+
+        async def collect():
+            out = {}
+            async for index, ok, value in self.jobs.stream(tasks(), limit=1):
+                # With one slot, the next task is pulled only after this result
+                self.assertEqual(len(pulled), index + 1 if index < 3 else 3)
+                out[index] = (ok, value)
+            return out
+
+        out = asyncio.run(collect())
+        self.assertEqual(out[0], (True, 8))
+        self.assertFalse(out[1][0])
+        self.assertIsInstance(out[1][1], TypeError)
+        self.assertEqual(out[2], (True, 32))
+        self.assertEqual(str(out[3][1]), "unparsable line")
+
+if __name__ == '__main__':
+    unittest.main()
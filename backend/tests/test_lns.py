@@ -0,0 +1,36 @@
+import unittest
+from app.utils.grid import Grid
+from app.core.conflict import detect_all_conflicts
+from app.core.lns import LNSImprover
+
+class TestLNS(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = Grid(width=6, height=4, obstacles=[(2, 1), (3, 1)])
+        self.starts = [(0, 0, 0), (0, 3, 0), (5, 0, 2)]
+        self.goals = [(5, 0), (5, 3), (0, 0)]
+
+    def test_repairs_then_shortens(self):
+        # Agents 0 and 1 wait 5 steps before driving to their goals; agent 2
+        # was left parked on its start, which is agent 0's goal
+        paths = [[(0, 0, 0)] * 6 + [(x, 0, 0) for x in range(1, 6)],
+                 [(0, 3, 0)] * 6 + [(x, 3, 0) for x in range(1, 6)],
+                 [(5, 0, 2)] * 3]
+        lns = LNSImprover(self.grid, self.starts, self.goals, paths, neighborhood_size=2)
+        self.assertGreater(lns.conflicts, 0)
+        list(lns.improve(deadline_s=1.0))
+        self.assertEqual(lns.conflicts, 0)
+        self.assertEqual(detect_all_conflicts(lns.paths), [])
+        self.assertEqual([tuple(p[-1][:2]) for p in lns.paths], self.goals)
+        self.assertLess(lns.sum_of_costs, 10 + 10 + 2)
+
+    def test_rejects_worse_neighborhood(self):
+        paths = [[(x, 0, 0) for x in range(6)], [(x, 3, 0) for x in range(6)]]
+        lns = LNSImprover(self.grid, self.starts[:2], self.goals[:2], paths)
+        longer = {0: [(0, 0, 0)] + paths[0], 1: paths[1]}
+        self.assertIsNone(lns.offer("random", [0, 1], longer))
+        self.assertEqual(lns.paths, paths)
+        self.assertEqual(lns.sum_of_costs, 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import random
+import unittest
+from app.utils.grid import Grid
+from app.core.heuristics import get_distance_table, UNREACHABLE
+from app.core.low_level import space_time_astar, SearchTree
+from app.core.node import Constraint
+from app.core.sipp import sipp_astar
+
+class TestLowLevel(unittest.TestCase):
+
+    def test_distance_table_counts_rotations(self):
+        grid = Grid(width=5, height=1)
+        table = get_distance_table(grid, (4, 0))
+        self.assertEqual(table.get(0, 0, 0), 4) # Facing East: 4 moves
+        self.assertEqual(table.get(0, 0, 2), 6) # Facing West: 2 turns + 4 moves
+        self.assertEqual(table.get(4, 0, 3), 0)
+
+    def test_distance_table_respects_walls(self):
+        # Column x=2 is a wall, so the right half cannot reach (0, 0)
+        grid = Grid(width=5, height=3, obstacles=[(2, 0), (2, 1), (2, 2)])
+        table = get_distance_table(grid, (0, 0))
+        self.assertEqual(table.get(4, 2, 0), UNREACHABLE)
+        self.assertIsNone(space_time_astar(grid, (4, 2, 0), (0, 0), [], 0, current_battery=100))
+
+    def test_table_heuristic_matches_manhattan_cost(self):
+        # Detour around a shelf: both heuristics must find the same optimal cost
+        grid = Grid(width=6, height=6, obstacles=[(2, y) for y in range(5)])
+        fast = space_time_astar(grid, (0, 0, 0), (5, 0), [], 0, current_battery=100)
+        slow = space_time_astar(grid, (0, 0, 0), (5, 0), [], 0, current_battery=100, heuristic="manhattan")
+        self.assertEqual(fast.cost, slow.cost)
+        self.assertLess(fast.expansions, slow.expansions)
+
+    def test_goal_waits_for_late_constraints(self):
+        # Someone needs the goal cell at t=6, so the agent must not park there before
+        grid = Grid(width=3, height=1)
+        constraints = [Constraint(6, 0, 2, 0, is_vertex=True), Constraint(2, 1, 1, 0, is_vertex=True)]
+        res = space_time_astar(grid, (0, 0, 0), (2, 0), constraints, 0, current_battery=100)
+        self.assertEqual(len(res.path) - 1, 7)
+        self.assertNotEqual(res.path[6][:2], (2, 0))
+
+    def test_sipp_matches_astar_cost(self):
+        rng = random.Random(3)
+        for _ in range(100):
+            grid = Grid(width=5, height=5, obstacles=[(rng.randrange(5), rng.randrange(5)) for _ in range(5)])
+            free = [(x, y) for x in range(5) for y in range(5) if not grid.is_blocked(x, y)]
+            start, goal = rng.choice(free), rng.choice(free)
+            constraints = [Constraint(rng.randint(1, 12), 0, *rng.choice(free), is_vertex=True) for _ in range(8)]
+            fast = sipp_astar(grid, (*start, 0), goal, constraints, 0, current_battery=100, max_time=40)
+            slow = space_time_astar(grid, (*start, 0), goal, constraints, 0, current_battery=100, max_time=40)
+            self.assertEqual(fast is None, slow is None)
+            if fast:
+                self.assertEqual(fast.cost, slow.cost)
+                self.assertEqual(len(fast.path) - 1, fast.cost)
+
+    def test_resumed_search_matches_fresh(self):
+        # One constraint at a time on the current path, each search continuing the last
+        rng = random.Random(5)
+        reused = 0
+        for _ in range(40):
+            grid = Grid(width=7, height=7, obstacles=[(rng.randrange(7), rng.randrange(7)) for _ in range(8)])
+            free = [(x, y) for x in range(7) for y in range(7) if not grid.is_blocked(x, y)]
+            start, goal = (*rng.choice(free), rng.randrange(4)), rng.choice(free)
+            tree, constraints = SearchTree(), []
+            res = space_time_astar(grid, start, goal, constraints, 0, current_battery=100, record=tree)
+            while res is not None and len(constraints) < 5:
+                t = rng.randint(1, len(res.path) + 1)
+                x, y, _ = res.path[min(t, len(res.path) - 1)]
+                constraints = constraints + [Constraint(t, 0, x, y, is_vertex=True)]
+                fresh = space_time_astar(grid, start, goal, constraints, 0, current_battery=100)
+                child = SearchTree()
+                res = space_time_astar(grid, start, goal, constraints, 0, current_battery=100,
+                                       resume=(tree, t), record=child)
+                self.assertEqual(res is None, fresh is None)
+                if res is not None:
+                    self.assertEqual(res.cost, fresh.cost)
+                    self.assertEqual(res.path[0], start)
+                    self.assertNotIn((t, x, y), [(i, p[0], p[1]) for i, p in enumerate(res.path)])
+                    reused += res.reused
+                tree = child
+        self.assertGreater(reused, 0)
+
+    def test_sipp_waits_out_blocked_corridor(self):
+        # (1, 0) is taken for t=1..50: the robot has to wait in one interval
+        grid = Grid(width=3, height=1)
+        constraints = [Constraint(t, 0, 1, 0, is_vertex=True) for t in range(1, 51)]
+        res = sipp_astar(grid, (0, 0, 0), (2, 0), constraints, 0, current_battery=100)
+        self.assertEqual(res.cost, 52)
+        self.assertEqual(res.path[50], (0, 0, 0))
+        self.assertLess(res.expansions, 10)
+
+    def test_astar_searches_past_first_horizon(self):
+        # The marks first cover a few steps past h = 2; waiting 50 steps has to grow them
+        grid = Grid(width=3, height=1)
+        constraints = [Constraint(t, 0, 1, 0, is_vertex=True) for t in range(1, 51)]
+        res = space_time_astar(grid, (0, 0, 0), (2, 0), constraints, 0, current_battery=100)
+        self.assertEqual(res.cost, 52)
+        self.assertEqual(res.path[50], (0, 0, 0))
+        self.assertIsNone(space_time_astar(grid, (0, 0, 0), (2, 0), constraints, 0, current_battery=40))
+
+    def test_window_finishes_along_distance_table(self):
+        # Long corridor: only the first 4 steps are searched, the rest is the table's route
+        grid = Grid(width=30, height=1)
+        constraints = [Constraint(2, 0, 2, 0, is_vertex=True)]
+        for engine in (space_time_astar, sipp_astar):
+            full = engine(grid, (0, 0, 0), (29, 0), constraints, 0, current_battery=100)
+            windowed = engine(grid, (0, 0, 0), (29, 0), constraints, 0, current_battery=100, window=4)
+            self.assertEqual(windowed.cost, full.cost)
+            self.assertEqual(windowed.path[-1][:2], (29, 0))
+            self.assertNotEqual(windowed.path[2][:2], (2, 0))
+            self.assertLess(windowed.expansions, full.expansions)
+
+if __name__ == '__main__':
+    unittest.main()
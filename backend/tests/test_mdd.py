@@ -0,0 +1,58 @@
+import unittest
+from app.utils.grid import Grid
+from app.core.cbs import CBSSolver, min_vertex_cover
+from app.core.conflict import Conflict
+from app.core.constraint_table import ConstraintTable
+from app.core.corridor import corridor_constraints
+from app.core.mdd import build_mdd, classify_conflict, CARDINAL, SEMI_CARDINAL, NON_CARDINAL
+
+def corridor_grid(length):
+    """A 1-wide corridor of `length` cells on row 1 between two open columns."""
+    width = length + 2
+    return Grid(width, 3, [(x, y) for x in range(1, width - 1) for y in (0, 2)])
+
+class TestMDD(unittest.TestCase):
+
+    def test_levels_and_cardinality(self):
+        print("\n--- Test 1: MDD Cardinality ---")
+        grid = Grid(width=3, height=3)
+        # Facing East along the middle row: the only cost-2 path drives straight
+        straight = build_mdd(grid, (0, 1, 0), (2, 1), 2, ConstraintTable())
+        self.assertEqual(straight.cells, [{3}, {4}, {5}])
+        # One step more than that (e.g. after a constraint): the wait can come at any time
+        delayed = build_mdd(grid, (0, 1, 0), (2, 1), 3, ConstraintTable())
+        self.assertEqual(delayed.cells, [{3}, {3, 4}, {4, 5}, {5}])
+
+        crossing = Conflict(1, 'vertex', 0, 1, 1, 1)
+        self.assertEqual(classify_conflict(crossing, straight, straight), CARDINAL)
+        self.assertEqual(classify_conflict(crossing, straight, delayed), SEMI_CARDINAL)
+        self.assertEqual(classify_conflict(crossing, delayed, delayed), NON_CARDINAL)
+        # After its last level the agent is parked on its goal
+        self.assertEqual(classify_conflict(Conflict(7, 'vertex', 0, 1, 2, 1), straight, straight), CARDINAL)
+
+    def test_min_vertex_cover(self):
+        print("\n--- Test 2: Weighted Vertex Cover ---")
+        self.assertEqual(min_vertex_cover({}), 0)
+        self.assertEqual(min_vertex_cover({(0, 1): 1, (1, 2): 1, (0, 2): 1}), 2) # Triangle
+        self.assertEqual(min_vertex_cover({(0, 1): 2, (1, 2): 3, (3, 4): 1}), 4)
+
+    def test_corridor_reasoning(self):
+        print("\n--- Test 3: Corridor Reasoning ---")
+        grid = corridor_grid(6)
+        starts, goals = [(0, 0, 1), (7, 2, 3)], [(7, 0), (0, 2)]
+        head_on = Conflict(5, 'vertex', 0, 1, 4, 1)
+        branches = corridor_constraints(grid, head_on, [[(x, 1, 0) for x in range(8)], [(x, 1, 2) for x in range(7, -1, -1)]],
+                                        starts)
+        self.assertEqual([{c.agent_id for c in b} for b in branches], [{0}, {1}])
+        self.assertEqual({(c.x, c.y) for c in branches[0]}, {(7, 1)})
+
+        plain_solver = CBSSolver(grid, heuristic="none", prioritize=False, corridor=False)
+        plain = plain_solver.solve(starts, goals)
+        reasoned = CBSSolver(grid, heuristic="none", prioritize=False)
+        paths = reasoned.solve(starts, goals)
+        self.assertEqual(reasoned.status, "Solved")
+        self.assertEqual(sum(len(p) - 1 for p in paths), sum(len(p) - 1 for p in plain))
+        self.assertLess(reasoned.stats.hl_expanded, plain_solver.stats.hl_expanded / 4)
+
+if __name__ == '__main__':
+    unittest.main()
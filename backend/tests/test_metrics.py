@@ -0,0 +1,30 @@
+import unittest
+from app.api.metrics import SolverMetrics
+from app.core.cache import PATH_CACHE
+from app.core.cbs import CBSSolver
+from app.utils.grid import Grid
+
+class TestMetrics(unittest.TestCase):
+
+    def test_cbs_stats(self):
+        PATH_CACHE.clear()
+        solver = CBSSolver(Grid(width=3, height=3))
+        solver.solve([(0, 1), (2, 1)], [(2, 1), (0, 1)]) # Head-on: the root conflicts
+        stats = solver.stats.as_dict()
+        self.assertGreaterEqual(stats["hl_expanded"], 2)
+        self.assertGreater(stats["hl_generated"], stats["hl_expanded"])
+        self.assertEqual(stats["ll_expansions"] + stats["hl_expanded"], solver.budget.nodes)
+        self.assertGreater(stats["ll_peak_open"], 0)
+
+    def test_prometheus_histograms(self):
+        metrics = SolverMetrics()
+        metrics.observe("Solved", {"solver": "CBSSolver", "solve_time_s": 0.02, "ll_expansions": 50})
+        metrics.observe("Timeout", {"solver": "CBSSolver", "solve_time_s": 2.0, "ll_expansions": 5000})
+        text = metrics.render()
+        self.assertIn('opticbs_solves_total{solver="CBSSolver",status="Timeout"} 1', text)
+        self.assertIn('opticbs_solve_seconds_bucket{solver="CBSSolver",le="0.05"} 1', text)
+        self.assertIn('opticbs_solve_seconds_bucket{solver="CBSSolver",le="+Inf"} 2', text)
+        self.assertIn('opticbs_low_level_expansions_sum{solver="CBSSolver"} 5050', text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import unittest
+from app.utils.movingai import parse_map, parse_scenario
+from benchmarks import harness
+
+MAP = """type octile
+height 3
+width 4
+map
+..@.
+.T..
+....
+"""
+
+SCEN = """version 1
+0\trandom-4-3.map\t4\t3\t0\t0\t3\t0\t5
+0\trandom-4-3.map\t4\t3\t3\t2\t0\t2\t3
+"""
+
+class TestMovingAI(unittest.TestCase):
+
+    def test_parse_map_and_scenario(self):
+        grid = parse_map(MAP)
+        self.assertEqual((grid.width, grid.height), (4, 3))
+        self.assertEqual(grid.obstacles, {(2, 0), (1, 1)})
+        entries = parse_scenario(SCEN)
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0].map_name, "random-4-3.map")
+        self.assertEqual((entries[0].start, entries[0].goal), ((0, 0), (3, 0)))
+
+    def test_harness_report_and_compare(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "random-4-3.map"), "w") as f:
+                f.write(MAP)
+            with open(os.path.join(tmp, "random-4-3-random-1.scen"), "w") as f:
+                f.write(SCEN)
+            out = os.path.join(tmp, "report.json")
+            self.assertEqual(harness.main([tmp, "--agents", "1", "2", "--out", out]), 0)
+            with open(out) as f:
+                report = json.load(f)
+            self.assertEqual(len(report["results"]), 4)
+            self.assertTrue(all(r["success"] for r in report["results"]))
+
+            # Same numbers pass; costlier plans everywhere flag every run
+            self.assertEqual(harness.compare(report, report, 0.2), [])
+            worse = json.loads(json.dumps(report))
+            for r in worse["results"]:
+                r["sum_of_costs"] += 1
+            self.assertEqual(len(harness.compare(worse, report, 0.2)), 4)
+
+if __name__ == '__main__':
+    unittest.main()
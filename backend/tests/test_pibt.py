@@ -0,0 +1,45 @@
+import unittest
+from app.utils.grid import Grid
+from app.core.conflict import detect_all_conflicts
+from app.core.pibt import PIBTSolver
+from app.api.encoding import encode_actions
+
+class TestPIBT(unittest.TestCase):
+
+    def assertValidPlan(self, paths, starts, goals):
+        self.assertEqual(detect_all_conflicts(paths), [])
+        for path, start, goal in zip(paths, starts, goals):
+            self.assertEqual(tuple(path[0]), start)
+            self.assertEqual(tuple(path[-1][:2]), goal)
+            encode_actions(path) # Raises unless every step is wait / turn / forward
+
+    def test_open_grid_rollout(self):
+        grid = Grid(width=8, height=8, obstacles=[(3, y) for y in range(1, 7)])
+        starts = [(0, y, 0) for y in range(8)]
+        goals = [(7, 7 - y) for y in range(8)]
+        solver = PIBTSolver(grid, lacam=False)
+        paths = solver.solve(starts, goals)
+        self.assertEqual(solver.status, "Solved")
+        self.assertValidPlan(paths, starts, goals)
+
+    def test_pushes_parked_robot_into_pocket(self):
+        # Corridor with one side pocket; robot 1 sits on its goal in the way
+        #   . . . . .
+        #   # # . # #
+        grid = Grid(width=5, height=2, obstacles=[(0, 1), (1, 1), (3, 1), (4, 1)])
+        starts = [(0, 0, 0), (2, 0, 2)]
+        goals = [(4, 0), (2, 0)]
+        solver = PIBTSolver(grid)
+        paths = solver.solve(starts, goals)
+        self.assertEqual(solver.status, "Solved")
+        self.assertValidPlan(paths, starts, goals)
+        self.assertIn((2, 1), [tuple(p[:2]) for p in paths[1]])
+
+    def test_unreachable_goal_fails(self):
+        grid = Grid(width=3, height=1, obstacles=[(1, 0)])
+        solver = PIBTSolver(grid)
+        self.assertIsNone(solver.solve([(0, 0, 0)], [(2, 0)]))
+        self.assertEqual(solver.status, "Failed")
+
+if __name__ == '__main__':
+    unittest.main()
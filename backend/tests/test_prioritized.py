@@ -0,0 +1,67 @@
+import unittest
+from app.utils.grid import Grid
+from app.core.conflict import detect_all_conflicts
+import time
+from app.core.prioritized import PrioritizedPlanner, _plan_order
+
+class TestPrioritized(unittest.TestCase):
+
+    def setUp(self):
+        # Agent 0 already sits on its goal (1, 0), which is on agent 1's only
+        # route, so agent 0 has to step aside into (1, 1) and come back:
+        #   (0,0) (1,0) (2,0)
+        #   (0,1) (1,1)   X
+        self.grid = Grid(width=3, height=2, obstacles=[(2, 1)])
+        self.starts = [(1, 0, 1), (0, 0, 0)]
+        self.goals = [(1, 0), (2, 0)]
+
+    def test_parked_goal_blocks_later_agents(self):
+        planner = PrioritizedPlanner(self.grid)
+        paths = planner.solve(self.starts, self.goals)
+        # Agent 1 cannot drive through agent 0 parked on (1, 0): it stays put
+        self.assertEqual(paths[1], [(0, 0, 0)])
+        self.assertEqual(planner.status, "Partial")
+
+    def test_restarts_find_complete_order(self):
+        for workers in (2, 0): # Process pool, then in this process
+            planner = PrioritizedPlanner(self.grid, restarts=2, deadline_s=30, workers=workers)
+            paths = planner.solve(self.starts, self.goals)
+            self.assertEqual(planner.status, "Solved")
+            self.assertEqual([p[-1][:2] for p in paths], self.goals)
+            self.assertEqual(detect_all_conflicts(paths), [])
+
+    def test_pool_orders_stop_at_deadline(self):
+        # An order that only gets a worker after the deadline gives up at once
+        paths, failures, timed_out = _plan_order(self.grid, "astar", self.starts, self.goals, [1, 0],
+                                                 until=time.monotonic() - 1)
+        self.assertTrue(timed_out)
+        self.assertEqual(failures, 2)
+        paths, failures, timed_out = _plan_order(self.grid, "astar", self.starts, self.goals, [1, 0],
+                                                 until=time.monotonic() + 30)
+        self.assertEqual((failures, timed_out), (0, False))
+
+    def test_repair_replans_only_dropped_agents(self):
+        grid = Grid(width=5, height=3)
+        starts = [(0, 0, 0), (0, 2, 0), (2, 0, 1)]
+        goals = [(4, 0), (4, 2), (2, 2)]
+        planner = PrioritizedPlanner(grid)
+        paths = planner.solve(starts, goals)
+
+        # Agent 2 got a new goal, the others keep their paths
+        goals[2] = (0, 1)
+        repaired, replanned = planner.repair(starts, goals, [paths[0], paths[1], None])
+        self.assertEqual(replanned, [2])
+        self.assertEqual(planner.status, "Solved")
+        self.assertEqual(repaired[:2], paths[:2])
+        self.assertEqual(repaired[2][-1][:2], (0, 1))
+        self.assertEqual(detect_all_conflicts(repaired), [])
+
+        # Out of budget before the first search: dropped agents wait, and say why
+        short = PrioritizedPlanner(grid, node_budget=1)
+        repaired, _ = short.repair(starts, goals, [None, None, None])
+        self.assertEqual(short.status, "Timeout")
+        self.assertEqual(repaired, [[s] for s in starts])
+        self.assertLessEqual(short.stats.ll_calls, 1)
+
+if __name__ == '__main__':
+    unittest.main()